@@ -0,0 +1,306 @@
+"""
+bundle.py — sklearn-free, versioned model bundle (manifest JSON + .npz arrays).
+
+Purpose
+-------
+joblib artifacts pickle the whole sklearn object graph, so loading them needs
+the exact sklearn/pandas versions that trained them and imports all of
+sklearn. A bundle stores only what scoring needs (see scoring.py):
+
+- <stem>.bundle.npz   uncompressed arrays: vocabularies, encoder categories,
+                      imputer fills, scaler stats, coefficients
+- <stem>.bundle.json  manifest: schema version, per-branch metadata (incl.
+                      the parse step's outputs/options), array keys, SHA-256
+                      checksum of the .npz, training versions
+
+Loading memory-maps the .npz members (np.load(mmap_mode="r") semantics; .npz
+members are mapped directly since they are stored uncompressed), verifies the
+checksum and rebuilds a LinearScorer that matches pipeline.predict — in a few
+milliseconds and with NumPy as the only dependency. Categories, tokens and
+buckets are saved sorted, and the scorer searches the mapped arrays in place
+(scoring.SortedLookup): no per-process copy of them is built, so processes
+forked after loading share their pages.
+
+Public API
+----------
+- bundle_paths(artifact_path) -> (manifest_path, arrays_path)
+- save_bundle(pipeline, artifact_path) -> manifest_path
+- load_bundle(manifest_path, verify=True) -> LinearScorer
+- read_manifest(manifest_path) -> dict
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import struct
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from .scoring import TABLE_FORMAT, TABLE_VERSION, LinearScorer, SortedLookup, compile_scoring_table
+
+BUNDLE_FORMAT = "antique-atlas-bundle"
+BUNDLE_SCHEMA_VERSION = 3  # 2: ml{j}_ignored arrays (pruned vocabulary tokens); 3: model.parse
+
+
+# ------------------------------
+# Paths & checksums
+# ------------------------------
+
+def bundle_paths(artifact_path: str | Path) -> Tuple[Path, Path]:
+    """Manifest/array paths written next to a joblib artifact (or given a manifest path)."""
+    path = Path(artifact_path)
+    name = path.name
+    for suffix in (".bundle.json", ".bundle.npz", ".joblib"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return path.with_name(f"{name}.bundle.json"), path.with_name(f"{name}.bundle.npz")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _versions() -> Dict[str, str]:
+    import sys
+    out = {"python": sys.version.split()[0], "numpy": np.__version__}
+    for mod in ("sklearn", "pandas"):
+        m = sys.modules.get(mod)
+        if m is not None:
+            out[mod] = getattr(m, "__version__", "unknown")
+    return out
+
+
+# ------------------------------
+# Table <-> arrays
+# ------------------------------
+
+def _str_array(values: Any) -> np.ndarray:
+    # Fixed-width unicode (not object) so members stay memory-mappable
+    arr = np.asarray(list(values), dtype=str)
+    return arr if arr.size else np.zeros(0, dtype="<U1")
+
+
+def _table_to_arrays(table: Mapping[str, Any]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    arrays: Dict[str, np.ndarray] = {}
+    meta: Dict[str, Any] = {
+        "intercept": table["intercept"],
+        "parse": table.get("parse"),
+        "numeric": None,
+        "categorical": [],
+        "multilabel": [],
+    }
+
+    numeric = table["numeric"]
+    arrays["num_fill"] = np.array([n["fill"] for n in numeric], dtype=np.float64)
+    arrays["num_mean"] = np.array([n["mean"] for n in numeric], dtype=np.float64)
+    arrays["num_scale"] = np.array([n["scale"] for n in numeric], dtype=np.float64)
+    arrays["num_weight"] = np.array([n["weight"] for n in numeric], dtype=np.float64)
+    meta["numeric"] = {"names": [n["name"] for n in numeric]}
+
+    # Keys are stored sorted: the loaded scorer binary-searches them in place
+    for j, c in enumerate(table["categorical"]):
+        lookup = SortedLookup(_str_array(c["weights"].keys()), np.fromiter(c["weights"].values(), dtype=np.float64))
+        arrays[f"cat{j}_categories"], arrays[f"cat{j}_weights"] = lookup.keys_, lookup.values_
+        meta["categorical"].append({"name": c["name"], "fill": c["fill"], "key": f"cat{j}"})
+
+    for j, m in enumerate(table["multilabel"]):
+        entry = {"name": m["name"], "mode": m["mode"], "normalizer": m["normalizer"], "key": f"ml{j}"}
+        values = np.fromiter(m["weights"].values(), dtype=np.float64, count=len(m["weights"]))
+        if m["mode"] == "hash":
+            lookup = SortedLookup(np.array([int(b) for b in m["weights"]], dtype=np.int64), values)
+            arrays[f"ml{j}_buckets"] = lookup.keys_
+            entry["n_features"] = m["n_features"]
+        else:
+            lookup = SortedLookup(_str_array(m["weights"].keys()), values)
+            arrays[f"ml{j}_tokens"] = lookup.keys_
+            arrays[f"ml{j}_ignored"] = _str_array(sorted(m.get("ignored", ())))
+            entry["other_weight"] = m.get("other_weight")
+        arrays[f"ml{j}_weights"] = lookup.values_
+        meta["multilabel"].append(entry)
+
+    return meta, arrays
+
+
+def _arrays_to_table(meta: Mapping[str, Any], arrays: Mapping[str, np.ndarray]) -> Dict[str, Any]:
+    """Scoring table whose weights are SortedLookup views of `arrays` (not copies)."""
+    table: Dict[str, Any] = {
+        "format": TABLE_FORMAT,
+        "version": TABLE_VERSION,
+        "intercept": float(meta["intercept"]),
+        "parse": meta.get("parse"),  # absent before schema 3
+        "numeric": [],
+        "categorical": [],
+        "multilabel": [],
+    }
+    for j, name in enumerate(meta["numeric"]["names"]):
+        table["numeric"].append({
+            "name": name,
+            "fill": float(arrays["num_fill"][j]),
+            "mean": float(arrays["num_mean"][j]),
+            "scale": float(arrays["num_scale"][j]),
+            "weight": float(arrays["num_weight"][j]),
+        })
+    for c in meta["categorical"]:
+        k = c["key"]
+        weights = SortedLookup(arrays[f"{k}_categories"], arrays[f"{k}_weights"])
+        table["categorical"].append({"name": c["name"], "fill": c["fill"], "weights": weights})
+    for m in meta["multilabel"]:
+        k = m["key"]
+        entry = {"name": m["name"], "mode": m["mode"], "normalizer": m["normalizer"]}
+        if m["mode"] == "hash":
+            entry["n_features"] = m["n_features"]
+            entry["weights"] = SortedLookup(arrays[f"{k}_buckets"], arrays[f"{k}_weights"])
+        else:
+            entry["other_weight"] = m.get("other_weight")
+            entry["weights"] = SortedLookup(arrays[f"{k}_tokens"], arrays[f"{k}_weights"])
+            # Schema 1 bundles predate pruning
+            entry["ignored"] = SortedLookup(arrays[f"{k}_ignored"] if f"{k}_ignored" in arrays else np.zeros(0, dtype="<U1"))
+        table["multilabel"].append(entry)
+    return table
+
+
+# ------------------------------
+# Memory-mapped .npz writing & reading
+# ------------------------------
+
+# Zip extra-field id used for padding (as zipalign does); readers skip unknown ids
+_PAD_EXTRA_ID = 0xD935
+_ALIGN = 64  # .npy headers are padded to 64 bytes, so the array data lands aligned too
+
+
+def _savez_aligned(fh: Any, arrays: Mapping[str, np.ndarray]) -> None:
+    """np.savez (uncompressed) with every member starting on a 64-byte file offset.
+
+    np.savez leaves members at arbitrary offsets; an array mapped at an
+    unaligned address is copied by NumPy on every operation, which costs
+    time and gives each process its own copy.
+    """
+    with zipfile.ZipFile(fh, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for key, arr in arrays.items():
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, np.asanyarray(arr), allow_pickle=False)
+            info = zipfile.ZipInfo(f"{key}.npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_STORED
+            # Local header: 30 fixed bytes + name + extra (4-byte id/size + padding)
+            start = zf.fp.tell() + 30 + len(info.filename.encode("utf-8")) + 4
+            pad = -start % _ALIGN
+            info.extra = struct.pack("<HH", _PAD_EXTRA_ID, pad) + b"\0" * pad
+            zf.writestr(info, buf.getvalue())
+
+
+def _mmap_npz(path: Path) -> Dict[str, np.ndarray]:
+    """Map every (uncompressed) member of an .npz without reading it into memory.
+
+    np.load(..., mmap_mode="r") only maps bare .npy files; for .npz it silently
+    reads members. np.savez stores members uncompressed, so each array's bytes
+    sit contiguously in the zip and can be mapped at their offset.
+    """
+    out: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as fh:
+        for info in zf.infolist():
+            key = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                out[key] = np.load(zf.open(info))  # compressed member: regular read
+                continue
+            # Local file header: 30 fixed bytes + name + extra field
+            fh.seek(info.header_offset)
+            local = fh.read(30)
+            name_len = int.from_bytes(local[26:28], "little")
+            extra_len = int.from_bytes(local[28:30], "little")
+            fh.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+            offset = fh.tell()
+            if int(np.prod(shape)) == 0:
+                out[key] = np.zeros(shape, dtype=dtype)
+                continue
+            arr = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+            # A plain ndarray view (np.memmap adds overhead to every index/search). Members
+            # of bundles written with np.savez may be unaligned: copy those once, not per use
+            out[key] = arr.view(np.ndarray) if arr.flags.aligned else np.array(arr)
+    return out
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+
+def save_bundle(pipeline: Any, artifact_path: str | Path) -> Path:
+    """Compile a fitted pipeline and write <stem>.bundle.json + <stem>.bundle.npz.
+
+    Raises ValueError (from compile_scoring_table) for non-linear models.
+    """
+    manifest_path, arrays_path = bundle_paths(artifact_path)
+    table = compile_scoring_table(pipeline)
+    meta, arrays = _table_to_arrays(table)
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write arrays first; the manifest (with checksum) is the commit point
+    tmp_arrays = arrays_path.with_name(arrays_path.name + ".tmp")
+    with open(tmp_arrays, "wb") as f:
+        _savez_aligned(f, arrays)  # uncompressed and aligned -> mappable in place
+    os.replace(tmp_arrays, arrays_path)
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "schema_version": BUNDLE_SCHEMA_VERSION,
+        "created_utc": datetime.now(timezone.utc).isoformat(),
+        "arrays": arrays_path.name,
+        "sha256": _sha256(arrays_path),
+        "trained_with": _versions(),
+        "model": meta,
+    }
+    tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+    return manifest_path
+
+
+def read_manifest(manifest_path: str | Path) -> Dict[str, Any]:
+    """Read and validate a bundle manifest (format and schema version)."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{manifest_path} is not a model bundle manifest")
+    version = int(manifest.get("schema_version", 0))
+    if version > BUNDLE_SCHEMA_VERSION:
+        raise ValueError(f"Bundle schema version {version} is newer than supported {BUNDLE_SCHEMA_VERSION}")
+    return manifest
+
+
+def load_bundle(manifest_path: str | Path, verify: bool = True) -> LinearScorer:
+    """Load a bundle and rebuild its scorer.
+
+    Parameters
+    ----------
+    manifest_path : str | Path
+        Path to <stem>.bundle.json (a .joblib or .npz sibling path also works).
+    verify : bool, default=True
+        Check the .npz SHA-256 against the manifest before using it.
+    """
+    manifest_path, _ = bundle_paths(manifest_path)
+    manifest = read_manifest(manifest_path)
+    arrays_path = manifest_path.with_name(manifest["arrays"])
+    if verify:
+        digest = _sha256(arrays_path)
+        if digest != manifest["sha256"]:
+            raise ValueError(f"Checksum mismatch for {arrays_path}: {digest} != {manifest['sha256']}")
+    arrays = _mmap_npz(arrays_path)
+    scorer = LinearScorer(_arrays_to_table(manifest["model"], arrays))
+    scorer.manifest = manifest
+    return scorer
@@ -0,0 +1,395 @@
+"""
+compaction.py — Shrink a fitted linear pipeline to the features it actually uses.
+
+Purpose
+-------
+Many multi-label vocabulary columns (material__*, makerWorkshop__*,
+provenance__*) end up with zero or near-zero coefficients. They are pure
+overhead at inference: the token is still looked up, a column is still
+allocated in every transformed matrix, and the artifact / scoring table still
+carries it. Two compaction steps remove them from the fitted vocabularies and
+the matching entries from coef_:
+
+- drop_zero_coefficients(): exact zeros, as left by L1 models (model.type
+  "lasso" / "elasticnet"). Pruned tokens are marked "ignored" in their encoder,
+  so a row carrying one does NOT switch on the field's Other column (it never
+  did: the token had its own column), and predictions are unchanged.
+- compact_by_importance(): tokens whose importance |coef| * std(column) (the
+  measure explain.py reports, log-price units) is below a threshold. Removed
+  tokens are either folded into the field's Other column (mode="other") or
+  dropped (mode="drop"); the intercept and the Other weights are then refitted
+  by least squares with every remaining coefficient held fixed. The accuracy
+  delta is measured on held-out data (--val) or, without it, by repeated
+  K-fold (crossval.cv_splits): each fold refits the pipeline on its training
+  rows, compacts it the same way and scores its validation rows before and
+  after. The delta on the training rows is reported too, labelled in-sample:
+  those rows also set the stds and the refit, so it says little about new data.
+
+In both cases ColumnTransformer.output_indices_ and the regressor's
+n_features_in_ are updated to the narrower layout. Numeric and
+single-categorical columns keep their weights: their width is fixed by the
+data, not by a vocabulary. Ridge sufficient statistics (incremental.py) no
+longer match the columns and are discarded.
+
+Usage
+-----
+python -m src.compaction \
+  --model artifacts/pipeline.joblib \
+  --data data/swords_train.parquet \
+  --val data/swords_val.parquet \
+  --threshold 0.005 --mode other \
+  --out artifacts/pipeline.compact.joblib
+
+Without --val, the delta comes from --cv K --repeats R (default 5 x 1).
+
+Public API
+----------
+- drop_zero_coefficients(pipeline, tol=0.0) -> dict
+- compact_by_importance(pipeline, X, y, threshold, mode="other", X_eval=None, y_eval=None,
+                        cv=0, repeats=1, random_state=42) -> dict
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .bundle import save_bundle
+from .crossval import METRIC_NAMES, cv_splits
+from .lazy_imports import lazy_import
+
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+
+COMPACTION_MODES = ("other", "drop")
+
+
+# ------------------------------
+# Helpers
+# ------------------------------
+
+def _ml_transformer(ct: Any) -> Any:
+    for name, trans, _ in ct.transformers_:
+        if name == "ml":
+            return trans
+    return None
+
+
+def _apply_column_mask(pipeline: Any, keep: np.ndarray) -> None:
+    """Drop design-matrix columns where `keep` is False from the regressor and the ColumnTransformer layout."""
+    ct = pipeline.named_steps["preprocess"]
+    ttr = pipeline.named_steps["model"]
+    reg = ttr.regressor_
+
+    coef = np.asarray(reg.coef_)
+    reg.coef_ = coef[..., keep]
+    reg.n_features_in_ = int(keep.sum())
+
+    # New bounds = kept columns before the old bounds (empty slices stay empty)
+    kept_before = np.concatenate([[0], np.cumsum(keep)])
+    for name, sl in ct.output_indices_.items():
+        ct.output_indices_[name] = slice(int(kept_before[sl.start]), int(kept_before[sl.stop]))
+
+
+def _prune(pipeline: Any, select: Any, into_other: bool) -> Tuple[Dict[str, Any], int, int]:
+    """Prune the vocabulary tokens for which select(field, tokens, column_ids) is True.
+
+    column_ids index the full design matrix. Returns (per-field report,
+    features before, features after).
+    """
+    ct = pipeline.named_steps["preprocess"]
+    n_before = int(np.asarray(pipeline.named_steps["model"].regressor_.coef_).shape[-1])
+    ml = _ml_transformer(ct)
+    if ml is None:
+        return {}, n_before, n_before
+
+    start = ct.output_indices_["ml"].start
+    field_tokens: Dict[str, List[str]] = {}
+    fields: Dict[str, Any] = {}
+    for f, (field, enc) in enumerate(ml.encoders_.items()):
+        if not hasattr(enc, "vocabulary_"):
+            continue  # hashed: buckets are shared by unknown token sets
+        cols = start + ml.feature_offsets_[f] + np.arange(len(enc.vocabulary_))
+        pruned = [tok for tok, hit in zip(enc.vocabulary_, select(field, enc.vocabulary_, cols)) if hit]
+        field_tokens[field] = pruned
+        fields[field] = {"vocabulary_before": len(enc.vocabulary_), "pruned": pruned}
+
+    keep = np.ones(n_before, dtype=bool)
+    keep[ct.output_indices_["ml"]] = ml.prune_tokens(field_tokens, into_other=into_other)
+    _apply_column_mask(pipeline, keep)
+    return fields, n_before, int(keep.sum())
+
+
+def _other_columns(ct: Any) -> Dict[str, int]:
+    """Design-matrix column of each vocabulary field's Other indicator."""
+    ml = _ml_transformer(ct)
+    if ml is None:
+        return {}
+    start = ct.output_indices_["ml"].start
+    return {
+        field: start + ml.feature_offsets_[f] + len(enc.vocabulary_)
+        for f, (field, enc) in enumerate(ml.encoders_.items())
+        if hasattr(enc, "vocabulary_") and enc.include_other
+    }
+
+
+def _refit_intercept_and_other(pipeline: Any, X: Any, y: Any, fields: List[str]) -> Dict[str, float]:
+    """Least-squares intercept and Other weights of `fields`, every other coefficient fixed."""
+    ct = pipeline.named_steps["preprocess"]
+    ttr = pipeline.named_steps["model"]
+    reg = ttr.regressor_
+
+    Z = ct.transform(X)
+    t = ttr.func(np.asarray(y, dtype=float))
+    other_cols = _other_columns(ct)
+    cols = [other_cols[f] for f in fields if f in other_cols]
+
+    coef = np.asarray(reg.coef_, dtype=float).ravel().copy()
+    coef[cols] = 0.0
+    residual = t - np.asarray(Z @ coef).ravel()
+    free = np.ones((Z.shape[0], 1 + len(cols)))
+    if cols:
+        block = Z[:, cols]
+        free[:, 1:] = block.toarray() if hasattr(block, "toarray") else np.asarray(block, dtype=float)
+    sol = np.linalg.lstsq(free, residual, rcond=None)[0]
+
+    new_coef = np.array(reg.coef_, copy=True)
+    new_coef.reshape(-1)[cols] = sol[1:]
+    reg.coef_ = new_coef
+    reg.intercept_ = float(sol[0])
+    refitted = [f for f in fields if f in other_cols]
+    return {"intercept": float(sol[0]), "other_weights": {f: float(w) for f, w in zip(refitted, sol[1:])}}
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+
+def drop_zero_coefficients(pipeline: Any, tol: float = 0.0) -> Dict[str, Any]:
+    """Remove multi-label vocabulary tokens whose coefficient is |w| <= tol, in place.
+
+    Returns a JSON-serializable report: features before/after and, per field,
+    the vocabulary size before and the pruned tokens.
+    """
+    reg = pipeline.named_steps["model"].regressor_
+    if getattr(reg, "coef_", None) is None:
+        raise ValueError("Only linear models (with coef_) can be compacted.")
+    coef = np.asarray(reg.coef_, dtype=float).ravel()
+    fields, n_before, n_after = _prune(pipeline, lambda field, tokens, cols: np.abs(coef[cols]) <= tol, into_other=False)
+    return {
+        "n_features_before": n_before,
+        "n_features_after": n_after,
+        "tol": float(tol),
+        "fields": fields,
+    }
+
+
+def _compact(pipeline: Any, X: Any, y: Any, threshold: float, mode: str) -> Tuple[Dict[str, Any], int, int, Dict[str, float]]:
+    """Prune by importance on X and refit the intercept/Other weights on (X, y), in place."""
+    from .explain import _column_std
+
+    reg = pipeline.named_steps["model"].regressor_
+    importance = np.abs(np.asarray(reg.coef_, dtype=float).ravel()) * _column_std(pipeline.named_steps["preprocess"].transform(X))
+    fields, n_before, n_after = _prune(pipeline, lambda field, tokens, cols: importance[cols] < threshold, into_other=(mode == "other"))
+    changed = [f for f, info in fields.items() if info["pruned"]]
+    refit = _refit_intercept_and_other(pipeline, X, y, changed if mode == "other" else [])
+    return fields, n_before, n_after, refit
+
+
+def _cv_metrics(
+    pipeline: Any,
+    X: Any,
+    y: np.ndarray,
+    threshold: float,
+    mode: str,
+    k: int,
+    repeats: int,
+    random_state: int,
+) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, Any]]:
+    """Mean validation metrics before/after compacting a clone fitted on each fold's training rows."""
+    from sklearn.base import clone
+
+    from .train import _eval_metrics
+
+    folds: List[Dict[str, Any]] = []
+    for i, (tr, va) in enumerate(cv_splits(len(y), k, repeats, random_state)):
+        X_tr, X_va = X.iloc[tr], X.iloc[va]
+        fold_pipe = clone(pipeline).fit(X_tr, y[tr])
+        before = _eval_metrics(y[va], fold_pipe.predict(X_va))
+        _, _, n_after, _ = _compact(fold_pipe, X_tr, y[tr], threshold, mode)
+        after = _eval_metrics(y[va], fold_pipe.predict(X_va))
+        folds.append({
+            "repeat": i // k, "fold": i % k, "n_train": int(len(tr)), "n_val": int(len(va)),
+            "n_features_after": n_after, "before": before, "after": after,
+        })
+    metrics_before = {m: float(np.mean([f["before"][m] for f in folds])) for m in METRIC_NAMES}
+    metrics_after = {m: float(np.mean([f["after"][m] for f in folds])) for m in METRIC_NAMES}
+    delta_std = {m: float(np.std([f["after"][m] - f["before"][m] for f in folds])) for m in METRIC_NAMES}
+    return metrics_before, metrics_after, {"k": int(k), "repeats": int(repeats), "delta_std": delta_std, "folds": folds}
+
+
+def compact_by_importance(
+    pipeline: Any,
+    X: Any,
+    y: Any,
+    threshold: float,
+    mode: str = "other",
+    X_eval: Optional[Any] = None,
+    y_eval: Optional[Any] = None,
+    cv: int = 0,
+    repeats: int = 1,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Remove vocabulary tokens with |coef| * std(column) < threshold on X, in place.
+
+    Parameters
+    ----------
+    pipeline : fitted build_pipeline() output with a linear model.
+    X, y : data for the column stds and the intercept/Other refit (usually
+        the training data, y in dollars).
+    threshold : float
+        Importance cut-off in log-price units.
+    mode : {"other", "drop"}
+        Fold removed tokens into the field's Other column, or drop them.
+    X_eval, y_eval : held-out data for the metrics delta.
+    cv, repeats, random_state : without X_eval, estimate the delta by
+        repeated K-fold over (X, y) instead (cv >= 2 folds). Each fold fits a
+        clone of the pipeline on its training rows and compacts it.
+
+    Returns
+    -------
+    dict
+        JSON-serializable report: features before/after, pruned tokens per
+        field, refitted intercept/Other weights, the held-out or CV metrics
+        before/after and delta ("evaluation" says which), per-fold results
+        under "cv", and the training-data metrics under "in_sample".
+
+    Raises
+    ------
+    ValueError
+        For an unknown mode, a model without coef_, or neither held-out data
+        nor cv >= 2.
+    """
+    from .train import _eval_metrics
+
+    if mode not in COMPACTION_MODES:
+        raise ValueError(f"Unknown compaction mode {mode!r}. Use 'other' or 'drop'.")
+    reg = pipeline.named_steps["model"].regressor_
+    if getattr(reg, "coef_", None) is None:
+        raise ValueError("Only linear models (with coef_) can be compacted.")
+    if X_eval is None and cv < 2:
+        raise ValueError("The accuracy delta needs held-out data (X_eval, y_eval) or cv >= 2 folds; "
+                         "the training rows alone only give an in-sample delta.")
+
+    y = np.asarray(y, dtype=float)
+    cv_report = None
+    if X_eval is not None:
+        evaluation = "held-out"
+        metrics_before = _eval_metrics(y_eval, pipeline.predict(X_eval))
+    else:
+        evaluation = f"{repeats}x{cv}-fold CV"
+        metrics_before, metrics_after, cv_report = _cv_metrics(pipeline, X, y, threshold, mode, cv, repeats, random_state)
+    in_sample_before = _eval_metrics(y, pipeline.predict(X))
+
+    fields, n_before, n_after, refit = _compact(pipeline, X, y, threshold, mode)
+
+    if X_eval is not None:
+        metrics_after = _eval_metrics(y_eval, pipeline.predict(X_eval))
+    in_sample_after = _eval_metrics(y, pipeline.predict(X))
+    return {
+        "threshold": float(threshold),
+        "mode": mode,
+        "n_features_before": n_before,
+        "n_features_after": n_after,
+        "fields": fields,
+        "refit": refit,
+        "evaluation": evaluation,
+        "metrics_before": metrics_before,
+        "metrics_after": metrics_after,
+        "delta": {k: metrics_after[k] - metrics_before[k] for k in metrics_before},
+        "cv": cv_report,
+        "in_sample": {
+            "note": "training rows, which also set the stds and the refit; not an estimate for new data",
+            "metrics_before": in_sample_before,
+            "metrics_after": in_sample_after,
+            "delta": {k: in_sample_after[k] - in_sample_before[k] for k in in_sample_before},
+        },
+    }
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compact a trained linear pipeline by coefficient importance")
+    parser.add_argument("--model", type=str, default="artifacts/pipeline.joblib", help="Trained pipeline artifact")
+    parser.add_argument("--data", type=str, required=True, help="Training data for column stds and the intercept/Other refit (.parquet or .csv)")
+    parser.add_argument("--val", type=str, default=None, help="Held-out data for the accuracy delta (default: K-fold CV on --data)")
+    parser.add_argument("--cv", type=int, default=5, help="Folds for the CV accuracy delta when --val is not given")
+    parser.add_argument("--repeats", type=int, default=1, help="Repetitions of K-fold with different shuffles (with --cv)")
+    parser.add_argument("--random-state", type=int, default=42, help="Seed of the CV shuffles")
+    parser.add_argument("--threshold", type=float, default=0.005, help="Drop tokens with |coef| * std below this (log-price units)")
+    parser.add_argument("--mode", type=str, choices=COMPACTION_MODES, default="other", help="Fold removed tokens into Other, or drop them")
+    parser.add_argument("--out", type=str, default="artifacts/pipeline.compact.joblib", help="Output path for the compacted artifact")
+    parser.add_argument("--metrics", type=str, default="artifacts/metrics.json", help="Output path for metrics JSON")
+    args = parser.parse_args(argv)
+
+    # train.py imports this module for drop_zero_coefficients
+    from .pipeline import DEFAULT_CONFIG
+    from .train import _read_table
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = _read_table(args.data)
+    X, y = df.drop(columns=[target_col]), df[target_col]
+    X_eval = y_eval = None
+    if args.val:
+        df_val = _read_table(args.val)
+        X_eval, y_eval = df_val.drop(columns=[target_col]), df_val[target_col]
+
+    pipe = joblib.load(args.model)
+    try:
+        report = compact_by_importance(
+            pipe, X, y, args.threshold, args.mode, X_eval, y_eval,
+            cv=args.cv, repeats=args.repeats, random_state=args.random_state,
+        )
+    except ValueError as e:
+        raise SystemExit(f"[compaction.py] {e}")
+    print(f"[compaction.py] {report['n_features_before']} -> {report['n_features_after']} features "
+          f"(threshold={args.threshold}, mode={args.mode})")
+    print(f"[compaction.py] Metric delta ({report['evaluation']}):", json.dumps(report["delta"]))
+    print("[compaction.py] In-sample delta (training rows, not an estimate for new data):", json.dumps(report["in_sample"]["delta"]))
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.metrics).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, args.out)
+    bundle_path = None
+    try:
+        bundle_path = save_bundle(pipe, args.out)
+    except ValueError as e:
+        print(f"[compaction.py] Skipping bundle: {e}")
+
+    existing: Dict[str, Any] = {}
+    if Path(args.metrics).exists():
+        try:
+            with open(args.metrics, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except Exception:
+            existing = {}
+    payload = {
+        **existing,
+        "compacted_artifact": os.path.abspath(args.out),
+        "compacted_bundle_manifest": os.path.abspath(bundle_path) if bundle_path else None,
+        "compaction": report,
+    }
+    with open(args.metrics, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print("[compaction.py] Saved compacted pipeline to:", args.out)
+
+
+if __name__ == "__main__":
+    main()
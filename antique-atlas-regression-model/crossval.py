@@ -0,0 +1,168 @@
+"""
+crossval.py — Repeated K-fold evaluation over one shared, memory-mapped design matrix.
+
+Purpose
+-------
+With ~70 rows a single train/validation split is mostly noise, so train.py
+can report repeated K-fold metrics instead (--cv K --repeats R). To keep that
+cheap across cores:
+
+- preprocessing (imputation statistics, vocabularies, one-hot categories) is
+  label-free, so it is fitted ONCE on all rows and the data is transformed once;
+- the transformed matrix is written to a temporary directory as .npy files
+  (dense: one array; CSR: data/indices/indptr) and every worker opens it with
+  np.load(mmap_mode="r"), so pages are shared through the OS page cache
+  instead of pickling a copy per task;
+- each worker slices its fold rows, fits a clone of the pipeline's model step
+  (TransformedTargetRegressor) and reports MAE / RMSE / R^2 in dollars.
+
+Note: because preprocessing sees the validation rows' features (never their
+prices), these estimates are slightly optimistic for vocabulary effects.
+
+Public API
+----------
+- SharedDesignMatrix.dump(Z, directory) / .load()
+- cv_splits(n_rows, k=5, repeats=1, random_state=42) -> list[(train_idx, val_idx)]
+- cross_validate(pipeline, X, y, k=5, repeats=1, n_jobs=-1, random_state=42) -> dict
+"""
+from __future__ import annotations
+
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+METRIC_NAMES = ("MAE", "RMSE", "R2")
+
+
+# ------------------------------
+# Shared matrix on disk
+# ------------------------------
+
+class SharedDesignMatrix:
+    """A dense or CSR matrix stored as .npy files and reopened as read-only memmaps."""
+
+    def __init__(self, directory: str | Path, shape: Sequence[int], sparse: bool) -> None:
+        self.directory = str(directory)
+        self.shape = tuple(int(n) for n in shape)
+        self.sparse = bool(sparse)
+
+    @classmethod
+    def dump(cls, Z: Any, directory: str | Path) -> "SharedDesignMatrix":
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        sparse = hasattr(Z, "indptr")
+        if sparse:
+            Z = Z.tocsr()
+            np.save(path / "data.npy", Z.data)
+            np.save(path / "indices.npy", Z.indices)
+            np.save(path / "indptr.npy", Z.indptr)
+        else:
+            np.save(path / "dense.npy", np.ascontiguousarray(Z))
+        return cls(path, Z.shape, sparse)
+
+    def load(self) -> Any:
+        """Memory-mapped view (no copy) of the stored matrix."""
+        path = Path(self.directory)
+        if not self.sparse:
+            return np.load(path / "dense.npy", mmap_mode="r")
+        from scipy import sparse as sp
+
+        parts = [np.load(path / f"{name}.npy", mmap_mode="r") for name in ("data", "indices", "indptr")]
+        return sp.csr_matrix(tuple(parts), shape=self.shape, copy=False)
+
+    def rows(self, idx: np.ndarray) -> Any:
+        """Materialize only the given rows (a fold) from the shared matrix."""
+        Z = self.load()
+        return Z[idx] if hasattr(Z, "indptr") else np.asarray(Z[idx])
+
+
+# ------------------------------
+# Worker
+# ------------------------------
+
+def _fold_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+
+    return {
+        "MAE": float(mean_absolute_error(y_true, y_pred)),
+        "RMSE": float(root_mean_squared_error(y_true, y_pred)),
+        "R2": float(r2_score(y_true, y_pred)),
+    }
+
+
+def _run_fold(shared: SharedDesignMatrix, model: Any, y: np.ndarray, train_idx: np.ndarray, val_idx: np.ndarray) -> Dict[str, float]:
+    from sklearn.base import clone
+
+    est = clone(model).fit(shared.rows(train_idx), y[train_idx])
+    return _fold_metrics(y[val_idx], est.predict(shared.rows(val_idx)))
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+
+def cv_splits(n_rows: int, k: int = 5, repeats: int = 1, random_state: int = 42) -> List[Any]:
+    """The (train_idx, val_idx) pairs of repeated K-fold over n_rows rows, repeat-major."""
+    from sklearn.model_selection import RepeatedKFold
+
+    return list(RepeatedKFold(n_splits=k, n_repeats=repeats, random_state=random_state).split(np.arange(n_rows)))
+
+
+def cross_validate(
+    pipeline: Any,
+    X: Any,
+    y: Any,
+    k: int = 5,
+    repeats: int = 1,
+    n_jobs: int = -1,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Repeated K-fold metrics of an (unfitted) build_pipeline() output.
+
+    Returns a JSON-serializable dict with per-fold metrics, their mean/std and
+    wall times. The pipeline itself is not modified.
+    """
+    from sklearn.base import clone
+
+    t0 = time.perf_counter()
+    y_arr = np.asarray(y, dtype=float)
+    # Label-free: fitted once on all rows
+    Z = clone(pipeline.named_steps["preprocess"]).fit_transform(X)
+    model = pipeline.named_steps["model"]
+    splits = cv_splits(len(y_arr), k, repeats, random_state)
+    t_preprocess = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory(prefix="cv-design-") as tmp:
+        shared = SharedDesignMatrix.dump(Z, tmp)
+        del Z
+        if n_jobs == 1:
+            results = [_run_fold(shared, model, y_arr, tr, va) for tr, va in splits]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs if n_jobs > 0 else None) as pool:
+                futures = [pool.submit(_run_fold, shared, model, y_arr, tr, va) for tr, va in splits]
+                results = [fut.result() for fut in futures]
+
+    folds: List[Dict[str, Any]] = []
+    for i, ((tr, va), res) in enumerate(zip(splits, results)):
+        folds.append({"repeat": i // k, "fold": i % k, "n_train": int(len(tr)), "n_val": int(len(va)), **res})
+    aggregate = {
+        name: {
+            "mean": float(np.mean([f[name] for f in folds])),
+            "std": float(np.std([f[name] for f in folds])),
+        }
+        for name in METRIC_NAMES
+    }
+    return {
+        "k": int(k),
+        "repeats": int(repeats),
+        "n_jobs": int(n_jobs),
+        "preprocessing": "fitted once on all rows (label-free)",
+        "preprocess_seconds": round(t_preprocess, 3),
+        "wall_seconds": round(time.perf_counter() - t0, 3),
+        "aggregate": aggregate,
+        "folds": folds,
+    }
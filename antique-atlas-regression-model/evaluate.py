@@ -3,8 +3,10 @@ evaluate.py — Evaluate a trained pipeline on a held-out test set.
 
 What it does
 ------------
-- Loads a serialized sklearn Pipeline artifact (preprocess + model).
-- Loads a test dataset (Parquet/CSV), separates features/target.
+- Loads a serialized sklearn Pipeline artifact (preprocess + model), or an
+  sklearn-free bundle manifest (*.bundle.json, see bundle.py).
+- Loads a test dataset (Parquet/CSV, or a Parquet dataset directory from
+  ingest.py with optional --filter pushdown), separates features/target.
 - Produces evaluation metrics (MAE, RMSE, R^2) on the test set.
 - Optionally saves per-row errors and simple diagnostic summaries.
 - Merges results into artifacts/metrics.json (or a provided path).
@@ -22,30 +24,55 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
-import joblib
 import numpy as np
-import pandas as pd
-from sklearn.metrics import mean_absolute_error, root_mean_squared_error, r2_score
 
+from .bundle import load_bundle
+from .ingest import parse_filters, read_dataset
+from .lazy_imports import lazy_import
+from .parsing import parse_inputs
 from .pipeline import DEFAULT_CONFIG
 
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
 
-def _read_table(path: str | Path) -> pd.DataFrame:
+
+def _read_table(path: str | Path, columns: List[str] | None = None, filters: List[Tuple[str, str, Any]] | None = None) -> pd.DataFrame:
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
-    if path.suffix.lower() in {".parquet"}:
-        return pd.read_parquet(path)
+    if path.is_dir() or path.suffix.lower() in {".parquet"}:
+        return read_dataset(path, columns=columns, filters=filters)
     if path.suffix.lower() in {".csv"}:
+        if filters:
+            raise ValueError("--filter is only supported for Parquet inputs")
         return pd.read_csv(path)
-    raise ValueError(f"Unsupported file extension for {path}. Use .parquet or .csv")
+    raise ValueError(f"Unsupported file extension for {path}. Use .parquet, .csv or a Parquet directory")
+
+
+def _model_columns(model: Any) -> List[str]:
+    """Raw input columns a loaded pipeline or bundle scorer reads (from its fitted state)."""
+    steps = getattr(model, "named_steps", None)
+    if steps is not None:
+        ct = steps["preprocess"]
+        columns = [c for name, trans, cols in ct.transformers_ if name != "remainder" and trans != "drop" for c in cols]
+        return list(dict.fromkeys(columns))
+    table = model.table
+    numeric = [n["name"] for n in table["numeric"]]
+    parse = table.get("parse")
+    if parse:
+        numeric = parse_inputs(parse["outputs"], parse.get("options"))
+    columns = [*numeric, *(c["name"] for c in table["categorical"]), *(m["name"] for m in table["multilabel"])]
+    return list(dict.fromkeys(columns))
 
 
 def _eval_metrics(y_true: pd.Series, y_pred: np.ndarray) -> Dict[str, float]:
+    from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+
     mae = float(mean_absolute_error(y_true, y_pred))
-    rmse = float(root_mean_squared_error(y_true, y_pred, squared=False))
+    rmse = float(root_mean_squared_error(y_true, y_pred))
     r2 = float(r2_score(y_true, y_pred))
     return {"MAE": mae, "RMSE": rmse, "R2": r2}
 
@@ -64,25 +91,30 @@ def _summarize_errors(y_true: pd.Series, y_pred: np.ndarray) -> Dict[str, Any]:
 
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Evaluate trained pipeline on test set")
-    parser.add_argument("--model", type=str, default="artifacts/pipeline.joblib", help="Path to trained pipeline artifact")
+    parser.add_argument("--model", type=str, default="artifacts/pipeline.joblib", help="Path to trained pipeline artifact (.joblib) or bundle manifest (.bundle.json)")
     parser.add_argument("--test", type=str, default="data/swords_test.parquet", help="Path to test data (.parquet or .csv)")
     parser.add_argument("--metrics", type=str, default="artifacts/metrics.json", help="Path to metrics JSON (will be created or updated)")
     parser.add_argument("--errors", type=str, default=None, help="Optional path to write per-row errors CSV")
+    parser.add_argument("--filter", action="append", default=[], metavar="COL=V1[,V2]", help="Row filter pushed down into Parquet reads (repeatable; also COL!=V, COL>=NUM)")
     args = parser.parse_args(argv)
 
-    cfg = DEFAULT_CONFIG
-    target_col = cfg["target_col"]
+    target_col = DEFAULT_CONFIG["target_col"]
 
     # Load model
-    pipe = joblib.load(args.model)
+    is_bundle = args.model.endswith(".json")
+    model = load_bundle(args.model) if is_bundle else joblib.load(args.model)
 
-    # Load test data
-    df_test = _read_table(args.test)
+    # Load test data; the per-row errors CSV keeps every column, otherwise
+    # only the columns the artifact was fitted on are read
+    columns = None if args.errors else _model_columns(model) + [target_col]
+    df_test = _read_table(args.test, columns, parse_filters(args.filter))
     X_te = df_test.drop(columns=[target_col])
     y_te = df_test[target_col]
 
-    # Predict & evaluate
-    y_pred = pipe.predict(X_te)
+    # Predict
+    y_pred = model.predict(X_te.to_dict("records")) if is_bundle else model.predict(X_te)
+
+    # Evaluate
     metrics = _eval_metrics(y_te, y_pred)
     diag = _summarize_errors(y_te, y_pred)
 
@@ -33,16 +33,22 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple
 
-import joblib
 import numpy as np
-import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
 
+from .lazy_imports import lazy_import
+from .parsing import PARSED_COLUMNS
 from .pipeline import DEFAULT_CONFIG, get_feature_names
 
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
 
 # ------------------------------
 # Helpers
@@ -54,8 +60,10 @@ def _family_for_feature(name: str, config: Dict[str, Any]) -> str:
     Rules:
     - Multi-label: names like "material__gold" → family "material" (text before "__").
     - OneHot single-cats: names like "condition_Excellent" → family "condition" (text before first "_").
-    - Numeric: exact column names (e.g., "bladeLength") → family equals column name.
+    - Numeric: exact column names (e.g., "bladeLength", "era_year") → family equals column name.
     """
+    if name in config.get("numeric_cols", []):
+        return name
     if "__" in name:
         return name.split("__", 1)[0]
     if "_" in name:
@@ -76,7 +84,7 @@ def _linear_bits(pipeline: Pipeline) -> Tuple[np.ndarray, float]:
     if coef is None:
         raise RuntimeError("Inner regressor has no coef_. Ensure a linear model was used.")
     coef = np.asarray(coef, dtype=float).ravel()
-    return coef, float(intercept)
+    return coef, float(np.asarray(intercept, dtype=float).ravel()[0])
 
 
 def _transform_features(pipeline: Pipeline, X: pd.DataFrame) -> np.ndarray:
@@ -85,13 +93,19 @@ def _transform_features(pipeline: Pipeline, X: pd.DataFrame) -> np.ndarray:
     return ct.transform(X)
 
 
-def _std_by_feature(pipeline: Pipeline, X: pd.DataFrame, feature_names: List[str]) -> pd.Series:
-    Z = _transform_features(pipeline, X)
-    # Ensure dense array
+def _column_std(Z: Any) -> np.ndarray:
+    """Population std of each column of a dense or sparse design matrix."""
     if hasattr(Z, "toarray"):
-        Z = Z.toarray()
-    std = np.std(Z, axis=0, ddof=0)
-    return pd.Series(std, index=feature_names)
+        # Sparse: E[z^2] - E[z]^2 without densifying
+        Z = Z.tocsr()
+        mean = np.asarray(Z.mean(axis=0)).ravel()
+        mean_sq = np.asarray(Z.multiply(Z).mean(axis=0)).ravel()
+        return np.sqrt(np.maximum(mean_sq - mean ** 2, 0.0))
+    return np.std(Z, axis=0, ddof=0)
+
+
+def _std_by_feature(pipeline: Pipeline, X: pd.DataFrame, feature_names: List[str]) -> pd.Series:
+    return pd.Series(_column_std(_transform_features(pipeline, X)), index=feature_names)
 
 
 def _group_map(feature_names: List[str], config: Dict[str, Any]) -> Dict[str, List[int]]:
@@ -102,11 +116,26 @@ def _group_map(feature_names: List[str], config: Dict[str, Any]) -> Dict[str, Li
     return fam_to_idx
 
 
-def _coef_table(coef: np.ndarray, feature_names: List[str], config: Dict[str, Any]) -> pd.DataFrame:
+def _bucket_labels(pipeline: Pipeline) -> Dict[str, str]:
+    """Map hashed bucket feature names (e.g. "provenance__h123") to labels built from
+    the transformer's sampled reverse map (e.g. "provenance__{ulysses s. grant}")."""
+    ct: ColumnTransformer = pipeline.named_steps["preprocess"]
+    labels: Dict[str, str] = {}
+    for _, trans, _ in ct.transformers_:
+        encoders = getattr(trans, "encoders_", {}).values()
+        for encoder in encoders:
+            for bucket in getattr(encoder, "bucket_tokens_", {}):
+                labels[f"{encoder.feature_name}__h{bucket}"] = encoder.bucket_label(bucket)
+    return labels
+
+
+def _coef_table(coef: np.ndarray, feature_names: List[str], config: Dict[str, Any], labels: Dict[str, str] | None = None) -> pd.DataFrame:
     df = pd.DataFrame({
         "feature": feature_names,
         "coef_log": coef,
     })
+    labels = labels or {}
+    df["label"] = [labels.get(n, n) for n in feature_names]
     df["family"] = [ _family_for_feature(n, config) for n in feature_names ]
     df["abs_coef_log"] = df["coef_log"].abs()
     return df.sort_values("abs_coef_log", ascending=False).reset_index(drop=True)
@@ -142,7 +171,13 @@ def _toggle_group_delta(pipeline: Pipeline, row: pd.Series, family: str, feature
 
     # Heuristic: if family is a numeric column, set baseline to 0 (post-scaling this isn't exact, but gives a consistent neutral toggle).
     # For single-cat/multi-cat, we zero out dummy activation by setting empty/None or a rarely-used reference.
-    if family in config.get("numeric_cols", []):
+    if family in PARSED_COLUMNS and family in config.get("numeric_cols", []):
+        # Parsed features (era_year, ...) only exist after the parse step: blank
+        # their raw source columns so the imputer's median stands in. A source
+        # that is also a categorical column (era) is toggled along with it.
+        for col in PARSED_COLUMNS[family]:
+            X0[col] = np.nan
+    elif family in config.get("numeric_cols", []):
         X0[family] = 0
     elif family in config.get("single_categorical_cols", []):
         # Set to NaN; SimpleImputer+OneHot will impute most_frequent (approx baseline)
@@ -234,7 +269,7 @@ def main(argv: List[str] | None = None) -> None:
         raise RuntimeError(f"Coefficient vector length {len(coef_vec)} != features {len(fnames)}. Check pipeline.")
 
     # Per-feature table (log-space coefs)
-    coef_df = _coef_table(coef_vec, fnames, cfg)
+    coef_df = _coef_table(coef_vec, fnames, cfg, _bucket_labels(pipe))
 
     # Feature stds on this dataset (post-transform)
     stds = _std_by_feature(pipe, X, fnames)
@@ -0,0 +1,408 @@
+"""
+incremental.py — Fold new sales into a trained ridge pipeline from sufficient statistics.
+
+Purpose
+-------
+For a fixed feature space, ridge regression only needs
+
+    n, Σx, Σt, XᵀX, Xᵀt, Σt²        (t = log1p(price), x = transformed features)
+
+so train.py (and tune.py) write these to a sidecar file next to the
+artifact (``pipeline.stats.joblib`` for ``pipeline.joblib``) and this module
+folds a new batch of closed auctions into them and re-solves for every alpha
+in ``model.alphas`` — O(width³), independent of how long the history is.
+
+The statistics are width² floats, so they stay out of the artifact that
+every serving / reload / prefork process loads; only this module reads the
+sidecar. It also keeps the multi-label token counts behind each vocabulary,
+which the transformers drop from pickles. It records the SHA-256 of the artifact it belongs to and is ignored
+(full refit) once the artifact is replaced by one written without it.
+
+The feature space is frozen between full refits (imputer/scaler statistics,
+one-hot categories, multi-label vocabularies). A batch is folded in only if a
+full refit would produce the same columns:
+
+- multi-label vocabulary fields: the stored token counters are advanced with
+  the batch (partial_fit on a copy); if the selected vocabulary SET changes
+  (a token enters/leaves top_k, or passes min_freq), a refit is required;
+- single-categorical fields: a category never seen in training requires a refit;
+- hashed fields never change width.
+
+Otherwise the update reports ``refit_required`` with reasons, and the CLI
+falls back to a full refit on --history + the new batch.
+
+Alpha selection
+---------------
+RidgeCV's efficient leave-one-out needs per-row leverages, which statistics
+cannot provide. Alphas are therefore ranked by generalized cross-validation,
+GCV(α) = n · RSS(α) / (n − 1 − df(α))², computed from one eigendecomposition
+of the centered XᵀX.
+
+Public API
+----------
+- RidgeSufficientStats
+- compute_sufficient_stats(pipeline, X, y, max_features=4096) -> RidgeSufficientStats | None
+- stats_path(artifact_path) -> Path
+- save_sufficient_stats(stats, artifact_path, pipeline=None) -> Path
+- load_sufficient_stats(artifact_path, pipeline=None) -> RidgeSufficientStats | None
+- check_feature_space(pipeline, X_new) -> (reasons, updated_ml_transformer)
+- update_pipeline(pipeline, X_new, y_new, stats) -> dict
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bundle import save_bundle
+from .lazy_imports import lazy_import
+from .pipeline import DEFAULT_CONFIG, build_pipeline
+
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+# XᵀX is width² float64s: 4096 features -> 128 MiB
+MAX_STATS_FEATURES = 4096
+
+
+# ------------------------------
+# Sufficient statistics
+# ------------------------------
+
+class RidgeSufficientStats:
+    """Accumulated n, Σx, Σt, Σt², XᵀX and Xᵀt of a design matrix and target.
+
+    Parameters
+    ----------
+    n_features : int
+        Width of the (transformed) design matrix.
+    """
+
+    def __init__(self, n_features: int) -> None:
+        self.n_features = int(n_features)
+        self.n = 0
+        self.x_sum = np.zeros(self.n_features)
+        self.t_sum = 0.0
+        self.tt = 0.0
+        self.xtx = np.zeros((self.n_features, self.n_features))
+        self.xty = np.zeros(self.n_features)
+
+    def update(self, Z: Any, t: np.ndarray) -> "RidgeSufficientStats":
+        """Add rows Z (dense or sparse) with targets t."""
+        t = np.asarray(t, dtype=np.float64).ravel()
+        if Z.shape[1] != self.n_features:
+            raise ValueError(f"Batch has {Z.shape[1]} features, statistics have {self.n_features}")
+        if hasattr(Z, "indptr"):
+            Z = Z.astype(np.float64)
+            xtx = (Z.T @ Z).toarray()
+            x_sum = np.asarray(Z.sum(axis=0)).ravel()
+        else:
+            Z = np.asarray(Z, dtype=np.float64)
+            xtx = Z.T @ Z
+            x_sum = Z.sum(axis=0)
+        self.n += len(t)
+        self.x_sum += x_sum
+        self.t_sum += float(t.sum())
+        self.tt += float(t @ t)
+        self.xtx += xtx
+        self.xty += np.asarray(Z.T @ t).ravel()
+        return self
+
+    def _centered(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float, float]:
+        x_mean = self.x_sum / self.n
+        t_mean = self.t_sum / self.n
+        C = self.xtx - self.n * np.outer(x_mean, x_mean)
+        c = self.xty - self.n * x_mean * t_mean
+        tt_c = self.tt - self.n * t_mean ** 2
+        return C, c, x_mean, t_mean, tt_c
+
+    def solve(self, alphas: Sequence[float]) -> Dict[str, Any]:
+        """Ridge solution with intercept for the GCV-best alpha of the grid.
+
+        Returns
+        -------
+        dict
+            coef, intercept, alpha and the GCV score of every alpha.
+        """
+        if self.n < 2:
+            raise ValueError("Need at least 2 rows to solve")
+        C, c, x_mean, t_mean, tt_c = self._centered()
+        lam, Q = np.linalg.eigh(C)
+        lam = np.maximum(lam, 0.0)  # round-off can push tiny eigenvalues below 0
+        p = Q.T @ c
+
+        gcv: List[float] = []
+        for a in alphas:
+            inv = 1.0 / (lam + a)
+            rss = tt_c - float(np.sum(p ** 2 * (2.0 * inv - lam * inv ** 2)))
+            dof = float(np.sum(lam * inv))
+            denom = self.n - 1.0 - dof
+            gcv.append(self.n * max(rss, 0.0) / denom ** 2 if denom > 0 else float("inf"))
+        best = int(np.argmin(gcv))
+        alpha = float(alphas[best])
+        coef = Q @ (p / (lam + alpha))
+        return {
+            "coef": coef,
+            "intercept": float(t_mean - x_mean @ coef),
+            "alpha": alpha,
+            "gcv": dict(zip((float(a) for a in alphas), gcv)),
+        }
+
+
+# ------------------------------
+# Pipeline integration
+# ------------------------------
+
+def _target(ttr: Any, y: Any) -> np.ndarray:
+    return np.asarray(ttr.func(np.asarray(y, dtype=float)), dtype=np.float64)
+
+
+def compute_sufficient_stats(pipeline: Any, X: Any, y: Any, max_features: int = MAX_STATS_FEATURES) -> Optional[RidgeSufficientStats]:
+    """Statistics of a fitted ridge pipeline's training data.
+
+    Returns None for non-ridge models or designs wider than max_features
+    (e.g. hashed fields).
+    """
+    from sklearn.linear_model import Ridge, RidgeCV
+
+    ttr = pipeline.named_steps["model"]
+    # ElasticNetCV/LassoCV also have alpha_, but the closed-form ridge solve does not apply
+    if not isinstance(ttr.regressor_, (Ridge, RidgeCV)):
+        return None
+    Z = pipeline.named_steps["preprocess"].transform(X)
+    if Z.shape[1] > max_features:
+        return None
+    return RidgeSufficientStats(Z.shape[1]).update(Z, _target(ttr, y))
+
+
+def stats_path(artifact_path: str | Path) -> Path:
+    """Sidecar path of an artifact's statistics (pipeline.joblib -> pipeline.stats.joblib)."""
+    path = Path(artifact_path)
+    name = path.name[: -len(".joblib")] if path.name.endswith(".joblib") else path.name
+    return path.with_name(f"{name}.stats.joblib")
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _vocabulary_encoders(pipeline: Any) -> Dict[str, Any]:
+    """Multi-label encoders with a learned vocabulary (hashed fields have none), by field."""
+    ml = pipeline.named_steps["preprocess"].named_transformers_.get("ml")
+    encoders = getattr(ml, "encoders_", {})
+    return {field: enc for field, enc in encoders.items() if hasattr(enc, "vocabulary_")}
+
+
+def save_sufficient_stats(stats: RidgeSufficientStats, artifact_path: str | Path, pipeline: Any = None) -> Path:
+    """Write the sidecar of an artifact that is already on disk; returns its path.
+
+    With `pipeline` (the fitted object just saved), its vocabulary token
+    counts are stored too.
+    """
+    counters = {}
+    if pipeline is not None:
+        counters = {
+            field: enc.token_counter_
+            for field, enc in _vocabulary_encoders(pipeline).items()
+            if getattr(enc, "token_counter_", None) is not None
+        }
+    path = stats_path(artifact_path)
+    tmp = path.with_name(path.name + ".tmp")
+    payload = {"artifact_sha256": _file_sha256(Path(artifact_path)), "ridge": stats, "token_counters": counters}
+    joblib.dump(payload, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def load_sufficient_stats(artifact_path: str | Path, pipeline: Any = None) -> Optional[RidgeSufficientStats]:
+    """The artifact's statistics, or None if there is no sidecar or it belongs to another artifact.
+
+    With `pipeline` (the loaded artifact), the stored token counts are put
+    back on its multi-label encoders.
+    """
+    path = stats_path(artifact_path)
+    if not path.exists():
+        return None
+    payload = joblib.load(path)
+    if payload.get("artifact_sha256") != _file_sha256(Path(artifact_path)):
+        return None
+    if pipeline is not None:
+        counters = payload.get("token_counters", {})
+        for field, enc in _vocabulary_encoders(pipeline).items():
+            if field in counters:
+                enc.token_counter_ = counters[field]
+    return payload["ridge"]
+
+
+def check_feature_space(pipeline: Any, X_new: Any) -> Tuple[List[str], Any]:
+    """Reasons the batch would change the feature space (empty if it is fixed).
+
+    Also returns a copy of the multi-label transformer whose vocabulary token
+    counters include the batch (vocabularies and column order untouched), to
+    be swapped in when the batch is folded in.
+    """
+    ct = pipeline.named_steps["preprocess"]
+    reasons: List[str] = []
+    ml_updated = None
+    for name, trans, cols in ct.transformers_:
+        if name == "cat":
+            imputer, onehot = trans.named_steps["imputer"], trans.named_steps["onehot"]
+            values = imputer.transform(X_new[cols])
+            for j, col in enumerate(cols):
+                unseen = set(values[:, j].tolist()) - set(onehot.categories_[j].tolist())
+                if unseen:
+                    reasons.append(f"{col}: new categories {sorted(map(str, unseen))[:5]}")
+        elif name == "ml":
+            vocab = {field: enc for field, enc in trans.encoders_.items() if hasattr(enc, "vocabulary_")}
+            missing = [field for field, enc in vocab.items() if getattr(enc, "token_counter_", None) is None]
+            if missing:
+                reasons.append(f"{', '.join(missing)}: no token counts for this artifact")
+                continue
+            # deepcopy drops the (unpickled) token counts; carry copies over
+            probe = copy.deepcopy(trans)
+            for field, enc in vocab.items():
+                probe.encoders_[field].token_counter_ = copy.deepcopy(enc.token_counter_)
+            probe.partial_fit(X_new[cols])
+            ml_updated = copy.deepcopy(trans)
+            for field, enc in vocab.items():
+                grown = probe.encoders_[field]
+                if set(grown.vocabulary_) != set(enc.vocabulary_):
+                    added = sorted(set(grown.vocabulary_) - set(enc.vocabulary_))
+                    reasons.append(f"{field}: vocabulary changes (e.g. adds {added[:5]})")
+                # Keep the frozen column order; only the counts move forward
+                ml_updated.encoders_[field].token_counter_ = grown.token_counter_
+    return reasons, ml_updated
+
+
+def update_pipeline(pipeline: Any, X_new: Any, y_new: Any, stats: Optional[RidgeSufficientStats]) -> Dict[str, Any]:
+    """Fold a batch into `stats` and re-solve the ridge coefficients in place.
+
+    The pipeline and `stats` are left untouched when a refit is required.
+
+    Returns
+    -------
+    dict
+        {"refit_required": bool, "reasons": [...], "alpha", "n_total", "gcv"}.
+    """
+    ttr = pipeline.named_steps["model"]
+    if stats is None:
+        return {"refit_required": True, "reasons": ["no sufficient statistics for this artifact"]}
+
+    reasons, ml_updated = check_feature_space(pipeline, X_new)
+    if reasons:
+        return {"refit_required": True, "reasons": reasons}
+
+    ct = pipeline.named_steps["preprocess"]
+    Z = ct.transform(X_new)
+    stats.update(Z, _target(ttr, y_new))
+    reg = ttr.regressor_
+    sol = stats.solve([float(a) for a in np.atleast_1d(getattr(reg, "alphas", reg.alpha_))])
+
+    reg.coef_ = sol["coef"].astype(np.asarray(reg.coef_).dtype, copy=False)
+    reg.intercept_ = np.asarray(reg.intercept_).dtype.type(sol["intercept"])
+    reg.alpha_ = sol["alpha"]
+    if ml_updated is not None:
+        # Swap in the counters advanced with this batch (same vocabulary/order)
+        for i, (name, trans, cols) in enumerate(ct.transformers_):
+            if name == "ml":
+                ct.transformers_[i] = (name, ml_updated, cols)
+    return {
+        "refit_required": False,
+        "reasons": [],
+        "alpha": sol["alpha"],
+        "n_total": int(stats.n),
+        "gcv": sol["gcv"],
+    }
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Fold new sales into a trained ridge pipeline")
+    parser.add_argument("--model", type=str, default="artifacts/pipeline.joblib", help="Trained artifact (with its .stats.joblib sidecar)")
+    parser.add_argument("--new", type=str, required=True, help="New batch of sales (.parquet or .csv)")
+    parser.add_argument("--history", type=str, default=None, help="Previous training data, used for a full refit if the feature space must grow")
+    parser.add_argument("--out", type=str, default=None, help="Output artifact path (default: overwrite --model)")
+    parser.add_argument("--metrics", type=str, default="artifacts/metrics.json", help="Output path for metrics JSON")
+    args = parser.parse_args(argv)
+
+    # train.py imports this module for compute_sufficient_stats
+    from .train import _eval_metrics, _read_table
+
+    cfg: Dict[str, Any] = DEFAULT_CONFIG
+    target_col = cfg["target_col"]
+    out = args.out or args.model
+
+    df_new = _read_table(args.new)
+    X_new = df_new.drop(columns=[target_col])
+    y_new = df_new[target_col]
+
+    pipe = joblib.load(args.model)
+    stats = load_sufficient_stats(args.model, pipe)
+    report = update_pipeline(pipe, X_new, y_new, stats)
+    mode = "incremental"
+    if report["refit_required"]:
+        for reason in report["reasons"]:
+            print(f"[incremental.py] Refit required: {reason}")
+        if not args.history:
+            raise SystemExit("[incremental.py] Cannot fold the batch in; pass --history to refit on history + new batch.")
+        df_all = pd.concat([_read_table(args.history), df_new], ignore_index=True)
+        X_all, y_all = df_all.drop(columns=[target_col]), df_all[target_col]
+        pipe = build_pipeline(cfg).fit(X_all, y_all)
+        stats = compute_sufficient_stats(pipe, X_all, y_all)
+        mode = "full_refit"
+        report["n_total"] = int(len(df_all))
+        report["alpha"] = float(pipe.named_steps["model"].regressor_.alpha_)
+    print(f"[incremental.py] {mode}: n_total={report['n_total']} alpha={report['alpha']}")
+
+    # In-sample metrics on the new batch (the rows just folded in)
+    metrics = _eval_metrics(y_new, pipe.predict(X_new))
+
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.metrics).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, out)
+    if stats is not None:
+        save_sufficient_stats(stats, out, pipe)
+    bundle_path = None
+    try:
+        bundle_path = save_bundle(pipe, out)
+    except ValueError as e:
+        print(f"[incremental.py] Skipping bundle: {e}")
+
+    existing: Dict[str, Any] = {}
+    if Path(args.metrics).exists():
+        try:
+            with open(args.metrics, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except Exception:
+            existing = {}
+    payload = {
+        **existing,
+        "train_artifact": os.path.abspath(out),
+        "bundle_manifest": os.path.abspath(bundle_path) if bundle_path else None,
+        "incremental": {
+            "mode": mode,
+            "reasons": report["reasons"],
+            "n_new": int(len(df_new)),
+            "n_total": report["n_total"],
+            "alpha": report["alpha"],
+            "new_batch_metrics": metrics,
+        },
+    }
+    with open(args.metrics, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print("[incremental.py] Saved pipeline to:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""
+ingest.py — Stream the sword corpora into one partitioned Parquet dataset.
+
+Purpose
+-------
+Training data is spread over several hand-collected sources:
+
+- data/swords.json, data/swords-cleaned.json and the regional
+  data/swords-{american,asian,european,other}.json (JSON arrays of records;
+  the regional files call the target "value" instead of "price_usd"),
+- data/swords.py, a Python literal list whose trailing comments carry the
+  blade-length unit ("# inches", "# cm").
+
+This command replaces the one-file-at-a-time utility/conversion.py:
+
+1. Records are parsed incrementally: JSON arrays (or NDJSON) are decoded one
+   record at a time from a fixed-size read buffer, so a large dump is never
+   loaded whole; the Python source is parsed with ast (literals only, nothing
+   is executed).
+2. Each record is coerced to sword_schema(): "value" → "price_usd", multi-label
+   fields as Arrow list<string> (a bare string becomes a one-element list),
+   list-valued text fields joined with "; ", numbers as float64, unknown keys
+   dropped (and counted). Every row records its `source` (file name) and, when
+   known, `bladeLength_unit`.
+3. Record batches are written as a hive-partitioned Parquet dataset
+   (default: by `source`, e.g. out/source=swords-asian.json/part-0.parquet).
+   The dataset is built in a temporary sibling directory and moved into place
+   only once complete, with a marker file (_ingest.json, the run's report;
+   readers skip "_" files). An existing --out is replaced only if it carries
+   that marker, and --out may not be (or contain) any source file.
+
+Several sources overlap (the regional files re-list records of swords.json,
+swords-cleaned.json is a cleaned copy), so training normally selects sources
+with a partition filter rather than reading everything:
+
+    python -m src.train --train data/swords_dataset --filter source=swords.json
+
+read_dataset() is what train.py / evaluate.py use for such directories: only
+the requested columns are read and filters are pushed down to partition
+pruning and Parquet row-group statistics.
+
+Usage
+-----
+python -m src.ingest --out data/swords_dataset [--partition-by source] [SOURCES ...]
+
+Public API
+----------
+- sword_schema(), LIST_FIELDS
+- JSONRecordDecoder().feed(text) / .close() -> list
+- iter_json_records(path, chunk_size=65536) -> Iterator[dict]
+- iter_python_records(path) -> Iterator[dict]
+- iter_source_records(path) -> Iterator[dict]
+- normalize_record(record, source) -> dict
+- ingest(sources, out_dir, partition_by="source", batch_size=1024) -> dict
+- parse_filters(specs) -> list[(column, op, value)]
+- filter_expression(filters) -> pyarrow.compute.Expression
+- open_dataset(path) -> pyarrow.dataset.Dataset
+- read_dataset(path, columns=None, filters=None) -> pd.DataFrame
+- arrow_to_pandas(table_or_batch) -> pd.DataFrame
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import io
+import json
+import os
+import re
+import shutil
+import tokenize
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .lazy_imports import lazy_import
+
+# Heavy dependencies load on first use, after argument parsing
+pa = lazy_import("pyarrow")
+pd = lazy_import("pandas")
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+DEFAULT_SOURCES = [
+    "swords.json",
+    "swords-cleaned.json",
+    "swords-american.json",
+    "swords-asian.json",
+    "swords-european.json",
+    "swords-other.json",
+    "swords.py",
+]
+
+LIST_FIELDS = ("material", "hiltMaterial", "makerWorkshop", "provenance")
+STRING_FIELDS = (
+    "bladeType",
+    "condition",
+    "restorationStatus",
+    "completeness",
+    "era",
+    "regionCulture",
+    "rarity",
+    "scabbard",
+    "ornamentation",
+    "sellDate",
+    "bladeLength_unit",
+    "source",
+)
+FLOAT_FIELDS = ("price_usd", "bladeLength")
+# Source spellings of the canonical column names
+ALIASES = {"value": "price_usd"}
+
+
+def sword_schema() -> pa.Schema:
+    """Arrow schema of the ingested dataset (built on call: pyarrow loads lazily)."""
+    fields = [pa.field(name, pa.float64()) for name in FLOAT_FIELDS]
+    fields += [pa.field(name, pa.list_(pa.string())) for name in LIST_FIELDS]
+    fields += [pa.field(name, pa.string()) for name in STRING_FIELDS]
+    return pa.schema(fields)
+
+
+# ------------------------------
+# Incremental readers
+# ------------------------------
+
+_WHITESPACE = " \t\r\n"
+
+# What can be left of a literal or number when the buffer ends inside it
+_PARTIAL_TOKEN = re.compile(r"t(r(ue?)?)?|f(a(l(se?)?)?)?|n(u(ll?)?)?|N(aN?)?|-?(I(n(f(i(n(i(ty?)?)?)?)?)?)?)?|[-+.\deE]*")
+
+
+def _is_truncation(buf: str, exc: json.JSONDecodeError) -> bool:
+    """True if decoding failed only because `buf` ends inside a value (more input may complete it)."""
+    tail = buf[exc.pos:]
+    if exc.msg.startswith("Unterminated string"):
+        return True  # no closing quote anywhere up to the end of the buffer
+    if exc.msg.startswith("Invalid \\uXXXX escape"):
+        return '"' not in tail  # the buffer ends inside (or right after) the escape
+    return _PARTIAL_TOKEN.fullmatch(tail) is not None
+
+
+class JSONRecordDecoder:
+    """Push decoder for a JSON array of objects, NDJSON or concatenated objects.
+
+    feed() text as it arrives and get back the values completed so far;
+    close() at the end of input. Only the unfinished tail is buffered, so
+    memory is bounded by the largest record plus one chunk; a record that is
+    malformed before the end of the buffer raises json.JSONDecodeError from
+    that feed() (or, if the feed completed values before it, from the next
+    feed()/close()), not only at close(). Shared by
+    iter_json_records() (files) and serving/bulk.py (request bodies).
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._in_array: Optional[bool] = None  # unknown until the first non-blank character
+        self.done = False  # closing "]" of an array seen; later input is ignored
+        self._error: Optional[json.JSONDecodeError] = None  # raised by the next call
+
+    def feed(self, text: str) -> List[Any]:
+        """Values completed by `text` (a record split across feeds is kept for the next)."""
+        return self._drain(text, eof=False)
+
+    def close(self) -> List[Any]:
+        """Values left at end of input; raises json.JSONDecodeError on a truncated record."""
+        return self._drain("", eof=True)
+
+    def _drain(self, text: str, eof: bool) -> List[Any]:
+        out: List[Any] = []
+        if self._error is not None:
+            raise self._error
+        if self.done:
+            return out
+        buf, pos = self._buf + text, 0
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            if self._in_array is None:
+                self._in_array = ch == "["
+                if self._in_array:
+                    pos += 1
+                    continue
+            if ch == ",":
+                pos += 1
+                continue
+            if ch == "]" and self._in_array:
+                self.done = True
+                pos = len(buf)
+                break
+            try:
+                obj, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as exc:
+                if eof or (not out and not _is_truncation(buf, exc)):
+                    raise
+                if not _is_truncation(buf, exc):
+                    self._error, pos = exc, len(buf)  # hand out the values before it first
+                break  # otherwise the record continues past the buffer: wait for more input
+            out.append(obj)
+            pos = end
+        self._buf = buf[pos:]
+        return out
+
+
+def iter_json_records(path: str | Path, chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of a JSON array (or NDJSON / concatenated objects) one at a time.
+
+    The file is read in chunk_size pieces; memory is bounded by the largest
+    record plus one chunk.
+    """
+    decoder = JSONRecordDecoder()
+    with open(path, "r", encoding="utf-8") as fh:
+        while not decoder.done:
+            chunk = fh.read(chunk_size)
+            for obj in decoder.feed(chunk) if chunk else decoder.close():
+                if not isinstance(obj, dict):
+                    raise ValueError(f"{path}: expected JSON objects, got {type(obj).__name__}")
+                yield obj
+            if not chunk:
+                break
+
+
+_UNIT_PATTERNS = (("cm", re.compile(r"^\s*cm\b", re.I)), ("in", re.compile(r"^\s*inch", re.I)))
+
+
+def _line_comments(source: str) -> Dict[int, str]:
+    """Line number → trailing comment text (without '#')."""
+    comments: Dict[int, str] = {}
+    for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+        if tok.type == tokenize.COMMENT:
+            comments[tok.start[0]] = tok.string.lstrip("#").strip()
+    return comments
+
+
+def iter_python_records(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Yield the dict literals of the first top-level list assignment in a Python file.
+
+    Nothing is executed (ast.literal_eval). A "# cm" / "# inches" comment on
+    the bladeLength line is kept as bladeLength_unit ("cm" / "in").
+    """
+    source = Path(path).read_text(encoding="utf-8")
+    comments = _line_comments(source)
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.List):
+            for elt in node.value.elts:
+                if not isinstance(elt, ast.Dict):
+                    continue
+                record = ast.literal_eval(elt)
+                for key, value in zip(elt.keys, elt.values):
+                    if isinstance(key, ast.Constant) and key.value == "bladeLength":
+                        comment = comments.get(value.end_lineno, "")
+                        for unit, pattern in _UNIT_PATTERNS:
+                            if pattern.match(comment):
+                                record["bladeLength_unit"] = unit
+                yield record
+            return
+
+
+def iter_source_records(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """Records of one source file, by extension (.json/.ndjson/.jsonl or .py)."""
+    suffix = Path(path).suffix.lower()
+    if suffix in {".json", ".ndjson", ".jsonl"}:
+        return iter_json_records(path)
+    if suffix == ".py":
+        return iter_python_records(path)
+    raise ValueError(f"Unsupported source {path}. Use .json, .ndjson/.jsonl or .py")
+
+
+# ------------------------------
+# Schema coercion
+# ------------------------------
+
+def _as_list(value: Any) -> Optional[List[str]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [v if isinstance(v, str) else str(v) for v in value if v is not None]
+    return [str(value)]
+
+
+def _as_string(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value if v is not None)
+    return value if isinstance(value, str) else str(value)
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_record(record: Dict[str, Any], source: str, dropped: Optional[Counter] = None) -> Dict[str, Any]:
+    """Coerce one raw record to sword_schema() columns; unknown keys are counted in `dropped`."""
+    raw: Dict[str, Any] = {}
+    for key, value in record.items():
+        name = ALIASES.get(key, key)
+        if name in raw and key != name:
+            continue  # the canonical spelling wins over an alias
+        raw[name] = value
+    raw["source"] = source
+
+    out: Dict[str, Any] = {}
+    for name in FLOAT_FIELDS:
+        out[name] = _as_float(raw.get(name))
+    for name in LIST_FIELDS:
+        out[name] = _as_list(raw.get(name))
+    for name in STRING_FIELDS:
+        out[name] = _as_string(raw.get(name))
+    if dropped is not None:
+        dropped.update(k for k in raw if k not in out)
+    return out
+
+
+# ------------------------------
+# Writing
+# ------------------------------
+
+def _record_batches(sources: Sequence[Path], batch_size: int, stats: Dict[str, Any]) -> Iterator[Any]:
+    schema = sword_schema()
+    batch: List[Dict[str, Any]] = []
+    for path in sources:
+        n = 0
+        for record in iter_source_records(path):
+            batch.append(normalize_record(record, path.name, stats["dropped_fields"]))
+            n += 1
+            if len(batch) >= batch_size:
+                yield pa.RecordBatch.from_pylist(batch, schema=schema)
+                batch = []
+        stats["rows_by_source"][path.name] = n
+    if batch:
+        yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+
+# Written last into every dataset directory; only directories with it are ever replaced
+DATASET_MARKER = "_ingest.json"
+
+
+def _check_out_dir(out: Path, sources: Sequence[Path]) -> None:
+    """Refuse an out_dir that holds sources or is some other non-empty directory."""
+    target = out.resolve()
+    for src in sources:
+        resolved = src.resolve()
+        if resolved == target or target in resolved.parents:
+            raise ValueError(f"Output directory {out} contains source {src}; choose another --out.")
+    if not out.exists():
+        return
+    if not out.is_dir():
+        raise ValueError(f"Output path {out} exists and is not a directory.")
+    if any(out.iterdir()) and not (out / DATASET_MARKER).is_file():
+        raise ValueError(f"{out} is not a dataset written by ingest.py (no {DATASET_MARKER}); refusing to replace it.")
+
+
+def ingest(
+    sources: Iterable[str | Path],
+    out_dir: str | Path,
+    partition_by: Optional[str] = "source",
+    batch_size: int = 1024,
+) -> Dict[str, Any]:
+    """Stream all sources into a (hive-partitioned) Parquet dataset at out_dir.
+
+    A previous ingest output at out_dir is replaced once the new dataset is
+    complete; any other existing content is left alone.
+
+    Returns a JSON-serializable report (rows per source, dropped unknown
+    fields, written files).
+
+    Raises
+    ------
+    ValueError
+        If out_dir is (or contains) a source, or is an existing non-empty
+        directory without the ingest marker.
+    """
+    import pyarrow.dataset as ds
+
+    paths = [Path(p) for p in sources]
+    schema = sword_schema()
+    if partition_by is not None and partition_by not in schema.names:
+        raise ValueError(f"Cannot partition by {partition_by!r}; not a column of the sword schema.")
+    if partition_by is not None and partition_by not in STRING_FIELDS:
+        raise ValueError(f"Partition column {partition_by!r} must be a string column.")
+
+    out = Path(out_dir)
+    _check_out_dir(out, paths)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.tmp-{os.getpid()}")
+    stats: Dict[str, Any] = {"rows_by_source": {}, "dropped_fields": Counter()}
+    written: List[str] = []
+    old: Optional[Path] = None
+    try:
+        ds.write_dataset(
+            _record_batches(paths, batch_size, stats),
+            str(tmp),
+            schema=schema,
+            format="parquet",
+            partitioning=[partition_by] if partition_by else None,
+            partitioning_flavor="hive" if partition_by else None,
+            file_visitor=lambda f: written.append(f.path),
+            existing_data_behavior="error",
+        )
+        report = {
+            "out_dir": str(out),
+            "partition_by": partition_by,
+            "n_rows": int(sum(stats["rows_by_source"].values())),
+            "rows_by_source": stats["rows_by_source"],
+            "dropped_fields": dict(stats["dropped_fields"]),
+            "files": sorted(str(out / Path(f).relative_to(tmp)) for f in written),
+        }
+        with open(tmp / DATASET_MARKER, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        # A directory cannot be os.replace()d onto a non-empty one: move the
+        # previous dataset aside first, and delete it only after the swap
+        if out.exists():
+            old = out.with_name(f".{out.name}.old-{os.getpid()}")
+            os.replace(out, old)
+        os.replace(tmp, out)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if old is not None and not out.exists():
+            os.replace(old, out)  # put the previous dataset back
+        raise
+    if old is not None:
+        shutil.rmtree(old)
+    return report
+
+
+# ------------------------------
+# Reading (column pruning + predicate pushdown)
+# ------------------------------
+
+_FILTER_RE = re.compile(r"^\s*([A-Za-z_][\w]*)\s*(==|=|!=|>=|<=|>|<)\s*(.*)$")
+
+
+def parse_filters(specs: Iterable[str]) -> List[Tuple[str, str, Any]]:
+    """Parse CLI filters: "source=swords.json,swords-asian.json", "regionCulture!=Japanese", "price_usd>=1000".
+
+    "=" / "!=" take a comma-separated list of values; comparisons take one
+    value, compared numerically when it parses as a number.
+    """
+    filters: List[Tuple[str, str, Any]] = []
+    for spec in specs:
+        m = _FILTER_RE.match(spec)
+        if not m:
+            raise ValueError(f"Bad filter {spec!r}. Use COLUMN=V1[,V2], COLUMN!=V or COLUMN>=NUMBER.")
+        col, op, value = m.group(1), m.group(2), m.group(3).strip()
+        if op in ("=", "==", "!="):
+            filters.append((col, "in" if op != "!=" else "not in", [v.strip() for v in value.split(",")]))
+        else:
+            number = _as_float(value)
+            filters.append((col, op, number if number is not None else value))
+    return filters
+
+
+def filter_expression(filters: Sequence[Tuple[str, str, Any]]) -> Any:
+    import pyarrow.compute as pc
+
+    expr = None
+    for col, op, value in filters:
+        field = pc.field(col)
+        if op == "in":
+            term = field.isin(value)
+        elif op == "not in":
+            term = ~field.isin(value)
+        else:
+            term = {">": field > value, ">=": field >= value, "<": field < value, "<=": field <= value}[op]
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def arrow_to_pandas(data: Any) -> pd.DataFrame:
+    """pyarrow Table/RecordBatch → DataFrame; list columns stay Arrow-backed (list ArrowDtype).
+
+    The multi-label encoders read those directly from the Arrow buffers
+    instead of an object column of per-row NumPy arrays.
+    """
+    return data.to_pandas(types_mapper=_list_types_mapper)
+
+
+def _list_types_mapper(dtype: Any) -> Any:
+    if pa.types.is_list(dtype) or pa.types.is_large_list(dtype):
+        return pd.ArrowDtype(dtype)
+    return None  # default conversion
+
+
+def read_dataset(path: str | Path, columns: Optional[Sequence[str]] = None, filters: Optional[Sequence[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """Read a Parquet file or (hive-partitioned) directory with column pruning and predicate pushdown.
+
+    Partition columns come back as plain strings (not categoricals), list
+    columns as Arrow-backed Series (see arrow_to_pandas). Columns used only by
+    a filter need not be requested.
+    """
+    dataset = open_dataset(path)
+    if columns is not None:
+        missing = [c for c in columns if c not in dataset.schema.names]
+        if missing:
+            raise KeyError(f"Columns not found in {path}: {missing}")
+    table = dataset.to_table(
+        columns=list(columns) if columns is not None else None,
+        filter=filter_expression(filters) if filters else None,
+    )
+    return arrow_to_pandas(table)
+
+
+def open_dataset(path: str | Path) -> Any:
+    """pyarrow Dataset over a Parquet file or directory; hive partition keys are read as strings."""
+    import pyarrow.dataset as ds
+
+    partitioning = None
+    if Path(path).is_dir():
+        partitioning = ds.partitioning(flavor="hive", schema=pa.schema(
+            [pa.field(name, pa.string()) for name in _partition_names(Path(path))]
+        ))
+    return ds.dataset(str(path), format="parquet", partitioning=partitioning)
+
+
+def _partition_names(root: Path) -> List[str]:
+    """Hive partition keys of a dataset directory (from the first key=value path)."""
+    names: List[str] = []
+    node = root
+    while True:
+        subdirs = sorted(p for p in node.iterdir() if p.is_dir() and "=" in p.name)
+        if not subdirs:
+            return names
+        names.append(subdirs[0].name.split("=", 1)[0])
+        node = subdirs[0]
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest the sword JSON/Python corpora into a partitioned Parquet dataset")
+    parser.add_argument("sources", nargs="*", help=f"Source files (.json, .ndjson/.jsonl, .py); default: {', '.join(DEFAULT_SOURCES)} in {DATA_DIR}")
+    parser.add_argument("--out", type=str, default="data/swords_dataset", help="Output dataset directory (a previous ingest output there is replaced)")
+    parser.add_argument("--partition-by", type=str, default="source", help="String column to partition by ('none' for a flat dataset)")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Records per Arrow record batch")
+    args = parser.parse_args(argv)
+
+    sources = args.sources or [str(DATA_DIR / name) for name in DEFAULT_SOURCES]
+    partition_by = None if args.partition_by.lower() == "none" else args.partition_by
+    try:
+        report = ingest(sources, args.out, partition_by=partition_by, batch_size=args.batch_size)
+    except ValueError as e:
+        raise SystemExit(f"[ingest.py] {e}")
+    for source, n in report["rows_by_source"].items():
+        print(f"[ingest.py] {source}: {n} rows")
+    if report["dropped_fields"]:
+        print(f"[ingest.py] Dropped unknown fields: {report['dropped_fields']}")
+    print(f"[ingest.py] Wrote {report['n_rows']} rows in {len(report['files'])} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
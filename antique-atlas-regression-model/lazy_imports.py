@@ -0,0 +1,42 @@
+"""
+lazy_imports.py — Defer heavy third-party imports until first attribute access.
+
+Purpose
+-------
+pandas, scikit-learn, scipy and joblib together take over a second to import,
+which is paid by every on-demand worker and by `--help`. Modules of this
+package therefore import them either inside the functions that need them
+(sklearn / scipy submodules) or through lazy_import() at module level
+(pandas / joblib, used by many helpers):
+
+    pd = lazy_import("pandas")      # nothing is imported yet
+    pd.read_parquet(path)           # pandas is imported here, once
+
+Already-imported modules are returned as-is. Note that `from x import y`
+cannot be deferred this way; use a function-local import instead.
+
+Public API
+----------
+- lazy_import(name) -> module
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module `name`, executing it only on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,349 @@
+"""
+parsing.py — Numeric features parsed out of the free-text sword fields.
+
+Purpose
+-------
+Three raw columns carry numbers in text form:
+
+- bladeLength: inches in most records, centimetres in some (data/swords.py
+  marks them "# cm"; ingest.py keeps that as `bladeLength_unit`); strings may
+  carry their own unit ("72.5 cm", '30.5"').
+- era: "American Civil War (1862)", "Late 19th–Early 20th Century", "Edo Period".
+- sellDate: "MM-DD-YYYY" (scraped) or "YYYY-MM-DD" (cleaned).
+
+parse_frame() turns them into numeric columns over whole Series with compiled
+regexes (Series.str.extract) and vectorized arithmetic — no per-row Python:
+
+- bladeLength_in   blade length in inches (unit from the value text, else the
+                   unit column, else `cm_above`, else `default_unit`)
+- era_year         an explicit year (range midpoint, "1940s" -> 1945), else a
+                   century ("late 17th century" -> 1675, "17th–18th" -> 1700),
+                   else a named period ("Edo" -> 1735)
+- sale_year        the sale date as a fractional year (2008.4918...)
+- sale_timestamp   the sale date as POSIX seconds (UTC midnight)
+
+Anything unparseable is NaN (imputed downstream). parse_item() computes the
+same values for one item dict with the same patterns and arithmetic, so the
+scoring table / bundle (which must not need pandas) agree exactly with the
+fitted pipeline.
+
+Public API
+----------
+- PARSED_COLUMNS: dict[str, tuple[str, ...]]   (output -> raw source columns)
+- PARSE_DEFAULTS: dict[str, Any]
+- parse_inputs(outputs, options=None) -> list[str]
+- parse_frame(X, outputs, options=None) -> np.ndarray
+- parse_item(item, outputs, options=None) -> dict[str, float]
+"""
+from __future__ import annotations
+
+import math
+import re
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+PARSED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "bladeLength_in": ("bladeLength",),
+    "era_year": ("era",),
+    "sale_year": ("sellDate",),
+    "sale_timestamp": ("sellDate",),
+}
+
+PARSE_DEFAULTS: Dict[str, Any] = {
+    # Column holding "cm" / "in" / "mm" per row (e.g. ingest's bladeLength_unit)
+    "unit_col": None,
+    # Unit of plain numbers when nothing else says otherwise
+    "default_unit": "in",
+    # Plain numbers above this are taken as centimetres (None: off)
+    "cm_above": None,
+}
+
+
+# ------------------------------
+# Patterns (applied to lower-cased text)
+# ------------------------------
+
+_DASH = r"\s*(?:[-–—]|to)\s*"
+
+# number, then an optional unit: cm | mm | inches
+_LENGTH_RE = re.compile(
+    r"([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*"
+    r"(?:(cm\b|centimet\w*)|(mm\b|millimet\w*)|(in\b|inch\w*|\"|''|”|″))?"
+)
+_INCHES_PER = {"in": 1.0, "cm": 2.54, "mm": 25.4}
+
+# 1862 | 1861–1865 | 1930s–1945 | 1940s
+_YEAR_RE = re.compile(r"(?<!\d)(1\d{3}|20\d{2})(s?)(?:" + _DASH + r"(1\d{3}|20\d{2})s?)?(?!\d)")
+# 17th century | late 16th c. | 17th–18th century | late 19th to early 20th century
+_CENTURY_RE = re.compile(
+    r"(?:(early|mid|late)[\s-]*)?(\d{1,2})(?:st|nd|rd|th)"
+    r"(?:" + _DASH + r"(?:(?:early|mid|late)[\s-]*)?(\d{1,2})(?:st|nd|rd|th))?"
+    r"[\s-]*c(?:entur(?:y|ies)|\.|\b)"
+)
+_CENTURY_OFFSET = {"early": 25, "mid": 50, "late": 75}
+
+# Representative years of named periods (Japanese periods by sword dating)
+_PERIOD_YEARS: Dict[str, int] = {
+    "revolutionary war": 1778,
+    "war of 1812": 1813,
+    "napoleonic": 1805,
+    "mexican-american war": 1847,
+    "gold rush": 1850,
+    "civil war": 1863,
+    "victorian": 1870,
+    "world war i": 1916,
+    "wwi": 1916,
+    "world war ii": 1942,
+    "wwii": 1942,
+    "heian": 1000,
+    "kamakura": 1250,
+    "nanbokucho": 1360,
+    "muromachi": 1450,
+    "momoyama": 1590,
+    "koto": 1450,
+    "shinto": 1680,
+    "shin shinto": 1830,
+    "shinshinto": 1830,
+    "edo": 1735,
+    "meiji": 1890,
+    "taisho": 1920,
+    "showa": 1940,
+}
+# Longest first so "world war ii" beats "world war i" at the same position
+_PERIOD_RE = re.compile(
+    r"\b(" + "|".join(re.escape(k) for k in sorted(_PERIOD_YEARS, key=len, reverse=True)) + r")\b"
+)
+
+# MM-DD-YYYY (also / or .) and YYYY-MM-DD (optionally followed by a time)
+_US_DATE_RE = re.compile(r"^\s*(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})(?!\d)")
+_ISO_DATE_RE = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?!\d)")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _options(options: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    out = dict(PARSE_DEFAULTS)
+    out.update(options or {})
+    if out["default_unit"] not in _INCHES_PER:
+        raise ValueError(f"Unknown default_unit {out['default_unit']!r}. Use one of {sorted(_INCHES_PER)}.")
+    return out
+
+
+def parse_inputs(outputs: Sequence[str], options: Optional[Mapping[str, Any]] = None) -> List[str]:
+    """Raw columns needed to produce `outputs` (non-parsed names are read as is)."""
+    opts = _options(options)
+    cols: List[str] = []
+    for name in outputs:
+        sources = PARSED_COLUMNS.get(name, (name,))
+        if name == "bladeLength_in" and opts["unit_col"]:
+            sources = sources + (opts["unit_col"],)
+        cols += [c for c in sources if c not in cols]
+    return cols
+
+
+# ------------------------------
+# Vectorized (whole columns)
+# ------------------------------
+
+def _text(series: pd.Series) -> pd.Series:
+    """Lower-cased str of every non-missing value, as an object Series (Python `re` semantics)."""
+    s = series.astype(object)
+    missing = s.isna()
+    return s.where(missing, s.astype(str)).astype(object).str.lower().where(~missing)
+
+
+def _group(frame: pd.DataFrame, k: int) -> np.ndarray:
+    return pd.to_numeric(frame[k], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _blade_length_in(series: pd.Series, units: Optional[pd.Series], opts: Dict[str, Any]) -> np.ndarray:
+    text = _text(series)
+    ext = text.str.extract(_LENGTH_RE)
+    value = _group(ext, 0)
+    unit = np.select([ext[1].notna(), ext[2].notna(), ext[3].notna()], ["cm", "mm", "in"], default="")
+    if units is not None:
+        col = _text(units).str.strip().to_numpy(dtype=object, na_value="")
+        unit = np.where(unit == "", np.where(np.isin(col, list(_INCHES_PER)), col, ""), unit)
+    if opts["cm_above"] is not None:
+        unit = np.where((unit == "") & (value > float(opts["cm_above"])), "cm", unit)
+    unit = np.where(unit == "", opts["default_unit"], unit)
+    divisor = np.select([unit == "cm", unit == "mm"], [_INCHES_PER["cm"], _INCHES_PER["mm"]], default=1.0)
+    return value / divisor
+
+
+def _era_year(series: pd.Series) -> np.ndarray:
+    text = _text(series)
+
+    ext = text.str.extract(_YEAR_RE)
+    y1, y2 = _group(ext, 0), _group(ext, 2)
+    decade = ext[1].eq("s").to_numpy(dtype=bool, na_value=False)
+    year = np.where(np.isnan(y2), y1 + np.where(decade, 5.0, 0.0), (y1 + y2) / 2)
+
+    ext = text.str.extract(_CENTURY_RE)
+    c1, c2 = _group(ext, 1), _group(ext, 2)
+    offset = ext[0].map(_CENTURY_OFFSET).fillna(50).to_numpy(dtype=float)
+    century = np.where(np.isnan(c2), (c1 - 1) * 100 + offset, ((c1 - 1) * 100 + c2 * 100) / 2)
+    year = np.where(np.isnan(year), century, year)
+
+    period = pd.to_numeric(text.str.extract(_PERIOD_RE)[0].map(_PERIOD_YEARS), errors="coerce")
+    return np.where(np.isnan(year), period.to_numpy(dtype=float, na_value=np.nan), year)
+
+
+def _sale_dates(series: pd.Series) -> pd.Series:
+    """datetime64 Series (NaT where missing/invalid) from either date format."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if series.dt.tz is not None:
+            series = series.dt.tz_localize(None)
+        return series.dt.normalize()
+    text = _text(series)
+    us = text.str.extract(_US_DATE_RE)
+    iso = text.str.extract(_ISO_DATE_RE)
+    parts = pd.DataFrame({
+        "year": np.where(us[2].notna(), _group(us, 2), _group(iso, 0)),
+        "month": np.where(us[2].notna(), _group(us, 0), _group(iso, 1)),
+        "day": np.where(us[2].notna(), _group(us, 1), _group(iso, 2)),
+    })
+    return pd.to_datetime(parts, errors="coerce")
+
+
+def _sale_year(series: pd.Series) -> np.ndarray:
+    dt = _sale_dates(series)
+    year = dt.dt.year.to_numpy(dtype=float, na_value=np.nan)
+    doy = dt.dt.dayofyear.to_numpy(dtype=float, na_value=np.nan)
+    days = np.where(dt.dt.is_leap_year.to_numpy(dtype=bool, na_value=False), 366.0, 365.0)
+    return year + (doy - 1) / days
+
+
+def _sale_timestamp(series: pd.Series) -> np.ndarray:
+    dt = _sale_dates(series)
+    days = (dt - pd.Timestamp("1970-01-01")).dt.days.to_numpy(dtype=float, na_value=np.nan)
+    return days * 86400.0
+
+
+def parse_frame(X: pd.DataFrame, outputs: Sequence[str], options: Optional[Mapping[str, Any]] = None) -> np.ndarray:
+    """Float matrix (n_rows, len(outputs)); non-parsed outputs are X[name] coerced to numbers."""
+    opts = _options(options)
+    out = np.empty((len(X), len(outputs)), dtype=np.float64)
+    for j, name in enumerate(outputs):
+        if name == "bladeLength_in":
+            units = X[opts["unit_col"]] if opts["unit_col"] else None
+            out[:, j] = _blade_length_in(X["bladeLength"], units, opts)
+        elif name == "era_year":
+            out[:, j] = _era_year(X["era"])
+        elif name == "sale_year":
+            out[:, j] = _sale_year(X["sellDate"])
+        elif name == "sale_timestamp":
+            out[:, j] = _sale_timestamp(X["sellDate"])
+        else:
+            out[:, j] = pd.to_numeric(X[name], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return out
+
+
+# ------------------------------
+# One item (scoring table / bundle)
+# ------------------------------
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _item_number(value: Any) -> float:
+    """float(value), NaN for missing or non-numeric values (pd.to_numeric(errors="coerce"))."""
+    if _missing(value):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _item_text(value: Any) -> Optional[str]:
+    return None if _missing(value) else str(value).lower()
+
+
+def _item_blade_length_in(value: Any, unit_value: Any, opts: Dict[str, Any]) -> float:
+    text = _item_text(value)
+    m = _LENGTH_RE.search(text) if text is not None else None
+    if m is None:
+        return math.nan
+    number = float(m.group(1))
+    unit = "cm" if m.group(2) is not None else "mm" if m.group(3) is not None else "in" if m.group(4) is not None else ""
+    if not unit:
+        col = _item_text(unit_value)
+        col = col.strip() if col is not None else ""
+        unit = col if col in _INCHES_PER else ""
+    if not unit and opts["cm_above"] is not None and number > float(opts["cm_above"]):
+        unit = "cm"
+    return number / _INCHES_PER[unit or opts["default_unit"]]
+
+
+def _item_era_year(value: Any) -> float:
+    text = _item_text(value)
+    if text is None:
+        return math.nan
+    m = _YEAR_RE.search(text)
+    if m is not None:
+        y1 = float(m.group(1))
+        if m.group(3) is not None:
+            return (y1 + float(m.group(3))) / 2
+        return y1 + (5.0 if m.group(2) == "s" else 0.0)
+    m = _CENTURY_RE.search(text)
+    if m is not None:
+        c1 = float(m.group(2))
+        if m.group(3) is not None:
+            return ((c1 - 1) * 100 + float(m.group(3)) * 100) / 2
+        return (c1 - 1) * 100 + float(_CENTURY_OFFSET.get(m.group(1), 50))
+    m = _PERIOD_RE.search(text)
+    return float(_PERIOD_YEARS[m.group(1)]) if m is not None else math.nan
+
+
+def _item_sale_date(value: Any) -> Optional[date]:
+    if isinstance(value, date):  # date, datetime, pd.Timestamp (NaT has no valid fields)
+        try:
+            return date(value.year, value.month, value.day)
+        except (TypeError, ValueError):
+            return None
+    text = _item_text(value)
+    if text is None:
+        return None
+    m = _US_DATE_RE.search(text)
+    if m is not None:
+        y, mo, d = m.group(3), m.group(1), m.group(2)
+    else:
+        m = _ISO_DATE_RE.search(text)
+        if m is None:
+            return None
+        y, mo, d = m.group(1), m.group(2), m.group(3)
+    try:
+        return date(int(y), int(mo), int(d))
+    except ValueError:
+        return None
+
+
+def parse_item(item: Mapping[str, Any], outputs: Sequence[str], options: Optional[Mapping[str, Any]] = None) -> Dict[str, float]:
+    """Every output for one item dict (non-parsed names coerced to float); NaN if unparseable."""
+    opts = _options(options)
+    out: Dict[str, float] = {}
+    for name in outputs:
+        if name == "bladeLength_in":
+            unit_value = item.get(opts["unit_col"]) if opts["unit_col"] else None
+            out[name] = _item_blade_length_in(item.get("bladeLength"), unit_value, opts)
+        elif name == "era_year":
+            out[name] = _item_era_year(item.get("era"))
+        elif name in ("sale_year", "sale_timestamp"):
+            d = _item_sale_date(item.get("sellDate"))
+            if d is None:
+                out[name] = math.nan
+            elif name == "sale_year":
+                days = 366.0 if (d.year % 4 == 0 and (d.year % 100 != 0 or d.year % 400 == 0)) else 365.0
+                out[name] = float(d.year) + (float(d.timetuple().tm_yday) - 1) / days
+            else:
+                out[name] = float(d.toordinal() - _EPOCH_ORDINAL) * 86400.0
+        else:
+            out[name] = _item_number(item.get(name))
+    return out
@@ -4,7 +4,8 @@ pipeline.py — Build the end-to-end preprocessing + regression pipeline.
 Purpose
 -------
 - Define a single sklearn Pipeline that:
-  (1) preprocesses numeric, single-categorical, and multi-categorical features,
+  (1) preprocesses numeric, single-categorical, and multi-categorical features
+      (numeric features may be parsed from raw text first, see parsing.py),
   (2) fits a regularized linear model on log-transformed target,
   (3) returns predictions in dollars (inverse-transformed).
 
@@ -12,22 +13,28 @@ Public API
 ----------
 - build_pipeline(config) -> sklearn.Pipeline
 - get_feature_names(pipeline, X_sample: pd.DataFrame) -> list[str]
+- input_columns(config) -> list[str]
+- ridge_alpha_search(config) -> str
 - DEFAULT_CONFIG: dict[str, Any]
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
 import numpy as np
-import pandas as pd
-from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
-from sklearn.impute import SimpleImputer
-from sklearn.linear_model import RidgeCV
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
 
-# Import our custom multi-label transformer
-from .transformers.multilabel_binarizer import MultiLabelBinarizerTransformer
+from .lazy_imports import lazy_import
+from .parsing import PARSED_COLUMNS, parse_inputs
+
+# sklearn / scipy / our transformers are imported inside the builders below, so
+# importing this module (e.g. for DEFAULT_CONFIG) stays cheap
+pd = lazy_import("pandas")
+
+if TYPE_CHECKING:
+    from scipy import sparse as sp
+    from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
+    from sklearn.pipeline import Pipeline
 
 
 # ------------------------------
@@ -35,7 +42,13 @@ from .transformers.multilabel_binarizer import MultiLabelBinarizerTransformer
 # ------------------------------
 DEFAULT_CONFIG: Dict[str, Any] = {
     "target_col": "price_usd",
-    "numeric_cols": ["bladeLength"],
+    # bladeLength_in / era_year / sale_year / sale_timestamp are parsed from
+    # the raw bladeLength / era / sellDate text (parsing.py); other names are
+    # read as numeric columns as is
+    "numeric_cols": ["bladeLength_in", "era_year", "sale_year"],
+    # Parser options (parsing.PARSE_DEFAULTS): no blade is longer than 60
+    # inches, so larger plain numbers are centimetres
+    "parse": {"cm_above": 60.0},
     "single_categorical_cols": [
         "condition",
         "restorationStatus",
@@ -45,14 +58,24 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     ],
     "multi_categorical_cols": {
         # field_name: transformer options
+        # ("mode": "hash", "n_features": 2**18 switches a field to the stateless
+        #  hashing trick instead of a learned top_k vocabulary; implies sparse)
         "material": {"top_k": 15, "include_other": True},
         "makerWorkshop": {"top_k": 30, "include_other": True},
         "provenance": {"top_k": 25, "include_other": True},
     },
     "model": {
-        "type": "ridge",  # or "elasticnet" in the future
+        "type": "ridge",  # "ridge" | "sgd" (streaming) | "elasticnet" | "lasso" | "hgb" (gradient boosting)
         "alphas": [0.1, 1.0, 10.0, 100.0],
     },
+    # True keeps every branch in CSR end to end (numeric, one-hot, multi-label)
+    # so memory/fit time scale with non-zeros instead of rows x vocabulary.
+    "sparse": False,
+    # "float32" keeps the whole design matrix (imputer, scaler, one-hot and
+    # multi-label outputs) and the solver in single precision: half the memory.
+    # Ridge then picks alpha by K-fold CV instead of leave-one-out GCV, which
+    # would need a float64 copy of X (ridge_alpha_search; train.py records it).
+    "dtype": "float64",
 }
 
 
@@ -60,35 +83,116 @@ DEFAULT_CONFIG: Dict[str, Any] = {
 # Internal helpers
 # ------------------------------
 
-def _make_numeric_pipeline() -> Pipeline:
-    """Numeric branch: impute -> scale."""
-    return Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(strategy="median")),
-            ("scaler", StandardScaler()),
-        ]
+def _make_parser(config: Dict[str, Any]) -> Any:
+    """StructuredParser for the numeric columns, or None if none of them is parsed."""
+    numeric_cols: List[str] = config.get("numeric_cols", [])
+    if not any(col in PARSED_COLUMNS for col in numeric_cols):
+        return None
+    from .transformers.structured_parser import StructuredParser
+
+    return StructuredParser(outputs=list(numeric_cols), options=dict(config.get("parse", {})))
+
+
+def _numeric_inputs(config: Dict[str, Any]) -> List[str]:
+    """Raw columns the numeric branch reads (parser inputs, or numeric_cols as is)."""
+    numeric_cols: List[str] = config.get("numeric_cols", [])
+    if not any(col in PARSED_COLUMNS for col in numeric_cols):
+        return list(numeric_cols)
+    return parse_inputs(numeric_cols, config.get("parse", {}))
+
+
+def _make_numeric_pipeline(sparse: bool = False, dtype: Any = np.float64, parser: Any = None) -> Pipeline:
+    """Numeric branch: (parse ->) (cast ->) impute -> scale (-> CSR when sparse)."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+    steps: List[Tuple[str, Any]] = []
+    if parser is not None:
+        steps.append(("parse", parser))
+    if np.dtype(dtype) != np.float64:
+        # Imputer and scaler preserve float32 input, so cast once up front
+        steps.append((
+            "cast",
+            FunctionTransformer(as_float, kw_args={"dtype": np.dtype(dtype).name}, feature_names_out="one-to-one"),
+        ))
+    steps += [
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+    ]
+    if sparse:
+        steps.append((
+            "to_csr",
+            FunctionTransformer(to_csr, accept_sparse=True, feature_names_out="one-to-one"),
+        ))
+    return Pipeline(steps=steps)
+
+
+def _make_ordinal_cat_encoder(max_categories: int = 255) -> Any:
+    """Single-categorical branch for native-categorical models: one ordinal code per column.
+
+    Missing and unseen values map to NaN, which HistGradientBoosting routes
+    through its learned missing-value branch. HistGradientBoosting rejects a
+    categorical column with more categories than its max_bins, so pass that
+    as max_categories: the rarest categories beyond it share one infrequent
+    code (which counts towards the limit).
+    """
+    from sklearn.preprocessing import OrdinalEncoder
+
+    return OrdinalEncoder(
+        handle_unknown="use_encoded_value",
+        unknown_value=np.nan,
+        encoded_missing_value=np.nan,
+        max_categories=max_categories,
     )
 
 
-def _make_single_cat_pipeline() -> Pipeline:
+def _make_single_cat_pipeline(sparse: bool = False, dtype: Any = np.float64) -> Pipeline:
     """Single-categorical branch: impute -> one-hot (safe to unseen)."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
     return Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
             (
                 "onehot",
-                OneHotEncoder(handle_unknown="ignore", sparse_output=False),
+                OneHotEncoder(handle_unknown="ignore", sparse_output=sparse, dtype=dtype),
             ),
         ]
     )
 
 
+# --- Top-level function: pickle-safe ---
+def to_csr(X: Any) -> "sp.csr_matrix":
+    """Return X as a scipy CSR matrix (no copy if it already is one)."""
+    from scipy import sparse as sp
+
+    if sp.issparse(X):
+        return X.tocsr()
+    return sp.csr_matrix(np.asarray(X))
+
+
+# --- Top-level function: pickle-safe ---
+def as_float(X: Any, dtype: str = "float32") -> np.ndarray:
+    """Return X as a float ndarray of the given dtype (NaN kept for the imputer)."""
+    return np.asarray(X, dtype=dtype)
+
+
 # --- Top-level function: pickle-safe ---
 def select_series(X: pd.DataFrame | np.ndarray, col_name: str) -> pd.Series:
     """
     Return a 1D Series for the given column name from a DataFrame or 2D array.
     This mirrors the behavior of your previous closure but is pickle-safe.
+
+    A pyarrow Table column is wrapped without copying (ArrowDtype Series), so
+    list columns reach the multi-label encoders as Arrow data.
     """
+    pa = sys.modules.get("pyarrow")
+    if pa is not None and isinstance(X, pa.Table):
+        column = X.column(col_name) if col_name in X.column_names else X.column(0)
+        return pd.Series(pd.arrays.ArrowExtensionArray(column), name=col_name)
     if isinstance(X, pd.DataFrame):
         if col_name in X.columns:
             return X[col_name]
@@ -101,53 +205,91 @@ def select_series(X: pd.DataFrame | np.ndarray, col_name: str) -> pd.Series:
 
 
 
-def _make_multilabel_pipeline(field_name: str, **opts) -> Pipeline:
-    """Multi-label branch for one field: select Series -> MultiLabelBinarizerTransformer."""
-    return Pipeline(
-        steps=[
-            (
-                "select",
-                FunctionTransformer(
-                    select_series,
-                    kw_args={"col_name": field_name},
-                    validate=False,
-                    feature_names_out="one-to-one",
-                ),
-            ),
-            (
-                "mlb",
-                MultiLabelBinarizerTransformer(
-                    feature_name=field_name,
-                    **opts,
-                ),
-            ),
-        ]
-    )
+def _is_sparse(config: Dict[str, Any]) -> bool:
+    """Sparse end to end if requested, implied by any hashed multi-label field,
+    or by a regularization-path model (elasticnet/lasso work on CSR directly)."""
+    if config.get("sparse", False) or _model_type(config) in ("elasticnet", "lasso"):
+        return True
+    return any(opts.get("mode") == "hash" for opts in config.get("multi_categorical_cols", {}).values())
+
+
+def _feature_dtype(config: Dict[str, Any]) -> np.dtype:
+    """Floating dtype of the design matrix ("float64" or "float32")."""
+    dtype = np.dtype(config.get("dtype", "float64"))
+    if dtype not in (np.float64, np.float32):
+        raise ValueError(f"Unsupported feature dtype {dtype.name!r}. Use 'float64' or 'float32'.")
+    return dtype
+
+
+def ridge_alpha_search(config: Dict[str, Any]) -> str:
+    """How model.type "ridge" picks alpha: "gcv" (efficient leave-one-out) for a
+    dense float64 design, "kfold" (model.cv folds, default 5) otherwise."""
+    if _is_sparse(config) or _feature_dtype(config) == np.float32:
+        return "kfold"
+    return "gcv"
+
+
+def _model_type(config: Dict[str, Any]) -> str:
+    return str(config.get("model", {}).get("type", "ridge")).lower()
+
+
+def _make_column_transformer(config: Dict[str, Any], parse: bool = True) -> ColumnTransformer:
+    """Compose numeric/single-cat/multi-cat branches into one ColumnTransformer.
 
+    parse=False leaves the parse step out: the numeric branch then reads
+    numeric_cols (e.g. already parsed values) directly.
+    """
+    from sklearn.compose import ColumnTransformer
+
+    from .transformers.multicolumn_multilabel import MultiColumnMultiLabelTransformer
 
-def _make_column_transformer(config: Dict[str, Any]) -> ColumnTransformer:
-    """Compose numeric/single-cat/multi-cat branches into one ColumnTransformer."""
     transformers: List[Tuple[str, Pipeline, List[str] | str]] = []
 
     numeric_cols: List[str] = config.get("numeric_cols", [])
     single_cat_cols: List[str] = config.get("single_categorical_cols", [])
     multi_cat_conf: Dict[str, Dict[str, Any]] = config.get("multi_categorical_cols", {})
-
-    if numeric_cols:
-        transformers.append(("num", _make_numeric_pipeline(), numeric_cols))
-
-    if single_cat_cols:
-        transformers.append(("cat", _make_single_cat_pipeline(), single_cat_cols))
-
-    # Add one multi-label pipeline per field, each bound to its single column
-    for field, opts in multi_cat_conf.items():
-        transformers.append((f"ml_{field}", _make_multilabel_pipeline(field, **opts), [field]))
+    sparse = _is_sparse(config)
+    dtype = _feature_dtype(config)
+    # float64 keeps compact uint8 indicators (upcast once when stacking);
+    # float32 emits float32 directly so nothing is upcast to float64
+    ml_dtype = np.uint8 if dtype == np.float64 else dtype
+    parser = _make_parser(config) if parse else None
+    numeric_inputs = _numeric_inputs(config) if parser is not None else numeric_cols
+
+    if _model_type(config) == "hgb":
+        # Trees need neither imputation nor scaling (NaN is a native branch),
+        # and take categories as ordinal codes instead of one-hot blocks.
+        # The layout (numeric first, then one code per categorical column) is
+        # what _make_regressor's categorical_features indices rely on.
+        if sparse:
+            raise ValueError("model.type 'hgb' needs dense input; disable 'sparse' and hashed fields.")
+        if numeric_cols:
+            transformers.append(("num", parser if parser is not None else "passthrough", numeric_inputs))
+        if single_cat_cols:
+            max_bins = config.get("model", {}).get("max_bins", 255)
+            transformers.append(("cat", _make_ordinal_cat_encoder(max_bins), single_cat_cols))
+    else:
+        if numeric_cols:
+            transformers.append(("num", _make_numeric_pipeline(sparse, dtype, parser), numeric_inputs))
+        if single_cat_cols:
+            transformers.append(("cat", _make_single_cat_pipeline(sparse, dtype), single_cat_cols))
+
+    # All list columns go through one multi-column encoder: one explode/normalize
+    # pass, one shared normalization cache, one stacked block
+    if multi_cat_conf:
+        transformers.append((
+            "ml",
+            MultiColumnMultiLabelTransformer(fields=multi_cat_conf, sparse_output=sparse, dtype=ml_dtype),
+            list(multi_cat_conf),
+        ))
 
     # verbose_feature_names_out=False keeps names from sub-transformers as-is
     return ColumnTransformer(
         transformers=transformers,
         remainder="drop",
-        sparse_threshold=0.0,  # force dense ndarray output from CT (our mlb returns dense by default)
+        # dense: force ndarray output (our mlb returns dense by default)
+        # sparse: always stack the CSR blocks, never densify
+        sparse_threshold=1.0 if sparse else 0.0,
         verbose_feature_names_out=False,
     )
 
@@ -156,17 +298,76 @@ def _make_regressor(config: Dict[str, Any]) -> TransformedTargetRegressor:
     """
     Create the core regressor wrapped with log/exp transforms on the target.
 
-    Currently uses RidgeCV. Swap to ElasticNetCV in the future via config.
+    model.type selects RidgeCV ("ridge", default), SGDRegressor ("sgd"),
+    ElasticNetCV ("elasticnet"), LassoCV ("lasso") or
+    HistGradientBoostingRegressor ("hgb"); unknown types raise ValueError.
     """
+    from sklearn.compose import TransformedTargetRegressor
+    from sklearn.linear_model import RidgeCV, SGDRegressor
+
     model_conf = config.get("model", {})
-    model_type = model_conf.get("type", "ridge").lower()
+    model_type = _model_type(config)
 
     if model_type == "ridge":
         alphas = model_conf.get("alphas", [0.1, 1.0, 10.0, 100.0])
-        base = RidgeCV(alphas=alphas)
+        if ridge_alpha_search(config) == "kfold":
+            # K-fold CV refits plain Ridge per alpha; on CSR with an intercept
+            # its solver is sparse_cg, which only needs X @ v / X.T @ v. (The
+            # efficient LOO/GCV path would build a dense n x n Gram matrix for
+            # sparse X, and always works on a float64 copy of X.)
+            base = RidgeCV(alphas=alphas, cv=model_conf.get("cv", 5))
+        else:
+            base = RidgeCV(alphas=alphas)
+    elif model_type == "sgd":
+        # Supports partial_fit: used by streaming.py for out-of-core training
+        base = SGDRegressor(
+            alpha=model_conf.get("alpha", 1e-4),
+            penalty=model_conf.get("penalty", "l2"),
+            random_state=model_conf.get("random_state", 0),
+        )
+    elif model_type in ("elasticnet", "lasso"):
+        from sklearn.linear_model import ElasticNetCV, LassoCV
+
+        # Coordinate descent over a geometric alpha grid (alpha_max down to
+        # eps * alpha_max), each point warm-started from the previous one's
+        # coefficients; CSR input is used as is. model.n_alphas may also be
+        # an explicit list of alphas.
+        path_conf = dict(
+            alphas=model_conf.get("n_alphas", 100),
+            eps=model_conf.get("eps", 1e-3),
+            cv=model_conf.get("cv", 5),
+            max_iter=model_conf.get("max_iter", 5000),
+            tol=model_conf.get("tol", 1e-4),
+            n_jobs=model_conf.get("n_jobs"),
+            random_state=model_conf.get("random_state", 0),
+        )
+        if model_type == "lasso":
+            base = LassoCV(**path_conf)
+        else:
+            base = ElasticNetCV(l1_ratio=model_conf.get("l1_ratios", [0.1, 0.5, 0.7, 0.9, 0.95, 1.0]), **path_conf)
+    elif model_type == "hgb":
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        # Ordinal codes sit right after the numeric passthrough columns
+        n_numeric = len(config.get("numeric_cols", []))
+        n_cat = len(config.get("single_categorical_cols", []))
+        # Histogram building is multi-threaded (OpenMP, all cores by default);
+        # cost scales with max_bins, not with vocabulary width
+        base = HistGradientBoostingRegressor(
+            learning_rate=model_conf.get("learning_rate", 0.1),
+            max_iter=model_conf.get("max_iter", 300),
+            max_leaf_nodes=model_conf.get("max_leaf_nodes", 31),
+            min_samples_leaf=model_conf.get("min_samples_leaf", 20),
+            l2_regularization=model_conf.get("l2_regularization", 0.0),
+            max_bins=model_conf.get("max_bins", 255),
+            categorical_features=list(range(n_numeric, n_numeric + n_cat)) or None,
+            early_stopping=model_conf.get("early_stopping", True),
+            validation_fraction=model_conf.get("validation_fraction", 0.1),
+            n_iter_no_change=model_conf.get("n_iter_no_change", 10),
+            random_state=model_conf.get("random_state", 0),
+        )
     else:
-        # Fallback to Ridge if unknown type; you can add ElasticNetCV later.
-        base = RidgeCV(alphas=[0.1, 1.0, 10.0, 100.0])
+        raise ValueError(f"Unknown model.type {model_type!r}. Use 'ridge', 'sgd', 'elasticnet', 'lasso' or 'hgb'.")
 
     return TransformedTargetRegressor(
         regressor=base,
@@ -190,6 +391,8 @@ def build_pipeline(config: Dict[str, Any] = DEFAULT_CONFIG) -> Pipeline:
         and y as a 1D array/Series of raw prices in dollars.
       - Predictions are returned in dollars (inverse-transformed from log space).
     """
+    from sklearn.pipeline import Pipeline
+
     ct = _make_column_transformer(config)
     reg = _make_regressor(config)
     pipe = Pipeline(steps=[
@@ -199,6 +402,20 @@ def build_pipeline(config: Dict[str, Any] = DEFAULT_CONFIG) -> Pipeline:
     return pipe
 
 
+def input_columns(config: Dict[str, Any] = DEFAULT_CONFIG) -> List[str]:
+    """Raw input columns build_pipeline(config) reads (without the target).
+
+    Used to read only these columns from Parquet; parsed numeric features
+    contribute their raw source columns.
+    """
+    columns = [
+        *_numeric_inputs(config),
+        *config.get("single_categorical_cols", []),
+        *config.get("multi_categorical_cols", {}),
+    ]
+    return list(dict.fromkeys(columns))
+
+
 def get_feature_names(pipeline: Pipeline, X_sample: pd.DataFrame) -> List[str]:
     """
     After fitting, extract final feature names produced by the ColumnTransformer.
@@ -223,11 +440,12 @@ def get_feature_names(pipeline: Pipeline, X_sample: pd.DataFrame) -> List[str]:
 if __name__ == "__main__":  # Optional smoke test (no real training here)
     # Tiny sanity check to verify wiring; replace with proper train.py in production
     df = pd.DataFrame({
-        "bladeLength": [30, 33, np.nan, 40],
+        "bladeLength": [30, 33, np.nan, 76.2],
         "condition": ["Good", "Excellent", "Good", None],
         "restorationStatus": ["Original", "Original", "Restored", "Original"],
         "completeness": ["with scabbard", "full set", "blade only", "full set"],
-        "era": ["1860s", "1860s", "1850s", "1860s"],
+        "era": ["1860s", "1860s", "1850s", "Edo Period"],
+        "sellDate": ["06-29-2008", "2019-11-02", None, "03-01-2008"],
         "regionCulture": ["American", "American", "French", "American"],
         "material": [["gold", "steel"], ["steel"], None, ["gold", "silver"]],
         "makerWorkshop": [["henry folsom"], ["henry folsom"], ["unknown"], None],
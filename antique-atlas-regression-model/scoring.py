@@ -0,0 +1,439 @@
+"""
+scoring.py — Compile a fitted linear pipeline into a flat scoring table.
+
+Purpose
+-------
+The fitted model is additive in log space:
+
+    log1p(price) = intercept
+                 + Σ numeric   w * (x_or_median - mean) / scale
+                 + Σ categorical weight[value]            (most-frequent fallback)
+                 + Σ multi-label Σ weight[token]  (+ Other weight if any unseen token)
+
+(tokens pruned by compaction.drop_zero_coefficients are "ignored": they add
+nothing and do not count as unseen; numeric features produced by the
+pipeline's parse step, e.g. era_year, are parsed from the raw item fields by
+parsing.parse_item, which mirrors the vectorized parser exactly)
+
+so a prediction does not need pandas, ColumnTransformer, imputers or
+TransformedTargetRegressor. compile_scoring_table() extracts exactly those
+numbers from a fitted build_pipeline() output, and LinearScorer evaluates them
+on plain dicts (the JSON items the server already posts) in microseconds.
+
+Category and token weights are held as SortedLookup: sorted key and value
+arrays searched with np.searchsorted, one call per field for a whole batch.
+A bundle (bundle.py) hands its memory-mapped arrays over as they are, so
+scoring only reads them and forked workers keep sharing their pages.
+
+This module imports only NumPy (and the stdlib-only parsing.parse_item); compiling inspects fitted attributes by name,
+so neither step needs sklearn at runtime.
+
+Public API
+----------
+- compile_scoring_table(pipeline) -> dict   (JSON-serializable)
+- SortedLookup(keys, values=None) / SortedLookup.from_mapping(mapping, dtype)
+- LinearScorer(table).predict(items) / .predict_one(item) / .score_logs(items)
+"""
+from __future__ import annotations
+
+import math
+import zlib
+from collections.abc import Mapping as MappingABC
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .parsing import parse_item
+
+TABLE_FORMAT = "antique-atlas-scoring-table"
+TABLE_VERSION = 3  # 2: multi-label "ignored" (pruned) tokens; 3: "parse" step
+
+
+# ------------------------------
+# Normalizers (serialized by name)
+# ------------------------------
+
+def _strip_lower(token: str) -> str:
+    return token.strip().lower()
+
+
+_NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "strip_lower": _strip_lower,
+}
+
+
+def _normalizer_name(normalizer: Optional[Callable[[str], str]]) -> Optional[str]:
+    """Name of a supported normalizer; custom callables cannot be compiled."""
+    if normalizer is None:
+        return None
+    if getattr(normalizer, "__name__", "") == "_default_normalizer":
+        return "strip_lower"
+    raise ValueError(
+        f"Cannot compile custom normalizer {normalizer!r}; only the default "
+        "strip/lower normalizer (or None) is supported by the scoring table."
+    )
+
+
+# ------------------------------
+# Compilation (fitted pipeline -> table)
+# ------------------------------
+
+def _float(x: Any) -> float:
+    return float(np.asarray(x).item())
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def compile_scoring_table(pipeline: Any) -> Dict[str, Any]:
+    """Flatten a fitted build_pipeline() output into a JSON-serializable scoring table.
+
+    Raises
+    ------
+    ValueError
+        If the model is not linear or a branch cannot be expressed additively.
+    """
+    ct = pipeline.named_steps["preprocess"]
+    ttr = pipeline.named_steps["model"]
+    reg = ttr.regressor_
+    coef = getattr(reg, "coef_", None)
+    if coef is None:
+        raise ValueError("Only linear models (with coef_) can be compiled into a scoring table.")
+    if getattr(ttr, "func", None) is not np.log1p or getattr(ttr, "inverse_func", None) is not np.expm1:
+        raise ValueError("Scoring table expects the log1p/expm1 target transform from build_pipeline().")
+    coef = np.asarray(coef, dtype=float).ravel()
+
+    table: Dict[str, Any] = {
+        "format": TABLE_FORMAT,
+        "version": TABLE_VERSION,
+        "intercept": _float(reg.intercept_),
+        "parse": None,
+        "numeric": [],
+        "categorical": [],
+        "multilabel": [],
+    }
+
+    for name, trans, cols in ct.transformers_:
+        if trans == "drop" or name == "remainder":
+            continue
+        w = coef[ct.output_indices_[name]]
+        if name == "num":
+            imputer, scaler = trans.named_steps["imputer"], trans.named_steps["scaler"]
+            parser = trans.named_steps.get("parse")
+            if parser is not None:
+                # Numeric entries are the parser outputs, not its raw inputs
+                cols = list(parser.outputs)
+                table["parse"] = {"outputs": cols, "options": dict(parser.options or {})}
+            mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros(len(cols))
+            scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones(len(cols))
+            for j, col in enumerate(cols):
+                table["numeric"].append({
+                    "name": col,
+                    "fill": _float(imputer.statistics_[j]),
+                    "mean": _float(mean[j]),
+                    "scale": _float(scale[j]),
+                    "weight": float(w[j]),
+                })
+        elif name == "cat":
+            imputer, onehot = trans.named_steps["imputer"], trans.named_steps["onehot"]
+            pos = 0
+            for j, col in enumerate(cols):
+                cats = onehot.categories_[j]
+                weights = {str(c): float(w[pos + k]) for k, c in enumerate(cats)}
+                pos += len(cats)
+                table["categorical"].append({
+                    "name": col,
+                    "fill": str(imputer.statistics_[j]),
+                    "weights": weights,
+                })
+        elif name == "ml":
+            normalizer = _normalizer_name(trans.normalizer)
+            for f, (field, enc) in enumerate(trans.encoders_.items()):
+                fw = w[trans.feature_offsets_[f]:trans.feature_offsets_[f + 1]]
+                if hasattr(enc, "n_features_out_"):
+                    nz = np.flatnonzero(fw)
+                    table["multilabel"].append({
+                        "name": field,
+                        "mode": "hash",
+                        "normalizer": normalizer,
+                        "n_features": int(enc.n_features_out_),
+                        "weights": {str(int(b)): float(fw[b]) for b in nz},
+                    })
+                else:
+                    vocab = list(enc.vocabulary_)
+                    table["multilabel"].append({
+                        "name": field,
+                        "mode": "vocab",
+                        "normalizer": normalizer,
+                        "weights": {tok: float(fw[k]) for k, tok in enumerate(vocab)},
+                        "other_weight": float(fw[len(vocab)]) if enc.include_other else None,
+                        "ignored": sorted(getattr(enc, "ignored_tokens_", ())),
+                    })
+        else:
+            raise ValueError(f"Unsupported ColumnTransformer branch {name!r} in scoring table.")
+
+    return table
+
+
+# ------------------------------
+# Sorted array lookups
+# ------------------------------
+
+class SortedLookup(MappingABC):
+    """Read-only mapping over a sorted key array and a parallel value array.
+
+    Lookups go through np.searchsorted and only read the arrays, so arrays
+    memory-mapped from a bundle are used in place. Keys that are not sorted
+    (bundles written before keys were sorted on save) are sorted once here,
+    into process memory. With values=None it is a set (see contains()).
+    """
+
+    def __init__(self, keys: Any, values: Optional[Any] = None) -> None:
+        if len(keys) > 1 and not bool(np.all(keys[:-1] < keys[1:])):
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            values = values[order] if values is not None else None
+        self.keys_ = keys
+        self.values_ = values
+        # Longest key (str keys). A longer query cannot match and must not reach
+        # searchsorted, which would cast the whole key array to the wider dtype
+        self._width = keys.dtype.itemsize // 4 if keys.dtype.kind == "U" else None
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[Any, float], dtype: Any = str) -> "SortedLookup":
+        """Lookup over a dict of weights (keys as `dtype`: str tokens or int buckets)."""
+        keys = np.asarray(list(mapping.keys()), dtype=dtype)
+        values = np.fromiter(mapping.values(), dtype=np.float64, count=len(mapping))
+        return cls(keys, values)
+
+    def find(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(found mask, position) of each query; positions of missing queries are meaningless."""
+        n = len(self.keys_)
+        if not n or not len(queries):
+            return np.zeros(len(queries), dtype=bool), np.zeros(len(queries), dtype=np.intp)
+        too_long = None
+        if self._width is not None and queries.dtype.itemsize > self.keys_.dtype.itemsize:
+            too_long = np.char.str_len(queries) > self._width
+            queries = queries.astype(self.keys_.dtype)  # truncates only the too-long ones
+        pos = np.minimum(self.keys_.searchsorted(queries), n - 1)
+        found = np.asarray(self.keys_[pos] == queries)
+        if too_long is not None:
+            found &= ~too_long
+        return found, pos
+
+    def contains(self, queries: np.ndarray) -> np.ndarray:
+        return self.find(queries)[0]
+
+    def weights(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(found mask, value per query with 0.0 for missing keys)."""
+        found, pos = self.find(queries)
+        if not found.any():
+            return found, np.zeros(len(queries))
+        return found, np.where(found, self.values_[pos], 0.0)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Value of one key (True for a set), or default: one binary search."""
+        keys = self.keys_
+        if self._width is not None and len(key) > self._width:
+            return default
+        i = int(keys.searchsorted(key))
+        if i < len(keys) and keys[i] == key:
+            return float(self.values_[i]) if self.values_ is not None else True
+        return default
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.keys_.tolist())
+
+    def __len__(self) -> int:
+        return len(self.keys_)
+
+
+def _lookup(weights: Any, dtype: Any = str) -> SortedLookup:
+    return weights if isinstance(weights, SortedLookup) else SortedLookup.from_mapping(weights, dtype)
+
+
+def _key_set(keys: Any) -> SortedLookup:
+    if isinstance(keys, SortedLookup):
+        return keys
+    arr = np.asarray(sorted(keys), dtype=str)
+    return SortedLookup(arr if arr.size else np.zeros(0, dtype="<U1"))
+
+
+# ------------------------------
+# Scoring (table -> predictions)
+# ------------------------------
+
+def _token_set(value: Any, normalizer: Optional[Callable[[str], str]]) -> Set[str]:
+    """Same row semantics as MultiLabelBinarizerTransformer (_as_token_set)."""
+    if value is None or isinstance(value, float):
+        return set()
+    if isinstance(value, str):
+        tok = value if normalizer is None else normalizer(value)
+        return {tok} if tok else set()
+    try:
+        items = list(value)
+    except TypeError:
+        return set()
+    tokens: Set[str] = set()
+    for v in items:
+        if v is None:
+            continue
+        v = v if isinstance(v, str) else str(v)
+        tok = v if normalizer is None else normalizer(v)
+        if tok:
+            tokens.add(tok)
+    return tokens
+
+
+class LinearScorer:
+    """Evaluate a compiled scoring table on item dicts.
+
+    Parameters
+    ----------
+    table : Mapping[str, Any]
+        Output of compile_scoring_table() (possibly round-tripped through JSON),
+        or a bundle's table whose weights are SortedLookup views of its arrays.
+    """
+
+    # Set by bundle.load_bundle() to the manifest the scorer was loaded from
+    manifest: Optional[Dict[str, Any]] = None
+
+    def __init__(self, table: Mapping[str, Any]) -> None:
+        if table.get("format") != TABLE_FORMAT:
+            raise ValueError(f"Not a scoring table (format={table.get('format')!r})")
+        if int(table.get("version", 0)) > TABLE_VERSION:
+            raise ValueError(f"Scoring table version {table['version']} is newer than supported {TABLE_VERSION}")
+        self.table = table
+        self.intercept = float(table["intercept"])
+        # Tables before version 3 have no parse step
+        parse = table.get("parse")
+        self._parse = (list(parse["outputs"]), dict(parse.get("options") or {})) if parse else None
+        # Pre-resolve everything the hot loop touches
+        self._numeric = [
+            (n["name"], float(n["fill"]), float(n["mean"]), float(n["weight"]) / float(n["scale"]))
+            for n in table["numeric"]
+        ]
+        self._categorical = [
+            (c["name"], c["fill"], _lookup(c["weights"]))
+            for c in table["categorical"]
+        ]
+        self._multilabel = []
+        for m in table["multilabel"]:
+            normalizer = _NORMALIZERS[m["normalizer"]] if m["normalizer"] else None
+            if m["mode"] == "hash":
+                weights = m["weights"]
+                if not isinstance(weights, SortedLookup):
+                    weights = SortedLookup.from_mapping({int(b): v for b, v in weights.items()}, np.int64)
+                self._multilabel.append((m["name"], "hash", normalizer, weights, int(m["n_features"])))
+            else:
+                other = (m.get("other_weight"), _key_set(m.get("ignored", ())))
+                self._multilabel.append((m["name"], "vocab", normalizer, _lookup(m["weights"]), other))
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any) -> "LinearScorer":
+        """Compile a fitted pipeline and wrap it in a scorer."""
+        return cls(compile_scoring_table(pipeline))
+
+    def score_logs(self, items: List[Mapping[str, Any]]) -> np.ndarray:
+        """Predictions for a batch of items in log1p(price) space (one search per field)."""
+        n = len(items)
+        numeric = []
+        for item in items:
+            get = item.get
+            parsed = parse_item(item, *self._parse) if self._parse is not None else {}
+            acc = self.intercept
+            for name, fill, mean, w_over_scale in self._numeric:
+                x = parsed[name] if name in parsed else get(name)
+                if _is_missing(x):
+                    x = fill
+                acc += (float(x) - mean) * w_over_scale
+            numeric.append(acc)
+        s = np.array(numeric, dtype=float)
+
+        for name, fill, lookup in self._categorical:
+            values = []
+            for item in items:
+                v = item.get(name)
+                if _is_missing(v):
+                    v = fill
+                values.append(v if isinstance(v, str) else str(v))
+            s += lookup.weights(np.asarray(values, dtype=str))[1]  # unseen categories contribute nothing
+
+        crc32 = zlib.crc32
+        for name, mode, normalizer, lookup, extra in self._multilabel:
+            keys: List[Any] = []
+            owner: List[int] = []
+            for i, item in enumerate(items):
+                tokens = _token_set(item.get(name), normalizer)
+                if mode == "hash":
+                    tokens = {crc32(t.encode("utf-8")) % extra for t in tokens}
+                keys.extend(tokens)
+                owner.extend([i] * len(tokens))
+            if not keys:
+                continue
+            queries = np.asarray(keys, dtype=np.int64 if mode == "hash" else str)
+            found, w = lookup.weights(queries)
+            s += np.bincount(owner, weights=w, minlength=n)
+            if mode == "vocab":
+                other_weight, ignored = extra
+                if other_weight is not None:
+                    unseen = ~found & ~ignored.contains(queries)
+                    s += other_weight * (np.bincount(owner, weights=unseen, minlength=n) > 0)
+        return s
+
+    def score_log(self, item: Mapping[str, Any]) -> float:
+        """Prediction for one item in log1p(price) space (scalar lookups; see score_logs for batches)."""
+        s = self.intercept
+        get = item.get
+        parsed = parse_item(item, *self._parse) if self._parse is not None else {}
+
+        for name, fill, mean, w_over_scale in self._numeric:
+            x = parsed[name] if name in parsed else get(name)
+            if _is_missing(x):
+                x = fill
+            s += (float(x) - mean) * w_over_scale
+
+        for name, fill, weights in self._categorical:
+            v = get(name)
+            if _is_missing(v):
+                v = fill
+            elif not isinstance(v, str):
+                v = str(v)
+            s += weights.get(v, 0.0)  # unseen categories contribute nothing
+
+        for name, mode, normalizer, weights, extra in self._multilabel:
+            tokens = _token_set(get(name), normalizer)
+            if mode == "hash":
+                crc32 = zlib.crc32
+                buckets = {crc32(t.encode("utf-8")) % extra for t in tokens}
+                s += sum(weights.get(b, 0.0) for b in buckets)
+                continue
+            other_weight, ignored = extra
+            other = False
+            for t in tokens:
+                w = weights.get(t)
+                if w is not None:
+                    s += w
+                elif t not in ignored:
+                    other = True
+            if other and other_weight is not None:
+                s += other_weight
+        return s
+
+    def predict_one(self, item: Mapping[str, Any]) -> float:
+        """Predicted price in dollars for one item dict."""
+        return math.expm1(self.score_log(item))
+
+    def predict(self, items: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Predicted prices in dollars for a batch of item dicts."""
+        return np.expm1(self.score_logs(list(items)))
@@ -0,0 +1,161 @@
+"""
+app.py — FastAPI app serving the valuation model at POST /analyze.
+
+Purpose
+-------
+The HTTP face of service.PredictionService, on the address the Express
+backend calls (antique-atlas-server/functions/ai-service-requests.js:
+POST http://localhost:8000/analyze with a JSON array of items):
+
+- POST /analyze   JSON array of item objects -> the same array with
+                  `predicted_price_usd` on every item (400 on a bad body)
+- POST /analyze/bulk
+                  JSON array or NDJSON body, read as a stream -> NDJSON
+                  lines (item + prediction) written chunk by chunk
+                  (--bulk-chunk-size items per predict; see bulk.py)
+- GET  /metrics   Prometheus text: batch-size and queue-wait histograms,
+                  predict timings, request/item counters, cache hits/misses
+- GET  /health    model path, version, load time, cache hit rate and the
+                  last reload outcome
+
+The artifact is loaded once at startup; concurrent /analyze requests are
+merged by the service's MicroBatcher (--max-batch-size, --max-wait-ms).
+Repeated items are answered from the prediction cache (cache.py):
+--cache-size entries in memory for --cache-ttl seconds, plus a SQLite file
+shared by all workers with --cache-db; --cache-size 0 disables it.
+The artifact (or the --model-pointer file naming it) is polled every
+--reload-seconds and a changed, validated artifact is swapped in without a
+restart (reload.py); --reload-seconds 0 disables this. --bundle serves the
+compiled scoring bundle written next to the artifact instead (no sklearn
+unpickling; linear models only). For several worker processes sharing one
+loaded model see prefork.py.
+fastapi and uvicorn are imported only when the app is created / served.
+
+Usage
+-----
+python -m antique-atlas-regression-model.serving.app \
+  --model artifacts/pipeline.joblib --port 8000 --max-wait-ms 5 \
+  --cache-db /tmp/antique-atlas-cache.sqlite
+
+Public API
+----------
+- create_app(service, bulk_chunk_size=256, holder=None) -> fastapi.FastAPI
+- add_service_arguments(parser) / build_service(args) -> (service, holder)
+- main(argv=None)
+"""
+from __future__ import annotations
+
+import argparse
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from .bulk import NDJSON_MEDIA_TYPE, iter_items, stream_predictions
+from .cache import PredictionCache
+from .metrics import MetricsRegistry
+from .reload import ModelHolder
+from .service import PredictionService
+
+
+def _validate_items(body: Any) -> List[dict]:
+    if not isinstance(body, list) or not all(isinstance(item, dict) for item in body):
+        raise ValueError("Expected a JSON array of item objects")
+    return body
+
+
+def create_app(service: PredictionService, bulk_chunk_size: int = 256, holder: Optional[ModelHolder] = None) -> Any:
+    """FastAPI app exposing `service` (closed on shutdown), hot-reloaded by `holder` if given."""
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if holder is not None:
+            holder.start()
+        yield
+        if holder is not None:
+            await holder.stop()
+        await service.close()
+
+    app = FastAPI(title="Antique Atlas valuation service", lifespan=lifespan)
+    app.state.service = service
+
+    @app.post("/analyze")
+    async def analyze(request: Request) -> JSONResponse:
+        try:
+            items = _validate_items(await request.json())
+        except ValueError as exc:  # also json.JSONDecodeError
+            raise HTTPException(status_code=400, detail=str(exc))
+        return JSONResponse(await service.analyze(items))
+
+    @app.post("/analyze/bulk")
+    async def analyze_bulk(request: Request) -> StreamingResponse:
+        # The body is consumed by the response generator, chunk by chunk
+        items = iter_items(request.stream())
+        return StreamingResponse(stream_predictions(service, items, bulk_chunk_size), media_type=NDJSON_MEDIA_TYPE)
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        return Response(service.metrics_text(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {
+            "status": "ok",
+            "model": service.model_path,
+            "version": service.model.version,
+            "load_seconds": round(service.load_seconds, 3),
+            "cache": service.cache.info() if service.cache is not None else None,
+            "reload": holder.status() if holder is not None else None,
+        }
+
+    return app
+
+
+def add_service_arguments(parser: argparse.ArgumentParser) -> None:
+    """Model, batching, cache and reload flags (shared with prefork.py)."""
+    parser.add_argument("--model", type=str, default="artifacts/pipeline.joblib", help="Path to trained pipeline artifact (.joblib)")
+    parser.add_argument("--bundle", action="store_true", help="Serve the artifact's compiled scoring bundle (<stem>.bundle.json, memory-mapped; linear models) instead of unpickling it")
+    parser.add_argument("--max-batch-size", type=int, default=256, help="Dispatch a batch once this many items are queued")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Longest a request waits to be batched with others")
+    parser.add_argument("--bulk-chunk-size", type=int, default=256, help="Items per predict call (and per streamed block) on /analyze/bulk")
+    parser.add_argument("--cache-size", type=int, default=65536, help="Predictions cached in memory (0 disables the cache)")
+    parser.add_argument("--cache-ttl", type=float, default=3600.0, help="Seconds a cached prediction stays valid")
+    parser.add_argument("--cache-db", type=str, default=None, help="Optional SQLite file shared by worker processes as a second cache tier")
+    parser.add_argument("--model-pointer", type=str, default=None, help="File naming the artifact to serve (overrides --model; watched for deploys)")
+    parser.add_argument("--reload-seconds", type=float, default=2.0, help="Poll interval for a changed artifact (0 disables hot reload; not with --bundle)")
+
+
+def build_service(args: argparse.Namespace) -> Tuple[PredictionService, Optional[ModelHolder]]:
+    """Load the model named by add_service_arguments() flags; the holder is None without hot reload."""
+    model_path = args.model
+    if args.model_pointer:
+        pointer = Path(args.model_pointer)
+        model_path = str(pointer.parent / pointer.read_text(encoding="utf-8").strip())
+
+    registry = MetricsRegistry()
+    cache = PredictionCache(args.cache_size, args.cache_ttl, args.cache_db, registry) if args.cache_size > 0 else None
+    load = PredictionService.from_bundle if args.bundle else PredictionService.from_artifact
+    service = load(model_path, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, registry=registry, cache=cache)
+    holder = None
+    if args.reload_seconds > 0 and not args.bundle:
+        holder = ModelHolder(service, model_path, args.model_pointer, args.reload_seconds)
+    return service, holder
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the valuation pipeline at POST /analyze")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Port (the Express backend calls 8000)")
+    add_service_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    service, holder = build_service(args)
+    print(f"[app.py] Loaded {service.model_path} in {service.load_seconds:.3f}s; serving on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(service, args.bulk_chunk_size, holder), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
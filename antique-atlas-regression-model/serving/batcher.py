@@ -0,0 +1,201 @@
+"""
+batcher.py — Adaptive micro-batching of concurrent prediction requests.
+
+Purpose
+-------
+sklearn has a large fixed cost per predict() call (input validation,
+ColumnTransformer dispatch, DataFrame handling), so a hundred one-item calls
+cost far more than one hundred-item call. MicroBatcher sits between the
+async request handlers and that call:
+
+- each request submits its items and awaits a future;
+- one dispatcher task takes the oldest waiting request, keeps collecting
+  until `max_wait_ms` after that request arrived or until `max_batch_size`
+  items are queued, then runs ONE predict over all of them in a worker
+  thread (the event loop keeps accepting requests meanwhile);
+- the predictions are split back by offsets and each future resolved.
+
+Batches adapt to load: an idle service answers a lone request after at most
+`max_wait_ms`, while under a burst requests pile up during the running
+predict and go out together in the next batch with no extra wait. A request
+is never split; one larger than `max_batch_size` is a batch of its own.
+
+Batch sizes and queue waits (submit -> dispatch) are recorded in histograms.
+
+Public API
+----------
+- MicroBatcher(predict, max_batch_size=256, max_wait_ms=5.0, registry=None)
+  .submit(items) -> list[float]   (coroutine)
+  .close()                        (coroutine)
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, List, Mapping, Optional, Sequence
+
+from .metrics import LATENCY_BUCKETS, SIZE_BUCKETS, MetricsRegistry
+
+PredictFn = Callable[[List[Mapping[str, Any]]], Sequence[float]]
+
+
+class _Pending:
+    __slots__ = ("items", "future", "enqueued")
+
+    def __init__(self, items: List[Mapping[str, Any]], future: asyncio.Future, enqueued: float) -> None:
+        self.items = items
+        self.future = future
+        self.enqueued = enqueued
+
+
+class MicroBatcher:
+    """Merge concurrent submit() calls into batched predict() calls.
+
+    Parameters
+    ----------
+    predict : Callable[[list[dict]], Sequence[float]]
+        Scores a list of items, one value per item, in order. Runs in
+        `executor` (default: the loop's thread pool).
+    max_batch_size : int, default=256
+        Dispatch as soon as this many items are queued.
+    max_wait_ms : float, default=5.0
+        Longest a request waits for company before its batch is dispatched.
+    registry : Optional[MetricsRegistry]
+        Where the batch-size / queue-wait histograms and counters live.
+    executor : Optional[concurrent.futures.Executor]
+        Where predict runs.
+    """
+
+    def __init__(
+        self,
+        predict: PredictFn,
+        max_batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+        registry: Optional[MetricsRegistry] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict = predict
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.executor = executor
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self._batch_size = self.registry.histogram(
+            "predict_batch_size", "Items per batched predict call", SIZE_BUCKETS)
+        self._queue_wait = self.registry.histogram(
+            "predict_queue_wait_seconds", "Time from submit to batch dispatch", LATENCY_BUCKETS)
+        self._predict_seconds = self.registry.histogram(
+            "predict_batch_seconds", "Wall time of one batched predict call", LATENCY_BUCKETS)
+        self._requests = self.registry.counter("predict_requests_total", "Requests submitted to the batcher")
+        self._batches = self.registry.counter("predict_batches_total", "Batched predict calls")
+        self._failures = self.registry.counter("predict_batch_failures_total", "Batched predict calls that raised")
+
+        self._pending: Deque[_Pending] = deque()
+        self._queued_items = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    # ------------------------------
+    # Public API
+    # ------------------------------
+    async def submit(self, items: Sequence[Mapping[str, Any]]) -> List[float]:
+        """Predictions for `items`, computed in a batch with concurrent submissions."""
+        items = list(items)
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        self._ensure_worker()
+        future = loop.create_future()
+        self._pending.append(_Pending(items, future, time.perf_counter()))
+        self._queued_items += len(items)
+        self._requests.inc()
+        self._wakeup.set()
+        return await future
+
+    async def close(self) -> None:
+        """Stop the dispatcher; requests still queued fail with RuntimeError."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._pending:
+            pending = self._pending.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("MicroBatcher closed"))
+        self._queued_items = 0
+
+    # ------------------------------
+    # Dispatcher
+    # ------------------------------
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # The window is anchored at the oldest request, so requests that
+            # queued up behind a running predict are dispatched immediately
+            deadline = self._pending[0].enqueued + self.max_wait
+            while self._queued_items < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(self._take_batch())
+
+    def _take_batch(self) -> List[_Pending]:
+        batch: List[_Pending] = []
+        n = 0
+        while self._pending:
+            size = len(self._pending[0].items)
+            if batch and n + size > self.max_batch_size:
+                break
+            batch.append(self._pending.popleft())
+            n += size
+        self._queued_items -= n
+        return batch
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        live = [p for p in batch if not p.future.done()]  # skip cancelled callers
+        if not live:
+            return
+        items = [item for p in live for item in p.items]
+        now = time.perf_counter()
+        for p in live:
+            self._queue_wait.observe(now - p.enqueued)
+        self._batch_size.observe(len(items))
+        self._batches.inc()
+
+        loop = asyncio.get_running_loop()
+        try:
+            preds = await loop.run_in_executor(self.executor, self.predict, items)
+        except Exception as exc:  # one bad batch fails its callers, not the dispatcher
+            self._failures.inc()
+            for p in live:
+                if not p.future.done():
+                    p.future.set_exception(exc)
+            return
+        finally:
+            self._predict_seconds.observe(time.perf_counter() - now)
+
+        offset = 0
+        for p in live:
+            n = len(p.items)
+            if not p.future.done():
+                p.future.set_result([float(v) for v in preds[offset:offset + n]])
+            offset += n
@@ -0,0 +1,123 @@
+"""
+bulk.py — Streaming NDJSON bulk scoring (POST /analyze/bulk).
+
+Purpose
+-------
+A tracked auction can post hundreds or thousands of lots at once. Buffering
+the whole body, scoring it and returning one JSON array makes latency and
+memory grow with the auction. Here instead:
+
+1. the request body is decoded as it arrives (ingest.JSONRecordDecoder: a
+   JSON array of items, NDJSON, or concatenated objects; UTF-8 split across
+   network chunks is handled);
+2. items are scored in fixed-size chunks (`chunk_size`) through the
+   service (its cache, then its MicroBatcher: at most one pipeline.predict
+   per chunk), all by the model that was active when the stream began;
+3. each finished chunk is written back at once as NDJSON lines: the item
+   with `predicted_price_usd` added, in request order.
+
+Everything is pull-driven: the next body bytes are read only after the
+previous chunk's lines were handed to the server, and the server only asks
+for more once the client has drained what it sent (ASGI send/receive flow
+control). So at most one chunk of items plus one undecoded network chunk
+is held, whatever the auction size, and the first results arrive after
+one chunk rather than after the whole body.
+
+Errors after the first line cannot change the HTTP status, so a malformed
+body or a non-object item ends the stream with one
+{"error": ..., "index": <items scored so far>} line.
+
+Public API
+----------
+- iter_items(chunks) -> AsyncIterator[dict]
+- stream_predictions(service, items, chunk_size=256) -> AsyncIterator[bytes]
+- NDJSON_MEDIA_TYPE
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+
+from ..ingest import JSONRecordDecoder
+from .metrics import LATENCY_BUCKETS
+from .service import PREDICTION_FIELD, PredictionService, ServedModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class BulkInputError(ValueError):
+    """The bulk body is not a JSON array / NDJSON stream of objects."""
+
+
+async def iter_items(chunks: AsyncIterable[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Item dicts decoded incrementally from a stream of body bytes."""
+    text = codecs.getincrementaldecoder("utf-8")()
+    decoder = JSONRecordDecoder()
+
+    def _item(value: Any) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            raise BulkInputError(f"expected JSON objects, got {type(value).__name__}")
+        return value
+
+    try:
+        async for chunk in chunks:
+            for value in decoder.feed(text.decode(chunk)):
+                yield _item(value)
+            if decoder.done:
+                return
+        for value in decoder.feed(text.decode(b"", final=True)) + decoder.close():
+            yield _item(value)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise BulkInputError(str(exc)) from exc
+
+
+def _ndjson(items: List[Dict[str, Any]], preds: List[float]) -> bytes:
+    return "".join(
+        json.dumps({**item, PREDICTION_FIELD: p}, ensure_ascii=False) + "\n"
+        for item, p in zip(items, preds)
+    ).encode("utf-8")
+
+
+async def stream_predictions(
+    service: PredictionService,
+    items: AsyncIterable[Dict[str, Any]],
+    chunk_size: int = 256,
+) -> AsyncIterator[bytes]:
+    """NDJSON bytes, one block per scored chunk of `items`."""
+    registry = service.registry
+    first_result = registry.histogram(
+        "bulk_first_result_seconds", "Time from bulk request start to its first scored chunk", LATENCY_BUCKETS)
+    n_items = registry.counter("bulk_items_total", "Items scored through /analyze/bulk")
+    n_errors = registry.counter("bulk_input_errors_total", "Bulk streams ended by a malformed body")
+
+    t0 = time.perf_counter()
+    sent = 0
+
+    async def _score(chunk: List[Dict[str, Any]], model: ServedModel) -> bytes:
+        nonlocal sent
+        preds = await service.predict(chunk, model)
+        if not sent:
+            first_result.observe(time.perf_counter() - t0)
+        sent += len(chunk)
+        n_items.inc(len(chunk))
+        return _ndjson(chunk, preds)
+
+    # The whole stream is scored by the model active when it started
+    with service.lease() as model:
+        chunk: List[Dict[str, Any]] = []
+        error = None
+        try:
+            async for item in items:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    yield await _score(chunk, model)
+                    chunk = []
+        except BulkInputError as exc:
+            error = exc  # items decoded before the bad input are still scored
+        if chunk:
+            yield await _score(chunk, model)
+    if error is not None:
+        n_errors.inc()
+        yield (json.dumps({"error": str(error), "index": sent}) + "\n").encode("utf-8")
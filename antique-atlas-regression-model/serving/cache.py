@@ -0,0 +1,326 @@
+"""
+cache.py — Content-addressed prediction cache in front of the model.
+
+Purpose
+-------
+The same HiBid lots are re-analyzed on every refresh and by every user
+tracking the same auction. A prediction depends only on what the fitted
+pipeline reads from an item, so items are keyed by that:
+
+- numeric branch: the parsed / coerced numbers (parsing.parse_item), so
+  "72.5 cm" and 28.54 inches, or 1850 and "1850", share a key;
+- single categoricals: the value as the one-hot encoder compares it, with
+  absent / None / NaN all meaning missing (values are NOT case-folded:
+  the encoder tells "Good" and "good" apart);
+- multi-label fields: the token set after the fitted encoder's normalizer
+  (strip/lower by default), deduplicated and sorted, as
+  MultiLabelBinarizerTransformer sees it;
+- fields the pipeline does not read are ignored.
+
+The key is the SHA-256 of that canonical JSON plus the model version (the
+SHA-256 of the artifact file), so a new artifact never reads old entries.
+
+Two tiers:
+
+- in-process LRU with a TTL (`maxsize` entries);
+- optional SQLite file (`path`) shared by every worker process on the
+  host (WAL mode; one connection per process, reopened after fork).
+
+bind(version) switches the cache to a new model version: the memory tier is
+cleared and SQLite rows of other versions (and expired ones) are deleted.
+Hits per tier and misses are counted in the metrics registry.
+
+Public API
+----------
+- artifact_version(path) -> str
+- ItemKeyer(pipeline, version).keys(items) -> list[str]
+- PredictionCache(maxsize=65536, ttl=3600.0, path=None, registry=None)
+  .bind(version) / .get_many(keys) / .put_many(keys, values) / .info() / .close()
+  .get_memory(keys) / .get_disk(out, missing) / .put_memory / .put_disk
+  (the tiers separately: the SQLite calls block, so the service runs them
+  in an executor and only the memory tier on the event loop)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ..parsing import parse_item
+from ..scoring import _token_set
+from .metrics import MetricsRegistry
+
+# SQLite host-parameter limit is 999 on old builds
+_SQL_BATCH = 500
+
+
+def artifact_version(path: str | Path) -> str:
+    """SHA-256 of an artifact file (the same in every process that loads it)."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _pipeline_version(pipeline: Any) -> str:
+    # In-memory pipelines: pickle digest. Set iteration order differs between
+    # processes, so this is only stable within one process.
+    return hashlib.sha256(pickle.dumps(pipeline, protocol=4)).hexdigest()
+
+
+def _number(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _category(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+# ------------------------------
+# Keys
+# ------------------------------
+
+class ItemKeyer:
+    """Cache keys of item dicts for one fitted pipeline.
+
+    Parameters
+    ----------
+    pipeline : sklearn.Pipeline
+        Fitted build_pipeline() output.
+    version : Optional[str]
+        Model version mixed into every key (see artifact_version); a digest
+        of the pickled pipeline by default.
+    """
+
+    def __init__(self, pipeline: Any, version: Optional[str] = None) -> None:
+        self.version = version if version is not None else _pipeline_version(pipeline)
+        self._parts: List[Callable[[Mapping[str, Any]], Any]] = []
+        ct = pipeline.named_steps["preprocess"]
+        for name, trans, cols in ct.transformers_:
+            if trans == "drop" or name == "remainder":
+                continue
+            if name == "num":
+                # Pipeline (parse ->) impute -> scale, or for hgb the bare parser / "passthrough"
+                if hasattr(trans, "named_steps"):
+                    parser = trans.named_steps.get("parse")
+                else:
+                    parser = None if isinstance(trans, str) else trans
+                outputs = list(parser.outputs) if parser is not None else list(cols)
+                options = dict(parser.options or {}) if parser is not None else {}
+                self._parts.append(
+                    lambda item, o=outputs, p=options: [_number(v) for v in parse_item(item, o, p).values()]
+                )
+            elif name == "ml":
+                normalizer = trans.normalizer
+                fields = list(trans.encoders_)
+                self._parts.append(
+                    lambda item, f=fields, n=normalizer: [sorted(_token_set(item.get(c), n)) for c in f]
+                )
+            else:
+                self._parts.append(lambda item, c=list(cols): [_category(item.get(k)) for k in c])
+
+    def canonical(self, item: Mapping[str, Any]) -> List[Any]:
+        """What the pipeline reads from `item`, in a JSON-serializable form."""
+        return [part(item) for part in self._parts]
+
+    def keys(self, items: Sequence[Mapping[str, Any]]) -> List[str]:
+        prefix = self.version.encode("ascii") + b"\0"
+        return [
+            hashlib.sha256(
+                prefix + json.dumps(self.canonical(item), separators=(",", ":"), default=str).encode("utf-8")
+            ).hexdigest()
+            for item in items
+        ]
+
+
+# ------------------------------
+# Cache tiers
+# ------------------------------
+
+class PredictionCache:
+    """LRU+TTL prediction cache with an optional shared SQLite tier.
+
+    Parameters
+    ----------
+    maxsize : int
+        Entries held in process memory.
+    ttl : float
+        Seconds an entry stays valid (in both tiers).
+    path : Optional[str | Path]
+        SQLite file shared across processes; memory only if None.
+    registry : Optional[MetricsRegistry]
+        Where hit/miss counters are registered (a new one by default).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 65536,
+        ttl: float = 3600.0,
+        path: Optional[str | Path] = None,
+        registry: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.path = str(path) if path is not None else None
+        self.version: Optional[str] = None
+        self._memory: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = 0
+
+        registry = registry if registry is not None else MetricsRegistry()
+        self._memory_hits = registry.counter("prediction_cache_memory_hits_total", "Predictions served from the in-process cache")
+        self._disk_hits = registry.counter("prediction_cache_disk_hits_total", "Predictions served from the SQLite cache")
+        self._misses = registry.counter("prediction_cache_misses_total", "Cache lookups that went to the model")
+        self._invalidations = registry.counter("prediction_cache_invalidations_total", "Cache flushes for a new model version")
+
+    @property
+    def shared(self) -> bool:
+        """Whether there is a SQLite tier (its calls can wait on other processes' locks)."""
+        return self.path is not None
+
+    # SQLite connections must not cross fork(): one per process, opened lazily.
+    # Callers hold self._db_lock, never self._lock: a slow disk call must not
+    # hold up memory lookups.
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, value REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+    def bind(self, version: str) -> None:
+        """Serve `version` from now on; entries of other versions are dropped."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                self._invalidations.inc()
+            self.version = version
+            self._memory.clear()
+        with self._db_lock:
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM predictions WHERE version != ? OR expires <= ?", (version, time.time()))
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[float]]:
+        """Cached prediction per key (None for a miss), from both tiers."""
+        out, missing = self.get_memory(keys)
+        if missing:
+            self.get_disk(out, missing)
+        return out
+
+    def get_memory(self, keys: Sequence[str]) -> Tuple[List[Optional[float]], Dict[str, List[int]]]:
+        """Memory-tier lookup: (prediction per key or None, {missed key: positions}).
+
+        Pass both to get_disk, which fills the rest in and counts the misses.
+        """
+        out: List[Optional[float]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+        now = time.monotonic()
+        with self._lock:
+            memory = self._memory
+            for i, key in enumerate(keys):
+                hit = memory.get(key)
+                if hit is not None and hit[1] > now:
+                    memory.move_to_end(key)
+                    out[i] = hit[0]
+                else:
+                    if hit is not None:
+                        del memory[key]
+                    missing.setdefault(key, []).append(i)
+        self._memory_hits.inc(len(keys) - sum(len(v) for v in missing.values()))
+        return out, missing
+
+    def get_disk(self, out: List[Optional[float]], missing: Dict[str, List[int]]) -> None:
+        """SQLite-tier lookup of get_memory's misses, filling `out` in place.
+
+        Blocks while another process writes; the service runs it in an executor.
+        """
+        found = []
+        wall = time.time()
+        with self._db_lock:
+            db = self._db()
+            if db is not None and missing:
+                pending = list(missing)
+                for start in range(0, len(pending), _SQL_BATCH):
+                    batch = pending[start:start + _SQL_BATCH]
+                    found += db.execute(
+                        f"SELECT key, value, expires FROM predictions WHERE key IN ({','.join('?' * len(batch))}) AND expires > ?",
+                        (*batch, wall),
+                    ).fetchall()
+        n_disk = 0
+        now = time.monotonic()
+        with self._lock:
+            for key, value, expires in found:
+                for i in missing.pop(key):
+                    out[i] = value
+                    n_disk += 1
+                # Promote with the remaining lifetime of the shared entry
+                self._remember(key, value, now + (expires - wall))
+        self._disk_hits.inc(n_disk)
+        self._misses.inc(sum(len(v) for v in missing.values()))
+
+    def put_many(self, keys: Sequence[str], values: Sequence[float]) -> None:
+        """Store predictions in both tiers."""
+        self.put_memory(keys, values)
+        self.put_disk(keys, values)
+
+    def put_memory(self, keys: Sequence[str], values: Sequence[float]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._remember(key, float(value), now + self.ttl)
+
+    def put_disk(self, keys: Sequence[str], values: Sequence[float]) -> None:
+        """Write predictions to the SQLite tier (blocking, like get_disk)."""
+        with self._db_lock:
+            db = self._db()
+            if db is not None and keys:
+                expires = time.time() + self.ttl
+                db.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, version, value, expires) VALUES (?, ?, ?, ?)",
+                    [(key, self.version or "", float(value), expires) for key, value in zip(keys, values)],
+                )
+
+    def _remember(self, key: str, value: float, expires: float) -> None:
+        memory = self._memory
+        memory[key] = (value, expires)
+        memory.move_to_end(key)
+        while len(memory) > self.maxsize:
+            memory.popitem(last=False)
+
+    def info(self) -> Dict[str, Any]:
+        """Entry count and hit rate so far (JSON-serializable)."""
+        hits = self._memory_hits.value + self._disk_hits.value
+        lookups = hits + self._misses.value
+        return {
+            "version": self.version,
+            "size": len(self._memory),
+            "memory_hits": int(self._memory_hits.value),
+            "disk_hits": int(self._disk_hits.value),
+            "misses": int(self._misses.value),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -0,0 +1,142 @@
+"""
+metrics.py — Minimal counters and histograms for the prediction service.
+
+Purpose
+-------
+The service reports a handful of numbers (batch sizes, queue waits, request
+and item counts) without a metrics dependency. Metrics live in a
+MetricsRegistry and render in the Prometheus text exposition format for
+GET /metrics, or as a JSON-serializable snapshot.
+
+Histograms use fixed upper bounds (cumulative "le" buckets, plus +Inf), so
+observing is O(number of buckets) and memory is constant. Every metric has
+its own lock: observations may come from the event loop and from executor
+threads.
+
+Public API
+----------
+- Counter(name, help).inc(n=1)
+- Histogram(name, help, buckets).observe(value)
+- MetricsRegistry().counter(...) / .histogram(...) / .render() / .snapshot()
+- SIZE_BUCKETS, LATENCY_BUCKETS
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Dict, List, Sequence
+
+# Batch sizes (items) and latencies (seconds)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1) -> None:
+        with self._lock:
+            self._value += n
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {_fmt(self._value)}",
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "counter", "value": self._value}
+
+
+class Histogram:
+    """Fixed-bucket histogram (count, sum and per-bucket counts)."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: > largest bound
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, c in zip(self.buckets, counts):
+            cumulative += c
+            lines.append(f'{self.name}_bucket{{le="{_fmt(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {n}')
+        lines.append(f"{self.name}_sum {_fmt(total)}")
+        lines.append(f"{self.name}_count {n}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        return {
+            "type": "histogram",
+            "count": n,
+            "sum": total,
+            "buckets": {_fmt(b): c for b, c in zip(self.buckets, counts)},
+            "overflow": counts[-1],
+        }
+
+
+class MetricsRegistry:
+    """Named metrics of one service, rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help)
+        return self._metrics[name]  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float]) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help, buckets)
+        return self._metrics[name]  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
@@ -0,0 +1,202 @@
+"""
+prefork.py — Pre-fork multi-process serving of one shared, read-only model.
+
+Purpose
+-------
+One process running pipeline.predict is bound by the GIL, and workers that
+each unpickle the artifact pay its load time and memory once per worker.
+This launcher loads once and forks:
+
+1. the parent loads the model (app.build_service: the joblib pipeline, or
+   with --bundle the memory-mapped scoring bundle) and builds the app;
+2. gc.collect() + gc.freeze() move everything loaded so far into the
+   permanent generation: the workers' collector never traverses those
+   objects, so it does not write to (and un-share) their pages;
+3. the listening socket is bound in the parent, then --workers workers are
+   forked. Each runs its own event loop (uvicorn) on the inherited socket,
+   and the kernel spreads connections between them. Model, app and the
+   imported modules are shared copy-on-write;
+4. the parent only supervises. A worker that dies is re-forked from the
+   already-loaded parent, but a crash right after start stops the launcher.
+   SIGTERM/SIGINT stop all workers.
+
+Pages are still copied when a worker changes them, e.g. the refcounts of
+the objects a prediction touches. That is why the launcher prints
+per-worker memory from /proc/<pid>/smaps_rollup after startup and every
+--report-seconds:
+- RSS counts shared pages in every worker;
+- USS (private pages) is what one more worker adds;
+- summed PSS is the whole box.
+
+Hot reload is off by default here, because each worker would load its own
+private copy of the new model. Deploy by restarting the launcher instead.
+With --reload-seconds each worker reloads on its own.
+
+Usage
+-----
+python -m antique-atlas-regression-model.serving.prefork \
+  --model artifacts/pipeline.joblib --workers 4 --port 8000
+
+Public API
+----------
+- memory_usage(pid) -> dict[str, int]      (kB: rss, pss, uss, shared)
+- memory_report(pids, parent=None) -> str
+- run_workers(serve, n_workers, report_seconds=0.0)
+- main(argv=None)
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import re
+import signal
+import socket
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .app import add_service_arguments, build_service, create_app
+
+_SMAPS_LINE = re.compile(r"^(\w+):\s+(\d+) kB$", re.MULTILINE)
+
+# A worker that dies sooner than this after its fork is not restarted
+_MIN_UPTIME = 5.0
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """RSS, PSS, USS (private clean + dirty) and shared memory of a process, in kB."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            text = f.read()
+    except FileNotFoundError:  # kernels before 4.14: sum the per-mapping entries
+        with open(f"/proc/{pid}/smaps", "r") as f:
+            text = f.read()
+    totals: Dict[str, int] = {}
+    for key, value in _SMAPS_LINE.findall(text):
+        totals[key] = totals.get(key, 0) + int(value)
+    return {
+        "rss": totals.get("Rss", 0),
+        "pss": totals.get("Pss", 0),
+        "uss": totals.get("Private_Clean", 0) + totals.get("Private_Dirty", 0),
+        "shared": totals.get("Shared_Clean", 0) + totals.get("Shared_Dirty", 0),
+    }
+
+
+def memory_report(pids: Sequence[int], parent: Optional[int] = None) -> str:
+    """One line per process (MiB) plus the summed PSS of all of them."""
+    rows = ([("parent", parent)] if parent is not None else []) + [(f"worker {i}", pid) for i, pid in enumerate(pids)]
+    lines = []
+    total_pss = 0
+    for label, pid in rows:
+        try:
+            m = memory_usage(pid)
+        except OSError:
+            continue  # exited meanwhile
+        total_pss += m["pss"]
+        lines.append(
+            f"  {label:<9} pid {pid:>7}  RSS {m['rss'] / 1024:7.1f}  PSS {m['pss'] / 1024:7.1f}  "
+            f"USS {m['uss'] / 1024:7.1f}  shared {m['shared'] / 1024:7.1f} MiB"
+        )
+    lines.append(f"  total PSS {total_pss / 1024:.1f} MiB")
+    return "\n".join(lines)
+
+
+def _fork(serve: Callable[[], None]) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 0
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        serve()
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def run_workers(serve: Callable[[], None], n_workers: int, report_seconds: float = 0.0) -> None:
+    """Fork `n_workers` processes running `serve()`, restart the ones that die, until SIGTERM/SIGINT.
+
+    Everything loaded before the call is shared with the workers
+    (gc.freeze() keeps the collector off those pages).
+    """
+    gc.collect()
+    gc.freeze()
+
+    stopping = False
+
+    def _stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    started: Dict[int, float] = {}
+    for _ in range(n_workers):
+        started[_fork(serve)] = time.monotonic()
+    print(f"[prefork.py] {n_workers} workers: {', '.join(map(str, started))}")
+
+    next_report = time.monotonic() + 2.0  # let the workers finish starting first
+    while started:
+        if stopping:
+            for pid in started:
+                os.kill(pid, signal.SIGTERM)
+            for pid in list(started):
+                os.waitpid(pid, 0)
+                del started[pid]
+            break
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            uptime = time.monotonic() - started.pop(pid)
+            print(f"[prefork.py] worker {pid} exited (status {status}) after {uptime:.1f}s")
+            if uptime < _MIN_UPTIME:
+                print("[prefork.py] worker crashed on startup; stopping")
+                stopping = True
+            else:
+                started[_fork(serve)] = time.monotonic()
+            continue
+        if next_report is not None and time.monotonic() >= next_report:
+            print("[prefork.py] memory per process:\n" + memory_report(list(started), os.getpid()), flush=True)
+            next_report = time.monotonic() + report_seconds if report_seconds > 0 else None
+        time.sleep(0.2)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the valuation pipeline from N forked workers sharing one loaded model")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Port (the Express backend calls 8000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--report-seconds", type=float, default=0.0, help="Print per-worker memory this often (0: once, after startup)")
+    add_service_arguments(parser)
+    parser.set_defaults(reload_seconds=0.0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    service, holder = build_service(args)
+    app = create_app(service, args.bulk_chunk_size, holder)
+    print(f"[prefork.py] Loaded {service.model_path} in {service.load_seconds:.3f}s; serving on http://{args.host}:{args.port}")
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    def serve() -> None:
+        uvicorn.Server(uvicorn.Config(app)).run(sockets=[sock])
+
+    run_workers(serve, args.workers, args.report_seconds)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
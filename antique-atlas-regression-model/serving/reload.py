@@ -0,0 +1,221 @@
+"""
+reload.py — Zero-downtime model hot reload for the prediction service.
+
+Purpose
+-------
+train.py (or tune.py / incremental.py) writes a new artifact while the
+server keeps running. ModelHolder watches it and swaps the service's model
+without a restart:
+
+1. every `poll_seconds` it stats the artifact: `path` itself, or the file
+   named by a pointer file (`pointer`, one path per file, relative to the
+   pointer's directory) — deploy by writing pipeline-<stamp>.joblib, then
+   replacing the pointer with os.replace;
+2. a changed file (path, size, mtime, inode) is loaded in a worker thread
+   and validated: it must be a fitted build_pipeline() output whose
+   prediction for a canned sword (the first record of data/swords.json) is
+   a finite positive price;
+3. only then PredictionService.swap_model() makes it the active model.
+   Requests already running finish on the old model (they hold a lease);
+   the prediction cache moves to the new version.
+
+A file that fails to load or validate never replaces the serving model. It
+is not retried until it changes again, except when it changed while being
+read (a partially written artifact), which is retried on the next poll.
+
+Reload latency (change seen -> new model serving) and reload/failure counts
+are recorded in the service's metrics registry.
+
+Public API
+----------
+- canned_sword() -> dict
+- validate_pipeline(pipeline, item) -> float
+- ModelHolder(service, path=None, pointer=None, poll_seconds=2.0, smoke_item=None)
+  .check() -> bool   (coroutine)
+  .start() / .stop() (coroutine) / .status() -> dict
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from ..lazy_imports import lazy_import
+from .cache import artifact_version
+from .metrics import MetricsRegistry
+from .service import PredictionService, items_frame
+
+joblib = lazy_import("joblib")
+
+# Reloads take longer than predictions: seconds, not milliseconds
+RELOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_SWORDS_JSON = Path(__file__).resolve().parents[1] / "data" / "swords.json"
+
+Signature = Tuple[str, int, int, int]
+
+
+def canned_sword(path: str | Path = _SWORDS_JSON) -> Dict[str, Any]:
+    """First record of data/swords.json without its price."""
+    from ..pipeline import DEFAULT_CONFIG
+
+    with open(path, "r", encoding="utf-8") as f:
+        item = dict(json.load(f)[0])
+    item.pop(DEFAULT_CONFIG["target_col"], None)
+    return item
+
+
+def validate_pipeline(pipeline: Any, item: Mapping[str, Any]) -> float:
+    """Smoke-test a loaded artifact; returns its prediction for `item`.
+
+    Raises
+    ------
+    ValueError
+        If it is not a fitted pipeline or the prediction is not a finite positive price.
+    """
+    steps = getattr(pipeline, "named_steps", None)
+    if steps is None or "preprocess" not in steps or "model" not in steps:
+        raise ValueError("Artifact is not a build_pipeline() Pipeline (preprocess -> model).")
+    columns = getattr(steps["preprocess"], "feature_names_in_", None)
+    if columns is None:
+        raise ValueError("Artifact pipeline is not fitted.")
+    pred = float(pipeline.predict(items_frame([item], list(columns)))[0])
+    if not math.isfinite(pred) or pred <= 0:
+        raise ValueError(f"Smoke prediction {pred!r} is not a positive price.")
+    return pred
+
+
+def _signature(path: Path) -> Signature:
+    st = path.stat()
+    return (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ModelHolder:
+    """Watch an artifact (or pointer file) and hot-swap the service's model.
+
+    Parameters
+    ----------
+    service : PredictionService
+        Service whose model is replaced.
+    path : Optional[str | Path]
+        Artifact to watch (default: the service's model_path).
+    pointer : Optional[str | Path]
+        Pointer file naming the current artifact; takes precedence over `path`.
+    poll_seconds : float
+        Interval between checks.
+    smoke_item : Optional[dict]
+        Item every candidate must score (default: canned_sword()).
+    """
+
+    def __init__(
+        self,
+        service: PredictionService,
+        path: Optional[str | Path] = None,
+        pointer: Optional[str | Path] = None,
+        poll_seconds: float = 2.0,
+        smoke_item: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        path = path if path is not None else service.model_path
+        if path is None and pointer is None:
+            raise ValueError("ModelHolder needs an artifact path or a pointer file.")
+        self.service = service
+        self.path = Path(path) if path is not None else None
+        self.pointer = Path(pointer) if pointer is not None else None
+        self.poll_seconds = float(poll_seconds)
+        self.smoke_item = dict(smoke_item) if smoke_item is not None else canned_sword()
+        self.last_error: Optional[str] = None
+        self.last_reload: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # The model already serving counts as accepted
+        current = Path(service.model_path) if service.model_path else None
+        self._accepted = _signature(current) if current is not None and current.exists() else None
+        self._rejected: Optional[Signature] = None
+
+        registry: MetricsRegistry = service.registry
+        self._seconds = registry.histogram(
+            "model_reload_seconds", "Time from artifact change seen to new model serving", RELOAD_BUCKETS)
+        self._reloads = registry.counter("model_reloads_total", "Artifacts swapped in")
+        self._failures = registry.counter("model_reload_failures_total", "Artifacts rejected (load or smoke test failed)")
+
+    def target(self) -> Path:
+        """The artifact currently designated (through the pointer file, if any)."""
+        if self.pointer is None:
+            return self.path
+        name = self.pointer.read_text(encoding="utf-8").strip()
+        return self.pointer.parent / name
+
+    def _load(self, target: Path) -> Tuple[Any, str, float]:
+        # Worker thread: never touches the serving model
+        t0 = time.perf_counter()
+        version = artifact_version(target)
+        pipeline = joblib.load(target)
+        validate_pipeline(pipeline, self.smoke_item)
+        return pipeline, version, time.perf_counter() - t0
+
+    async def check(self) -> bool:
+        """Load, validate and swap in the designated artifact if it changed; True if swapped."""
+        async with self._lock:
+            try:
+                target = self.target()
+                before = _signature(target)
+            except OSError:
+                return False  # pointer or artifact mid-replace; look again next poll
+            if before in (self._accepted, self._rejected):
+                return False
+
+            t0 = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            try:
+                pipeline, version, load_seconds = await loop.run_in_executor(None, self._load, target)
+            except Exception as exc:
+                try:
+                    after = _signature(target)
+                except OSError:
+                    after = None
+                if after == before:  # a finished file that is bad: skip it until it changes
+                    self._rejected = before
+                    self._failures.inc()
+                    self.last_error = f"{target}: {type(exc).__name__}: {exc}"
+                return False
+
+            self.service.swap_model(pipeline, version, str(target), load_seconds)
+            self._accepted, self._rejected = before, None
+            self.last_error = None
+            self.last_reload = time.time()
+            self._reloads.inc()
+            self._seconds.observe(time.perf_counter() - t0)
+            return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            await self.check()
+
+    def start(self) -> None:
+        """Begin polling (from the event loop thread)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """Watch target and last reload outcome (JSON-serializable)."""
+        return {
+            "watching": str(self.pointer or self.path),
+            "version": self.service.model.version,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+            "reloads": int(self._reloads.value),
+            "failures": int(self._failures.value),
+        }
@@ -0,0 +1,245 @@
+"""
+service.py — Framework-independent prediction service behind /analyze.
+
+Purpose
+-------
+Holds what one server process needs: the fitted pipeline (loaded ONCE from
+the joblib artifact), a MicroBatcher that merges concurrent requests into
+one pipeline.predict over one DataFrame, and the metrics registry. app.py
+only adapts it to HTTP, so the service can be driven (and tested) directly
+from asyncio.
+
+The /analyze contract is that of antique-atlas-server
+(functions/ai-service-requests.js): the body is a JSON array of item
+objects, the response an array of the same items, in order, each with a
+`predicted_price_usd` field added. Fields the model does not use are passed
+through untouched; fields it uses but an item lacks are treated as missing.
+
+Public API
+----------
+- PREDICTION_FIELD
+- items_frame(items, columns) -> pd.DataFrame
+- ServedModel(pipeline, ...)              (one active or retiring model)
+- PredictionService(pipeline, max_batch_size=256, max_wait_ms=5.0, cache=None)
+  .from_artifact(path, **kwargs) / .from_bundle(path, **kwargs)
+  .predict_items(items) -> np.ndarray     (synchronous, one predict call)
+  .predict(items, model=None) -> list[float]  (coroutine, cached + micro-batched)
+  .analyze(items) -> list[dict]           (coroutine, the /analyze response)
+  .lease(model=None) / .swap_model(pipeline, version, path, load_seconds)
+  .metrics_text() / .close()
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+
+from ..lazy_imports import lazy_import
+from .batcher import MicroBatcher
+from .cache import ItemKeyer, PredictionCache, artifact_version
+from .metrics import MetricsRegistry
+
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+PREDICTION_FIELD = "predicted_price_usd"
+
+
+def items_frame(items: Sequence[Mapping[str, Any]], columns: Sequence[str]) -> pd.DataFrame:
+    """One DataFrame of exactly `columns` (missing fields -> NaN) from item dicts."""
+    return pd.DataFrame.from_records(list(items), columns=list(columns))
+
+
+class ServedModel:
+    """One loaded pipeline with its own MicroBatcher.
+
+    Requests hold a lease (PredictionService.lease) for as long as they use
+    the model; a swapped-out model is closed once its last lease ends.
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        max_batch_size: int,
+        max_wait_ms: float,
+        registry: MetricsRegistry,
+        version: Optional[str] = None,
+        path: Optional[str] = None,
+        load_seconds: float = 0.0,
+        keyed: bool = False,
+    ) -> None:
+        self.pipeline = pipeline
+        steps = getattr(pipeline, "named_steps", None)
+        # A bundle's LinearScorer (from_bundle) scores item dicts directly and is not keyed
+        self.columns = list(steps["preprocess"].feature_names_in_) if steps is not None else None
+        self.keyer = ItemKeyer(pipeline, version) if keyed and steps is not None else None
+        self.version = self.keyer.version if self.keyer is not None else version
+        self.path = path
+        self.load_seconds = load_seconds
+        self.batcher = MicroBatcher(self.predict_items, max_batch_size, max_wait_ms, registry)
+        self.leases = 0
+
+    def predict_items(self, items: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Predicted prices (dollars) for item dicts, in one pipeline.predict call."""
+        if self.columns is None:
+            return np.asarray(self.pipeline.predict(items), dtype=float)
+        return np.asarray(self.pipeline.predict(items_frame(items, self.columns)), dtype=float)
+
+
+class PredictionService:
+    """Micro-batched predictions of one fitted pipeline (swappable at runtime).
+
+    Parameters
+    ----------
+    pipeline : sklearn.Pipeline | scoring.LinearScorer
+        Fitted build_pipeline() output (or a bundle's scorer, see from_bundle).
+    max_batch_size, max_wait_ms : see MicroBatcher.
+    registry : Optional[MetricsRegistry]
+        Shared metrics registry (a new one by default).
+    cache : Optional[PredictionCache]
+        Prediction cache (pipelines only); bound to the active model's `version`.
+    version : Optional[str]
+        Model version for cache keys (from_artifact: the artifact's SHA-256).
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        max_batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+        registry: Optional[MetricsRegistry] = None,
+        cache: Optional[PredictionCache] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.cache = cache
+        self.model = self._serve(pipeline, version)
+        self._retiring: Set[asyncio.Task] = set()
+        self._items = self.registry.counter("analyze_items_total", "Items scored through /analyze")
+
+    @classmethod
+    def from_artifact(cls, path: str | Path, **kwargs: Any) -> "PredictionService":
+        """Load the joblib artifact once and wrap it."""
+        t0 = time.perf_counter()
+        pipeline = joblib.load(path)
+        kwargs.setdefault("version", artifact_version(path))
+        service = cls(pipeline, **kwargs)
+        service.model.path = str(path)
+        service.model.load_seconds = time.perf_counter() - t0
+        return service
+
+    @classmethod
+    def from_bundle(cls, path: str | Path, **kwargs: Any) -> "PredictionService":
+        """Serve a compiled scoring bundle (bundle.py, arrays memory-mapped) instead of the pipeline."""
+        from ..bundle import bundle_paths, load_bundle
+
+        t0 = time.perf_counter()
+        scorer = load_bundle(path)
+        kwargs.setdefault("version", scorer.manifest["sha256"])
+        service = cls(scorer, **kwargs)
+        service.model.path = str(bundle_paths(path)[0])
+        service.model.load_seconds = time.perf_counter() - t0
+        return service
+
+    # The active model's attributes
+    pipeline = property(lambda self: self.model.pipeline)
+    columns = property(lambda self: self.model.columns)
+    batcher = property(lambda self: self.model.batcher)
+    model_path = property(lambda self: self.model.path)
+    load_seconds = property(lambda self: self.model.load_seconds)
+
+    def _serve(self, pipeline: Any, version: Optional[str], path: Optional[str] = None, load_seconds: float = 0.0) -> ServedModel:
+        model = ServedModel(
+            pipeline, self.max_batch_size, self.max_wait_ms, self.registry,
+            version, path, load_seconds, keyed=self.cache is not None,
+        )
+        if self.cache is not None:
+            self.cache.bind(model.version)
+        return model
+
+    # ------------------------------
+    # Model swap
+    # ------------------------------
+    def swap_model(self, pipeline: Any, version: Optional[str] = None, path: Optional[str] = None, load_seconds: float = 0.0) -> ServedModel:
+        """Make `pipeline` the active model; requests already running finish on the old one.
+
+        Must be called from the event loop thread. Returns the new ServedModel.
+        """
+        old, self.model = self.model, self._serve(pipeline, version, path, load_seconds)
+        task = asyncio.get_running_loop().create_task(self._retire(old))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+        return self.model
+
+    @staticmethod
+    async def _retire(model: ServedModel) -> None:
+        while model.leases:
+            await asyncio.sleep(0.01)
+        await model.batcher.close()
+
+    @contextmanager
+    def lease(self, model: Optional[ServedModel] = None) -> Iterator[ServedModel]:
+        """Pin `model` (default: the active one) until the block ends."""
+        model = model if model is not None else self.model
+        model.leases += 1
+        try:
+            yield model
+        finally:
+            model.leases -= 1
+
+    # ------------------------------
+    # Predictions
+    # ------------------------------
+    def predict_items(self, items: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Predicted prices (dollars) for item dicts, in one pipeline.predict call."""
+        return self.model.predict_items(items)
+
+    async def predict(self, items: Sequence[Mapping[str, Any]], model: Optional[ServedModel] = None) -> List[float]:
+        """Predictions for `items`: cache hits, the rest micro-batched (once per distinct key).
+
+        `model` pins a leased model (e.g. for all chunks of one bulk stream).
+        """
+        with self.lease(model) as model:
+            if self.cache is None or model.keyer is None:
+                return await model.batcher.submit(items)
+            cache = self.cache
+            keys = model.keyer.keys(items)
+            # Only the memory tier runs on the event loop: SQLite calls can wait
+            # up to its busy timeout on other workers' writes
+            preds, todo = cache.get_memory(keys)
+            if todo:
+                if cache.shared:
+                    await asyncio.get_running_loop().run_in_executor(None, cache.get_disk, preds, todo)
+                else:
+                    cache.get_disk(preds, todo)
+            if todo:
+                scored = await model.batcher.submit([items[rows[0]] for rows in todo.values()])
+                cache.put_memory(list(todo), scored)
+                if cache.shared:
+                    await asyncio.get_running_loop().run_in_executor(None, cache.put_disk, list(todo), scored)
+                for rows, p in zip(todo.values(), scored):
+                    for i in rows:
+                        preds[i] = p
+            return preds
+
+    async def analyze(self, items: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+        """The /analyze response: each item with its prediction added."""
+        preds = await self.predict(items)
+        self._items.inc(len(preds))
+        return [{**item, PREDICTION_FIELD: p} for item, p in zip(items, preds)]
+
+    def metrics_text(self) -> str:
+        return self.registry.render()
+
+    async def close(self) -> None:
+        for task in list(self._retiring):
+            await task
+        await self.model.batcher.close()
+        if self.cache is not None:
+            self.cache.close()
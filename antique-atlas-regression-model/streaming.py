@@ -0,0 +1,215 @@
+"""
+streaming.py — Out-of-core training from (sharded) Parquet with SGD.
+
+Purpose
+-------
+Fit the same Pipeline(preprocess -> TransformedTargetRegressor) that
+build_pipeline() describes, without ever holding the dataset in memory:
+
+1. Pass 1, one record batch at a time, reading only the configured columns:
+   a uniform sample of at most ``n_sample`` rows (bottom-k random keys, so
+   shard order does not bias it). build_pipeline()'s ColumnTransformer is
+   fitted on the sample with its ordinary fit: parse step, imputers, scaler,
+   one-hot categories and multi-label vocabularies.
+2. Pass 2 (and further epochs): SGDRegressor.partial_fit on log1p(price) of
+   each transformed batch, wrapped in the usual TransformedTargetRegressor.
+
+Peak memory depends on --batch-size and --sample-rows, not on the number of
+rows. The artifact is an ordinary fitted Pipeline, so evaluate.py,
+explain.py and bundle.py use it as is.
+
+Differences from the in-memory fit
+----------------------------------
+- Preprocessing statistics come from the sample: imputer fills and scaler
+  moments are estimates, a category or token missing from the sample is
+  unknown (ignored / __Other) at transform time, and a top_k vocabulary is
+  the sample's top_k. Data no larger than the sample is fitted exactly.
+- The model is SGDRegressor (config ``model.type = "sgd"``), not RidgeCV.
+
+Public API
+----------
+- iter_batches(path, columns, batch_size, filters=None) -> Iterator[pd.DataFrame]
+- sample_rows(path, columns, n_sample=50000, batch_size=65536, filters=None, random_state=0) -> (pd.DataFrame, n_rows)
+- fit_streaming(config, path, batch_size=65536, epochs=5, filters=None, n_sample=50000) -> (Pipeline, report)
+- predict_streaming(pipeline, path, target_col, batch_size, filters=None) -> (y_true, y_pred)
+"""
+from __future__ import annotations
+
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ingest import arrow_to_pandas, filter_expression, open_dataset
+from .lazy_imports import lazy_import
+from .pipeline import _make_column_transformer, _make_regressor, input_columns
+
+pd = lazy_import("pandas")
+
+
+# ------------------------------
+# Reading
+# ------------------------------
+
+def iter_batches(
+    path: str | Path,
+    columns: Sequence[str],
+    batch_size: int = 65536,
+    filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield pandas batches of only `columns` from a Parquet file or a (hive-partitioned)
+    directory of shards, keeping rows that match `filters` (see ingest.parse_filters)."""
+    dataset = open_dataset(path)
+    expr = filter_expression(filters) if filters else None
+    for batch in dataset.to_batches(columns=list(columns), filter=expr, batch_size=batch_size):
+        if batch.num_rows:
+            yield arrow_to_pandas(batch)
+
+
+# ------------------------------
+# Pass 1: bounded sample
+# ------------------------------
+
+def sample_rows(
+    path: str | Path,
+    columns: Sequence[str],
+    n_sample: int = 50_000,
+    batch_size: int = 65536,
+    filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+    random_state: int = 0,
+) -> Tuple[pd.DataFrame, int]:
+    """Uniform sample (without replacement) of at most n_sample rows, in one pass.
+
+    Every row gets a random key and the n_sample smallest keys are kept
+    (bottom-k sampling), so memory is bounded by n_sample + batch_size rows
+    whatever the order of the shards. Returns (sample, total rows).
+    """
+    rng = np.random.default_rng(random_state)
+    sample = None
+    keys = np.empty(0)
+    n_rows = 0
+    for batch in iter_batches(path, columns, batch_size, filters):
+        n_rows += len(batch)
+        batch_keys = rng.random(len(batch))
+        if sample is None:
+            sample, keys = batch, batch_keys
+        else:
+            sample = pd.concat([sample, batch], ignore_index=True)
+            keys = np.concatenate([keys, batch_keys])
+        if len(sample) > n_sample:
+            keep = np.sort(np.argpartition(keys, n_sample)[:n_sample])
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+    if sample is None:
+        raise ValueError(f"No rows found in {path}")
+    return sample, n_rows
+
+
+def fit_preprocess_streaming(
+    config: Dict[str, Any],
+    path: str | Path,
+    batch_size: int = 65536,
+    filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+    n_sample: int = 50_000,
+) -> Tuple[Any, int, int]:
+    """Pass 1: fit build_pipeline()'s ColumnTransformer on a bounded uniform sample.
+
+    Returns (ct, n_rows, sample_rows).
+    """
+    sample, n_rows = sample_rows(path, input_columns(config), n_sample, batch_size, filters)
+    ct = _make_column_transformer(config)
+    ct.fit(sample)
+    return ct, n_rows, len(sample)
+
+
+# ------------------------------
+# Pass 2: SGD
+# ------------------------------
+
+def fit_streaming(
+    config: Dict[str, Any],
+    path: str | Path,
+    batch_size: int = 65536,
+    epochs: int = 5,
+    filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+    n_sample: int = 50_000,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Fit preprocess (on a sample of at most n_sample rows) + SGDRegressor over Parquet batches.
+
+    Returns
+    -------
+    (Pipeline, dict)
+        The fitted pipeline and a report (rows, sample rows, batches,
+        epochs, timings, largest transformed batch in bytes).
+    """
+    from sklearn.pipeline import Pipeline
+
+    target_col = config["target_col"]
+    model_conf = config.get("model", {})
+    if model_conf.get("type", "ridge").lower() != "sgd":
+        config = {**config, "model": {**model_conf, "type": "sgd"}}
+
+    t0 = time.perf_counter()
+    ct, n_rows, n_sampled = fit_preprocess_streaming(config, path, batch_size, filters, n_sample)
+    t_pass1 = time.perf_counter() - t0
+
+    ttr = _make_regressor(config)
+    # The first batch goes through TransformedTargetRegressor.fit (one epoch),
+    # every later batch through partial_fit on the same regressor_
+    ttr.set_params(regressor__max_iter=1, regressor__tol=None)
+    columns = list(ct.feature_names_in_) + [target_col]
+    n_batches = 0
+    max_batch_bytes = 0
+    for epoch in range(epochs):
+        for batch in iter_batches(path, columns, batch_size, filters):
+            y = batch[target_col].to_numpy(dtype=float)
+            Z = ct.transform(batch.drop(columns=[target_col]))
+            max_batch_bytes = max(max_batch_bytes, _nbytes(Z))
+            if not hasattr(ttr, "regressor_"):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")  # max_iter=1 "did not converge"
+                    ttr.fit(Z, y)
+            else:
+                ttr.regressor_.partial_fit(Z, ttr.func(y))
+            n_batches += 1
+    if not hasattr(ttr, "regressor_"):
+        raise ValueError(f"No rows found in {path}")
+
+    pipe = Pipeline(steps=[("preprocess", ct), ("model", ttr)])
+    report = {
+        "n_rows": int(n_rows),
+        "sample_rows": int(n_sampled),
+        "batch_size": int(batch_size),
+        "epochs": int(epochs),
+        "batches": int(n_batches),
+        "max_batch_matrix_bytes": int(max_batch_bytes),
+        "pass1_seconds": round(t_pass1, 3),
+        "total_seconds": round(time.perf_counter() - t0, 3),
+    }
+    return pipe, report
+
+
+def _nbytes(Z: Any) -> int:
+    if hasattr(Z, "indptr"):
+        return int(Z.data.nbytes + Z.indices.nbytes + Z.indptr.nbytes)
+    return int(np.asarray(Z).nbytes)
+
+
+def predict_streaming(
+    pipeline: Any,
+    path: str | Path,
+    target_col: str,
+    batch_size: int = 65536,
+    filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(y_true, y_pred) over all batches of a Parquet file/directory."""
+    columns = list(pipeline.named_steps["preprocess"].feature_names_in_) + [target_col]
+    ys: List[np.ndarray] = []
+    preds: List[np.ndarray] = []
+    for batch in iter_batches(path, columns, batch_size, filters):
+        ys.append(batch[target_col].to_numpy(dtype=float))
+        preds.append(pipeline.predict(batch.drop(columns=[target_col])))
+    if not ys:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(ys), np.concatenate(preds)
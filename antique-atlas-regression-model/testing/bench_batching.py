@@ -0,0 +1,80 @@
+"""
+bench_batching.py — Micro-batched /analyze vs one pipeline.predict per request.
+
+What it does
+------------
+- Fits build_pipeline() on a dataset (or loads a trained artifact).
+- Fires --requests concurrent one-item requests at a PredictionService
+  (serving/service.py) and times them, then checks every prediction matches
+  pipeline.predict on the same row.
+- Times the same requests served one pipeline.predict call each.
+- Prints the batch-size / queue-wait histograms the service recorded.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_batching \
+  --data antique-atlas-regression-model/swords.parquet --requests 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..serving.service import PredictionService, items_frame
+
+
+async def _burst(service: PredictionService, items: list) -> list:
+    return await asyncio.gather(*(service.analyze([item]) for item in items))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched serving vs per-request predict")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit/check")
+    parser.add_argument("--model", type=str, default=None, help="Optional trained artifact; fits a fresh pipeline if omitted")
+    parser.add_argument("--requests", type=int, default=500, help="Concurrent one-item requests")
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X = df.drop(columns=[target_col])
+    pipe = joblib.load(args.model) if args.model else build_pipeline(DEFAULT_CONFIG).fit(X, df[target_col])
+
+    # Items as the backend posts them (JSON round trip)
+    rows = json.loads(X.to_json(orient="records"))
+    idx = np.arange(args.requests) % len(rows)
+    items = [rows[i] for i in idx]
+    expected = pipe.predict(X)[idx]
+
+    service = PredictionService(pipe, args.max_batch_size, args.max_wait_ms)
+    t0 = time.perf_counter()
+    responses = asyncio.run(_burst(service, items))
+    t_batched = time.perf_counter() - t0
+    got = np.array([r[0]["predicted_price_usd"] for r in responses])
+    rel = float(np.max(np.abs(got - expected) / np.maximum(1e-9, np.abs(expected))))
+    print(f"[bench_batching] max relative difference vs pipeline.predict: {rel:.3e}")
+
+    columns = service.columns
+    t0 = time.perf_counter()
+    for item in items:
+        pipe.predict(items_frame([item], columns))
+    t_single = time.perf_counter() - t0
+
+    snap = service.registry.snapshot()
+    n_batches = int(snap["predict_batches_total"]["value"])
+    print(f"[bench_batching] {args.requests} requests, micro-batched: {t_batched * 1000:.1f} ms in {n_batches} predict calls")
+    print(f"[bench_batching] {args.requests} requests, one predict each: {t_single * 1000:.1f} ms")
+    print(f"[bench_batching] speedup: {t_single / max(t_batched, 1e-9):.1f}x")
+    print(service.metrics_text())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+bench_bulk.py — Time-to-first-result and peak memory of streamed bulk scoring.
+
+What it does
+------------
+- Fits build_pipeline() on a dataset (or loads a trained artifact).
+- For each auction size, feeds a JSON-array body in network-sized byte
+  chunks through serving/bulk.py (iter_items -> stream_predictions), like
+  POST /analyze/bulk, and records time to the first NDJSON block, total
+  time and the tracemalloc peak.
+- Does the same the buffered way (json.loads of the whole body, one
+  predict, one JSON array back) for comparison.
+- Checks the streamed predictions match pipeline.predict.
+- Malformed body: the largest size with one broken record in the middle
+  (--bad-at). The stream must end with its {"error": ...} line right after
+  the network chunk holding that record, not after the whole body, with the
+  items before it scored and memory bounded by a chunk.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_bulk \
+  --sizes 1000 10000 50000 --chunk-size 256
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator, List, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..serving.bulk import iter_items, stream_predictions
+from ..serving.service import PREDICTION_FIELD, PredictionService, items_frame
+
+
+def _body(rows: List[dict], n: int) -> Tuple[bytes, np.ndarray]:
+    idx = np.arange(n) % len(rows)
+    return json.dumps([rows[i] for i in idx]).encode("utf-8"), idx
+
+
+class _Reader:
+    """Body in network-sized chunks, counting the bytes handed out so far."""
+
+    def __init__(self, body: bytes, size: int) -> None:
+        self.body, self.size, self.read = body, size, 0
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.body), self.size):
+            self.read = min(len(self.body), start + self.size)
+            yield self.body[start:start + self.size]
+            await asyncio.sleep(0)  # let the consumer run, as a socket would
+
+
+async def _malformed(service: PredictionService, body: bytes, net_chunk: int, chunk_size: int) -> Tuple[int, dict, int]:
+    """(items scored, error line, body bytes read when the error line came)."""
+    reader = _Reader(body, net_chunk)
+    scored = 0
+    async for block in stream_predictions(service, iter_items(reader.chunks()), chunk_size):
+        for line in block.decode("utf-8").splitlines():
+            obj = json.loads(line)
+            if "error" in obj:
+                return scored, obj, reader.read
+            scored += 1
+    raise AssertionError("malformed body streamed without an error line")
+
+
+async def _streamed(service: PredictionService, body: bytes, net_chunk: int, chunk_size: int) -> Tuple[float, float, List[float]]:
+    t0 = time.perf_counter()
+    first = None
+    preds: List[float] = []
+    async for block in stream_predictions(service, iter_items(_Reader(body, net_chunk).chunks()), chunk_size):
+        if first is None:
+            first = time.perf_counter() - t0
+        preds += [json.loads(line)[PREDICTION_FIELD] for line in block.decode("utf-8").splitlines()]
+    return first or 0.0, time.perf_counter() - t0, preds
+
+
+def _buffered(pipe, columns: List[str], body: bytes) -> float:
+    t0 = time.perf_counter()
+    items = json.loads(body)
+    preds = pipe.predict(items_frame(items, columns))
+    json.dumps([{**it, PREDICTION_FIELD: float(p)} for it, p in zip(items, preds)])
+    return time.perf_counter() - t0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark streamed bulk scoring")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit/build bodies")
+    parser.add_argument("--model", type=str, default=None, help="Optional trained artifact; fits a fresh pipeline if omitted")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Items per bulk body")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Items per predict call")
+    parser.add_argument("--net-chunk", type=int, default=65536, help="Bytes per simulated network read")
+    parser.add_argument("--bad-at", type=float, default=0.1, help="Position (fraction of the largest body) of the malformed record")
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X = df.drop(columns=[target_col])
+    pipe = joblib.load(args.model) if args.model else build_pipeline(DEFAULT_CONFIG).fit(X, df[target_col])
+    rows = json.loads(X.to_json(orient="records"))
+    expected_all = pipe.predict(X)
+
+    for n in args.sizes:
+        body, idx = _body(rows, n)
+        service = PredictionService(pipe, max_batch_size=args.chunk_size, max_wait_ms=0.0)
+
+        tracemalloc.start()
+        first, total, preds = asyncio.run(_streamed(service, body, args.net_chunk, args.chunk_size))
+        _, peak_stream = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        expected = expected_all[idx]
+        rel = float(np.max(np.abs(np.asarray(preds) - expected) / np.maximum(1e-9, np.abs(expected))))
+
+        tracemalloc.start()
+        t_buffered = _buffered(pipe, service.columns, body)
+        _, peak_buffered = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"[bench_bulk] n={n:>7}  streamed: first result {first * 1000:7.1f} ms, total {total * 1000:8.1f} ms, "
+            f"peak {peak_stream / 2**20:7.1f} MiB  |  buffered: total {t_buffered * 1000:8.1f} ms, "
+            f"peak {peak_buffered / 2**20:7.1f} MiB  |  max rel diff {rel:.1e}"
+        )
+
+    # One broken record among valid ones: the error must not wait for the rest of the body
+    n = max(args.sizes)
+    k = int(n * args.bad_at)
+    head, _ = _body(rows, k)
+    tail, _ = _body(rows, n - k)
+    body = head[:-1] + b', {"broken": }, ' + tail[1:]
+    service = PredictionService(pipe, max_batch_size=args.chunk_size, max_wait_ms=0.0)
+    tracemalloc.start()
+    scored, error, read = asyncio.run(_malformed(service, body, args.net_chunk, args.chunk_size))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bad_offset = len(head) + 1
+    ok = scored == k and error["index"] == k and read < bad_offset + 2 * args.net_chunk
+    print(
+        f"[bench_bulk] malformed record at item {k} of {n}: {scored} items scored, error line after "
+        f"{read / 2**20:.2f} of {len(body) / 2**20:.2f} MiB read, peak {peak / 2**20:.1f} MiB  "
+        f"({'OK' if ok else 'FAIL'}: {error['error']})"
+    )
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
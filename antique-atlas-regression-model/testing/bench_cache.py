@@ -0,0 +1,131 @@
+"""
+bench_cache.py — Prediction cache hit rates and latency on refresh traffic.
+
+What it does
+------------
+- Fits build_pipeline() on a dataset (or loads a trained artifact).
+- Builds "refresh" traffic: --requests requests of --items-per-request lots
+  drawn from a pool of --lots distinct lots; half of the repeats arrive as
+  variants the cache must treat as the same lot (materials reordered,
+  recased and duplicated, extra fields) and the pipeline must score the same.
+- Serves the traffic through PredictionService with and without a
+  PredictionCache (serving/cache.py) and compares time and predictions.
+- Serves it again from a second service (fresh memory tier, same SQLite
+  file) as another worker process would, then rebinds to a new model
+  version to show invalidation.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_cache \
+  --requests 400 --items-per-request 25 --lots 300
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..serving.cache import PredictionCache
+from ..serving.metrics import MetricsRegistry
+from ..serving.service import PredictionService
+
+_LIST_FIELDS = ("material", "makerWorkshop", "provenance")
+
+
+def _variant(item: dict, rng: random.Random) -> dict:
+    """Same lot as the backend may re-post it: list order/case/duplicates and extra fields differ."""
+    out = {**item, "lotId": rng.randrange(10**6), "viewedAt": time.time()}
+    for field in _LIST_FIELDS:
+        tokens = out.get(field)
+        if isinstance(tokens, list) and tokens:
+            tokens = [t.upper() if rng.random() < 0.5 else f" {t} " for t in tokens] + tokens[:1]
+            rng.shuffle(tokens)
+            out[field] = tokens
+    return out
+
+
+def _traffic(rows: List[dict], args: argparse.Namespace) -> List[List[dict]]:
+    rng = random.Random(0)
+    pool = rows[:args.lots]
+    requests = []
+    for _ in range(args.requests):
+        lots = [pool[rng.randrange(len(pool))] for _ in range(args.items_per_request)]
+        requests.append([_variant(lot, rng) if rng.random() < 0.5 else lot for lot in lots])
+    return requests
+
+
+async def _serve(service: PredictionService, requests: List[List[dict]]) -> Tuple[float, np.ndarray]:
+    t0 = time.perf_counter()
+    preds = []
+    for items in requests:
+        preds += await service.predict(items)
+    elapsed = time.perf_counter() - t0
+    await service.close()
+    return elapsed, np.asarray(preds)
+
+
+def _report(label: str, elapsed: float, cache: PredictionCache) -> None:
+    info = cache.info()
+    print(
+        f"[bench_cache] {label:<28} {elapsed * 1000:8.1f} ms  hit rate {info['hit_rate']:6.1%}  "
+        f"(memory {info['memory_hits']}, disk {info['disk_hits']}, misses {info['misses']})"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the prediction cache on repeated-lot traffic")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit/build lots")
+    parser.add_argument("--model", type=str, default=None, help="Optional trained artifact; fits a fresh pipeline if omitted")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--items-per-request", type=int, default=25)
+    parser.add_argument("--lots", type=int, default=300, help="Distinct lots the traffic draws from (at most the dataset rows)")
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X = df.drop(columns=[target_col])
+    pipe = joblib.load(args.model) if args.model else build_pipeline(DEFAULT_CONFIG).fit(X, df[target_col])
+    rows = json.loads(X.to_json(orient="records"))
+    requests = _traffic(rows, args)
+    n_items = sum(len(r) for r in requests)
+    print(f"[bench_cache] {args.requests} requests, {n_items} items over {min(args.lots, len(rows))} lots")
+
+    t_plain, expected = asyncio.run(_serve(PredictionService(pipe, max_wait_ms=0.0), requests))
+    print(f"[bench_cache] {'no cache':<28} {t_plain * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "cache.sqlite"
+        version = "bench-v1"
+
+        cache = PredictionCache(path=db, registry=MetricsRegistry())
+        t_cached, got = asyncio.run(_serve(PredictionService(pipe, max_wait_ms=0.0, cache=cache, version=version), requests))
+        _report("memory + SQLite, cold", t_cached, cache)
+        rel = float(np.max(np.abs(got - expected) / np.maximum(1e-9, np.abs(expected))))
+        print(f"[bench_cache] max relative difference vs uncached: {rel:.1e}")
+
+        # Another worker process: empty memory tier, same SQLite file
+        other = PredictionCache(path=db, registry=MetricsRegistry())
+        t_other, got = asyncio.run(_serve(PredictionService(pipe, max_wait_ms=0.0, cache=other, version=version), requests))
+        _report("second worker (SQLite warm)", t_other, other)
+        assert np.allclose(got, expected, rtol=1e-12)
+
+        # A new artifact: every entry of the old version is dropped
+        fresh = PredictionCache(path=db, registry=MetricsRegistry())
+        t_new, _ = asyncio.run(_serve(PredictionService(pipe, max_wait_ms=0.0, cache=fresh, version="bench-v2"), requests[:1]))
+        _report("new version, first request", t_new, fresh)
+
+    print(f"[bench_cache] speedup (cold cache vs none): {t_plain / max(t_cached, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
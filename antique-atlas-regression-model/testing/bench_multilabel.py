@@ -0,0 +1,159 @@
+"""
+bench_multilabel.py — Benchmark the vectorized MultiLabelBinarizerTransformer
+against the original row-at-a-time loop.
+
+What it does
+------------
+- Generates a synthetic multi-label column (mixed case / padded tokens, None,
+  NaN, bare strings, duplicates within a row) at each requested size.
+- Times fit + transform for the current transformer and for the legacy loop
+  (kept here verbatim as the reference implementation).
+- Checks that both produce identical output (dense and CSR) before timing.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_multilabel --sizes 1000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+
+from ..transformers.multilabel_binarizer import (
+    MultiLabelBinarizerTransformer,
+    _as_token_set,
+    _default_normalizer,
+)
+
+
+# ------------------------------
+# Legacy reference (pre-vectorization loop)
+# ------------------------------
+
+def _legacy_fit(X: Sequence[object], top_k: Optional[int], normalizer: Callable[[str], str]) -> List[str]:
+    token_counts: Dict[str, int] = {}
+    for value in X:
+        for t in _as_token_set(value, normalizer):
+            token_counts[t] = token_counts.get(t, 0) + 1
+    sorted_tokens = sorted(token_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [t for t, _ in sorted_tokens[: max(0, top_k or len(sorted_tokens))]]
+
+
+def _legacy_transform(X: Sequence[object], vocabulary: List[str], normalizer: Callable[[str], str], sparse_output: bool):
+    vocab_index = {t: i for i, t in enumerate(vocabulary)}
+    n_features = len(vocabulary) + 1
+    other_idx = len(vocabulary)
+    if sparse_output:
+        indptr = [0]
+        indices: List[int] = []
+        for value in X:
+            row_indices: Set[int] = set()
+            for t in _as_token_set(value, normalizer):
+                j = vocab_index.get(t)
+                row_indices.add(other_idx if j is None else j)
+            indices.extend(sorted(row_indices))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.uint8)
+        return sp.csr_matrix((data, np.array(indices), np.array(indptr)), shape=(len(X), n_features))
+
+    arr = np.zeros((len(X), n_features), dtype=np.uint8)
+    for i, value in enumerate(X):
+        other_flag = 0
+        for t in _as_token_set(value, normalizer):
+            j = vocab_index.get(t)
+            if j is not None:
+                arr[i, j] = 1
+            else:
+                other_flag = 1
+        if other_flag:
+            arr[i, other_idx] = 1
+    return arr
+
+
+# ------------------------------
+# Data generation
+# ------------------------------
+
+def make_column(n_rows: int, n_tokens: int = 400, seed: int = 0) -> pd.Series:
+    """Synthetic list column with realistic repetition and messy values."""
+    rng = np.random.default_rng(seed)
+    base = [f"token {i}" for i in range(n_tokens)]
+    variants = base + [t.upper() for t in base[:50]] + [f"  {t} " for t in base[:50]]
+    # Zipf-ish popularity so a few hundred strings dominate
+    weights = 1.0 / np.arange(1, len(variants) + 1)
+    weights /= weights.sum()
+
+    sizes = rng.integers(0, 5, size=n_rows)
+    picks = rng.choice(len(variants), size=int(sizes.sum()), p=weights)
+    cells: List[object] = []
+    pos = 0
+    for i, k in enumerate(sizes):
+        row = [variants[j] for j in picks[pos:pos + k]]
+        pos += k
+        if i % 97 == 0:
+            cells.append(None)
+        elif i % 89 == 0:
+            cells.append(np.nan)
+        elif i % 83 == 0 and row:
+            cells.append(row[0])  # bare string
+        else:
+            cells.append(np.array(row, dtype=object))  # as produced by pd.read_parquet
+    return pd.Series(cells, dtype=object)
+
+
+def _check_identical(X: pd.Series, top_k: int) -> None:
+    vocab = _legacy_fit(X, top_k, _default_normalizer)
+    tf = MultiLabelBinarizerTransformer("f", top_k=top_k).fit(X)
+    assert list(tf.vocabulary_) == vocab, "vocabulary mismatch"
+    dense = tf.transform(X).to_numpy()
+    assert np.array_equal(dense, _legacy_transform(X, vocab, _default_normalizer, False)), "dense mismatch"
+    tf_sp = MultiLabelBinarizerTransformer("f", top_k=top_k, sparse_output=True).fit(X)
+    a = tf_sp.transform(X)
+    b = _legacy_transform(X, vocab, _default_normalizer, True)
+    assert np.array_equal(a.indptr, b.indptr) and np.array_equal(a.indices, b.indices), "csr mismatch"
+
+
+def _time(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vectorized vs legacy multi-label binarization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000], help="Row counts to benchmark")
+    parser.add_argument("--top-k", type=int, default=30, help="Vocabulary size")
+    parser.add_argument("--sparse", action="store_true", help="Benchmark the CSR path instead of the dense path")
+    parser.add_argument("--repeats", type=int, default=3, help="Best-of-N timing repeats")
+    args = parser.parse_args(argv)
+
+    _check_identical(make_column(5_000, seed=1), args.top_k)
+
+    print(f"{'rows':>10} {'legacy fit+tf (s)':>18} {'vectorized (s)':>15} {'speedup':>8}")
+    for n in args.sizes:
+        X = make_column(n)
+        repeats = 1 if n >= 1_000_000 else args.repeats
+
+        def legacy() -> None:
+            vocab = _legacy_fit(X, args.top_k, _default_normalizer)
+            _legacy_transform(X, vocab, _default_normalizer, args.sparse)
+
+        def vectorized() -> None:
+            tf = MultiLabelBinarizerTransformer("f", top_k=args.top_k, sparse_output=args.sparse)
+            tf.fit(X).transform(X)
+
+        t_old = _time(legacy, repeats)
+        t_new = _time(vectorized, repeats)
+        print(f"{n:>10} {t_old:>18.4f} {t_new:>15.4f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
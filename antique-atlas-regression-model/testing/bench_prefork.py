@@ -0,0 +1,147 @@
+"""
+bench_prefork.py — Memory and throughput of forked workers sharing one model.
+
+What it does
+------------
+- Fits build_pipeline() on a dataset (or uses --model), writes it and its
+  scoring bundle to a temporary directory.
+- For each mode and each worker count in --workers, starts the workers the
+  way serving/prefork.py does (fork from a loaded parent) or, for
+  comparison, as independent processes that each load the artifact:
+    shared+freeze   parent loads the pipeline, gc.freeze(), fork
+    shared          same without gc.freeze()
+    independent     fresh interpreters (spawn, like uvicorn --workers) that
+                    import everything and load the joblib artifact themselves
+    bundle          parent loads the memory-mapped scoring bundle, fork
+- Every worker runs --rounds predict calls of --batch items (released
+  together), then the parent reads its /proc smaps_rollup.
+- Prints aggregate items/s (and speedup over one worker) plus the mean
+  per-worker RSS / USS and the summed PSS of the workers.
+
+Throughput can only scale up to the number of CPUs the box has (printed).
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_prefork \
+  --workers 1 2 4 --rounds 50 --batch 64
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+
+from ..bundle import save_bundle
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..serving.prefork import memory_usage
+from ..serving.service import PredictionService
+
+MODES = ("shared+freeze", "shared", "independent", "bundle")
+
+
+# Set in the parent before forking; inherited by the fork-mode workers
+_SHARED: Optional[PredictionService] = None
+
+
+def _load(mode: str, artifact: Path) -> PredictionService:
+    if mode == "bundle":
+        return PredictionService.from_bundle(artifact)
+    return PredictionService.from_artifact(artifact)
+
+
+def _worker(mode: str, artifact: Path, batch: List[dict], rounds: int, go: Any, release: Any, conn: Any) -> None:
+    svc = _SHARED if _SHARED is not None else _load(mode, artifact)
+    svc.predict_items(batch)  # warm-up
+    conn.send(None)  # ready
+    go.wait()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        svc.predict_items(batch)
+    conn.send(time.perf_counter() - t0)
+    release.wait()  # keep the pages mapped until the parent has read /proc
+
+
+def _measure(mode: str, n_workers: int, artifact: Path, batch: List[dict], rounds: int) -> Dict[str, float]:
+    global _SHARED
+    # independent: fresh interpreters that import and load everything themselves
+    ctx = multiprocessing.get_context("spawn" if mode == "independent" else "fork")
+    if mode != "independent":
+        _SHARED = _load(mode, artifact)
+        if mode != "shared":
+            gc.collect()
+            gc.freeze()
+    go, release = ctx.Event(), ctx.Event()
+    workers = []
+    for _ in range(n_workers):
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_worker, args=(mode, artifact, batch, rounds, go, release, child_conn))
+        proc.start()
+        workers.append((proc, parent_conn))
+
+    for _, conn in workers:
+        conn.recv()  # every worker loaded and warmed up
+    go.set()
+    elapsed = [conn.recv() for _, conn in workers]
+    mem = [memory_usage(proc.pid) for proc, _ in workers]
+    release.set()
+    for proc, _ in workers:
+        proc.join()
+    _SHARED = None
+    gc.unfreeze()
+    gc.collect()
+
+    return {
+        "items_per_s": n_workers * rounds * len(batch) / max(elapsed),
+        "rss": sum(m["rss"] for m in mem) / n_workers / 1024,
+        "uss": sum(m["uss"] for m in mem) / n_workers / 1024,
+        "pss": sum(m["pss"] for m in mem) / 1024,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pre-forked workers sharing one loaded model")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit/build batches")
+    parser.add_argument("--model", type=str, default=None, help="Optional trained artifact; fits a fresh pipeline if omitted")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rounds", type=int, default=50, help="Predict calls per worker")
+    parser.add_argument("--batch", type=int, default=64, help="Items per predict call")
+    parser.add_argument("--modes", type=str, nargs="+", default=list(MODES), choices=MODES)
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X = df.drop(columns=[target_col])
+    pipe = joblib.load(args.model) if args.model else build_pipeline(DEFAULT_CONFIG).fit(X, df[target_col])
+    rows = json.loads(X.to_json(orient="records"))
+    batch = [rows[i % len(rows)] for i in range(args.batch)]
+    print(f"[bench_prefork] CPUs available: {len(os.sched_getaffinity(0))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = Path(tmp) / "pipeline.joblib"
+        joblib.dump(pipe, artifact)
+        save_bundle(pipe, artifact)
+        del pipe
+        gc.collect()
+        for mode in args.modes:
+            base = None
+            for n in args.workers:
+                r = _measure(mode, n, artifact, batch, args.rounds)
+                base = base or r["items_per_s"]
+                print(
+                    f"[bench_prefork] {mode:<13} workers={n:<2}  {r['items_per_s']:9.0f} items/s "
+                    f"({r['items_per_s'] / base:4.2f}x)  per worker RSS {r['rss']:6.1f} USS {r['uss']:6.1f} MiB  "
+                    f"workers' PSS {r['pss']:6.1f} MiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
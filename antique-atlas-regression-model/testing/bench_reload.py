@@ -0,0 +1,179 @@
+"""
+bench_reload.py — Hot reload under load: latency, errors and bad artifacts.
+
+What it does
+------------
+- Fits two different pipelines (A: ridge, B: lasso) and serves A from an
+  artifact in a temporary directory through PredictionService, watched by a
+  ModelHolder (serving/reload.py).
+- Keeps --clients concurrent clients calling analyze() the whole time,
+  while the artifact is replaced by, in turn:
+    B (written atomically), a corrupt file, an unfitted pipeline, a
+    partially written copy of A that is completed later, and finally a
+    deploy through a pointer file.
+- Checks after each step which model answers, that no request failed, and
+  that a bulk stream started before a swap is scored entirely by the model
+  it started on.
+- Prints request latency percentiles and the reload metrics.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_reload --clients 16
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..serving.bulk import stream_predictions
+from ..serving.reload import ModelHolder
+from ..serving.service import PredictionService
+
+
+def _fit(X: pd.DataFrame, y: pd.Series, model_type: str):
+    config = {**DEFAULT_CONFIG, "model": {**DEFAULT_CONFIG["model"], "type": model_type}}
+    return build_pipeline(config).fit(X, y)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+async def _items(rows: List[dict]):
+    for row in rows:
+        await asyncio.sleep(0.01)  # a slow client: the stream outlives the swap
+        yield row
+
+
+async def _run(args: argparse.Namespace, X: pd.DataFrame, rows: List[dict], pipes: dict, tmp: Path) -> None:
+    blobs = {}
+    for name, pipe in pipes.items():
+        p = tmp / f"{name}.joblib"
+        joblib.dump(pipe, p)
+        blobs[name] = p.read_bytes()
+    expected = {name: pipe.predict(X) for name, pipe in pipes.items()}
+    probe = rows[:5]
+
+    artifact = tmp / "pipeline.joblib"
+    artifact.write_bytes(blobs["A"])
+    service = PredictionService.from_artifact(artifact, max_wait_ms=2.0)
+    holder = ModelHolder(service, artifact, poll_seconds=args.poll_seconds)
+    holder.start()
+
+    latencies: List[float] = []
+    errors: List[BaseException] = []
+    stop = asyncio.Event()
+
+    async def client(k: int) -> None:
+        i = k
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                await service.analyze([rows[i % len(rows)]])
+            except Exception as exc:  # counted, never expected
+                errors.append(exc)
+            latencies.append(time.perf_counter() - t0)
+            i += args.clients
+
+    async def serving(name: str) -> bool:
+        got = await service.predict(probe)
+        return bool(np.allclose(got, expected[name][:5], rtol=1e-9))
+
+    async def settle() -> None:
+        await asyncio.sleep(args.poll_seconds * 3 + 0.5)
+
+    clients = [asyncio.create_task(client(k)) for k in range(args.clients)]
+    await asyncio.sleep(0.5)
+
+    # A bulk stream that starts on A and is still running when B arrives
+    bulk = asyncio.create_task(_collect(stream_predictions(service, _items(rows), 8)))
+    await asyncio.sleep(0.05)
+
+    _write_atomic(artifact, blobs["B"])
+    await settle()
+    print(f"[bench_reload] good artifact B:        serving B = {await serving('B')}")
+    bulk_preds = await bulk
+    print(f"[bench_reload] bulk stream begun on A: all {len(bulk_preds)} items scored by A = "
+          f"{bool(np.allclose(bulk_preds, expected['A'], rtol=1e-9))}")
+
+    _write_atomic(artifact, b"not a pickle")
+    await settle()
+    print(f"[bench_reload] corrupt file:           still B = {await serving('B')}")
+
+    joblib.dump(build_pipeline(DEFAULT_CONFIG), tmp / "unfitted.joblib")
+    _write_atomic(artifact, (tmp / "unfitted.joblib").read_bytes())
+    await settle()
+    print(f"[bench_reload] unfitted pipeline:      still B = {await serving('B')}")
+
+    # Non-atomic write, as a plain joblib.dump does: half now, the rest later
+    half = len(blobs["A"]) // 2
+    with open(artifact, "wb") as f:
+        f.write(blobs["A"][:half])
+        f.flush()
+        await settle()
+        print(f"[bench_reload] half-written A:         still B = {await serving('B')}")
+        f.write(blobs["A"][half:])
+    await settle()
+    print(f"[bench_reload] completed A:            serving A = {await serving('A')}")
+
+    # Pointer deploys: a new holder watching pointer -> versioned artifacts
+    await holder.stop()
+    pointer = tmp / "CURRENT"
+    pointer.write_text("B.joblib\n", encoding="utf-8")
+    holder = ModelHolder(service, pointer=pointer, poll_seconds=args.poll_seconds)
+    holder.start()
+    await settle()
+    print(f"[bench_reload] pointer -> B.joblib:    serving B = {await serving('B')}")
+
+    stop.set()
+    await asyncio.gather(*clients)
+    await holder.stop()
+    await service.close()
+
+    lat = np.asarray(latencies) * 1000
+    snap = service.registry.snapshot()
+    print(f"[bench_reload] {len(lat)} requests, {len(errors)} errors; latency p50 {np.percentile(lat, 50):.1f} ms, "
+          f"p99 {np.percentile(lat, 99):.1f} ms, max {lat.max():.1f} ms")
+    print(f"[bench_reload] reloads {int(snap['model_reloads_total']['value'])}, "
+          f"failures {int(snap['model_reload_failures_total']['value'])}, "
+          f"mean reload {snap['model_reload_seconds']['sum'] / max(1, snap['model_reload_seconds']['count']) * 1000:.0f} ms")
+
+
+async def _collect(blocks) -> List[float]:
+    preds: List[float] = []
+    async for block in blocks:
+        preds += [json.loads(line)["predicted_price_usd"] for line in block.decode("utf-8").splitlines()]
+    return preds
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark hot model reload under load")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit the models")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients during the reloads")
+    parser.add_argument("--poll-seconds", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X, y = df.drop(columns=[target_col]), df[target_col]
+    pipes = {"A": _fit(X, y, "ridge"), "B": _fit(X, y, "lasso")}
+    rows = json.loads(X.to_json(orient="records"))
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_run(args, X, rows, pipes, Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+bench_scoring.py — Compare the compiled LinearScorer with pipeline.predict.
+
+What it does
+------------
+- Fits build_pipeline() on a dataset (or loads a trained artifact).
+- Compiles it with scoring.compile_scoring_table().
+- Checks the scorer matches pipeline.predict on every row (as item dicts).
+- Reports single-item latency for both paths.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_scoring \
+  --data antique-atlas-regression-model/swords.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+from ..scoring import LinearScorer
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark compiled scoring vs pipeline.predict")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) used to fit/check")
+    parser.add_argument("--model", type=str, default=None, help="Optional trained artifact; fits a fresh pipeline if omitted")
+    parser.add_argument("--iterations", type=int, default=2000, help="Single-item predictions to time")
+    args = parser.parse_args(argv)
+
+    target_col = DEFAULT_CONFIG["target_col"]
+    df = pd.read_parquet(args.data)
+    X = df.drop(columns=[target_col])
+    if args.model:
+        pipe = joblib.load(args.model)
+    else:
+        pipe = build_pipeline(DEFAULT_CONFIG).fit(X, df[target_col])
+
+    scorer = LinearScorer.from_pipeline(pipe)
+    items = X.to_dict("records")
+    expected = pipe.predict(X)
+    got = scorer.predict(items)
+    rel = float(np.max(np.abs(got - expected) / np.maximum(1e-9, np.abs(expected))))
+    print(f"[bench_scoring] max relative difference vs pipeline.predict: {rel:.3e}")
+
+    item = items[0]
+    one_row = X.iloc[[0]]
+    n_pipe = max(1, args.iterations // 100)
+
+    t0 = time.perf_counter()
+    for _ in range(n_pipe):
+        pipe.predict(one_row)
+    t_pipe = (time.perf_counter() - t0) / n_pipe
+
+    t0 = time.perf_counter()
+    for _ in range(args.iterations):
+        scorer.predict_one(item)
+    t_scorer = (time.perf_counter() - t0) / args.iterations
+
+    print(f"[bench_scoring] pipeline.predict (1 row): {t_pipe * 1e6:10.1f} us")
+    print(f"[bench_scoring] LinearScorer.predict_one: {t_scorer * 1e6:10.1f} us  ({t_pipe / t_scorer:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+bench_sparse_scaling.py — Sparse/hashed ridge fit time and memory as rows grow.
+
+What it does
+------------
+- Grows the sword dataset to each size in --rows by resampling its lots and
+  giving every lot its own maker / provenance tokens (a realistic long tail:
+  the vocabulary grows with the rows).
+- Fits build_pipeline() with every multi-label field hashed into
+  --n-features columns (sparse end to end) and, with --compare, the same
+  design with RidgeCV's eigen GCV (the previous sparse alpha search, which
+  forms a dense n x n Gram matrix) up to --compare-max-rows rows.
+- Each fit runs in a forked child; prints wall time, the growth of the
+  child's peak RSS during the fit, the design's non-zeros, the chosen alpha
+  and the train RMSE on log1p(price).
+- With --full, also times the whole hashed pipeline as train.py runs it
+  (hashing + model fit from the raw frame), predict throughput and the
+  pickled artifact size.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_sparse_scaling \
+  --rows 2000 6000 20000 100000 --compare --full
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import pickle
+import resource
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from ..pipeline import DEFAULT_CONFIG, build_pipeline
+
+
+def hashed_config(n_features: int) -> Dict[str, Any]:
+    """DEFAULT_CONFIG with every multi-label field hashed (implies sparse)."""
+    multi = {name: {"mode": "hash", "n_features": n_features} for name in DEFAULT_CONFIG["multi_categorical_cols"]}
+    return {**DEFAULT_CONFIG, "multi_categorical_cols": multi}
+
+
+def grow(df: pd.DataFrame, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Resampled lots with per-lot long-tail maker/provenance tokens and jittered prices."""
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), size=n_rows)].reset_index(drop=True)
+    makers = rng.zipf(1.3, size=n_rows) % max(1, n_rows // 2)
+    out["makerWorkshop"] = [list(m) + [f"workshop {k}"] for m, k in zip(out["makerWorkshop"], makers)]
+    out["provenance"] = [list(p) + [f"collection {i}"] for i, p in enumerate(out["provenance"])]
+    out[DEFAULT_CONFIG["target_col"]] = (out[DEFAULT_CONFIG["target_col"]] * rng.lognormal(0, 0.3, size=n_rows)).round()
+    return out
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm", "r") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def _fit(df: pd.DataFrame, config: Dict[str, Any], eigen: bool, conn: Any) -> None:
+    from sklearn.linear_model import RidgeCV
+
+    target_col = config["target_col"]
+    X, y = df.drop(columns=[target_col]), df[target_col]
+    pipe = build_pipeline(config)
+    if eigen:
+        pipe.set_params(model__regressor=RidgeCV(alphas=config["model"]["alphas"], gcv_mode="eigen"))
+    Z = pipe.named_steps["preprocess"].fit_transform(X)
+    base = _rss_bytes()
+    t0 = time.perf_counter()
+    pipe.named_steps["model"].fit(Z, y)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    reg = pipe.named_steps["model"].regressor_
+    resid = np.log1p(y.to_numpy()) - np.log1p(pipe.named_steps["model"].predict(Z))
+    conn.send({
+        "seconds": elapsed,
+        "peak_growth": max(0, peak - base),
+        "nnz": int(Z.nnz),
+        "shape": Z.shape,
+        "alpha": float(reg.alpha_),
+        "rmse": float(np.sqrt(np.mean(resid ** 2))),
+    })
+
+
+def _fit_full(df: pd.DataFrame, config: Dict[str, Any], conn: Any) -> None:
+    target_col = config["target_col"]
+    X, y = df.drop(columns=[target_col]), df[target_col]
+    base = _rss_bytes()
+    t0 = time.perf_counter()
+    pipe = build_pipeline(config).fit(X, y)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    t0 = time.perf_counter()
+    pipe.predict(X)
+    conn.send({
+        "seconds": elapsed,
+        "peak_growth": max(0, peak - base),
+        "predict_per_s": len(X) / (time.perf_counter() - t0),
+        "artifact_bytes": len(pickle.dumps(pipe)),
+    })
+
+
+def _run(target: Any, *args: Any) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("fork")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=target, args=(*args, child_conn))
+    proc.start()
+    result = parent_conn.recv()
+    proc.join()
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sparse/hashed ridge fits as the row count grows")
+    parser.add_argument("--data", type=str, default="antique-atlas-regression-model/swords.parquet", help="Dataset (.parquet) the rows are resampled from")
+    parser.add_argument("--rows", type=int, nargs="+", default=[2000, 6000, 20000, 100000])
+    parser.add_argument("--n-features", type=int, default=2**18, help="Hashed columns per multi-label field")
+    parser.add_argument("--compare", action="store_true", help="Also fit with RidgeCV eigen GCV (the previous sparse path)")
+    parser.add_argument("--compare-max-rows", type=int, default=6000, help="Largest size fitted with eigen GCV")
+    parser.add_argument("--full", action="store_true", help="Also fit the whole hashed pipeline from the raw frame")
+    args = parser.parse_args(argv)
+
+    df = pd.read_parquet(args.data)
+    config = hashed_config(args.n_features)
+    for n in args.rows:
+        data = grow(df, n)
+        runs = [("kfold sparse_cg", False)]
+        if args.compare and n <= args.compare_max_rows:
+            runs.append(("eigen GCV", True))
+        for label, eigen in runs:
+            r = _run(_fit, data, config, eigen)
+            print(
+                f"[bench_sparse_scaling] rows={n:<7} {label:<16} {r['seconds']:8.2f} s  "
+                f"peak RSS +{r['peak_growth'] / 2**20:7.1f} MiB  X {r['shape'][0]}x{r['shape'][1]} "
+                f"nnz={r['nnz']:<8} alpha={r['alpha']:<6g} train RMSE(log)={r['rmse']:.4f}"
+            )
+        if args.full:
+            r = _run(_fit_full, data, config)
+            print(
+                f"[bench_sparse_scaling] rows={n:<7} {'full pipeline':<16} {r['seconds']:8.2f} s  "
+                f"peak RSS +{r['peak_growth'] / 2**20:7.1f} MiB  predict {r['predict_per_s']:9.0f} rows/s  "
+                f"artifact {r['artifact_bytes'] / 2**20:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
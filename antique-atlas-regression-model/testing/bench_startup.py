@@ -0,0 +1,114 @@
+"""
+bench_startup.py — Import-time budget for the model package.
+
+What it does
+------------
+- Imports each light entry module (scoring, bundle, pipeline, train, evaluate,
+  explain, tune, incremental) in a fresh interpreter under `python -X importtime`.
+- Fails if any of them pulls in a heavy dependency (pandas, sklearn, scipy,
+  joblib, pyarrow) at import time, or if its total import time exceeds the
+  budget.
+- Times `<cli> --help` end to end, which must also stay light (argument
+  parsing runs before any heavy import).
+
+Workers are spawned on demand, so this import time is part of request latency.
+Exits with status 1 when the budget is exceeded.
+
+Usage (from the repository root)
+--------------------------------
+python -m antique-atlas-regression-model.testing.bench_startup --budget-ms 300
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE = PACKAGE_DIR.name
+REPO_ROOT = PACKAGE_DIR.parent
+
+LIGHT_MODULES = ["parsing", "scoring", "bundle", "compaction", "ingest", "pipeline", "train", "evaluate", "explain", "tune", "incremental", "serving.app", "serving.prefork"]
+CLI_MODULES = ["train", "evaluate", "explain", "tune", "incremental", "compaction", "ingest", "serving.app", "serving.prefork"]
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "joblib", "pyarrow"]
+
+# A lazy_import()ed module sits in sys.modules as an unexecuted _LazyModule;
+# only its type may be inspected (any attribute access would execute it)
+_PROBE = (
+    "import importlib, sys; importlib.import_module({module!r}); "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules and "
+    "type(sys.modules[m]).__name__ != '_LazyModule'))"
+)
+
+
+def _parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Total self time (ms) and cumulative time per top-level module (ms)."""
+    total_us = 0
+    top: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        if not name.startswith("  ", 1):  # depth 0: one leading space only
+            top[name.strip()] = int(cumulative_us) / 1000.0
+    return total_us / 1000.0, top
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """Import `module` in a fresh interpreter; return (total ms, top-level ms, heavy modules loaded)."""
+    code = _PROBE.format(module=f"{PACKAGE}.{module}", heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    total_ms, top = _parse_importtime(proc.stderr)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_ms, top, loaded
+
+
+def measure_help(module: str) -> float:
+    """Wall time (ms) of `python -m <package>.<module> --help`."""
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", f"{PACKAGE}.{module}", "--help"],
+        cwd=REPO_ROOT, capture_output=True, check=True,
+    )
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Check import-time budget of the model package")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Maximum import time per module (sum of -X importtime self times)")
+    parser.add_argument("--help-budget-ms", type=float, default=500.0, help="Maximum wall time of `<cli> --help`")
+    parser.add_argument("--top", type=int, default=3, help="Slowest top-level imports to list per module")
+    args = parser.parse_args(argv)
+
+    failures: List[str] = []
+    for module in LIGHT_MODULES:
+        total_ms, top, loaded = measure_import(module)
+        slowest = ", ".join(f"{n} {ms:.0f}ms" for n, ms in sorted(top.items(), key=lambda kv: -kv[1])[: args.top])
+        print(f"[bench_startup] import {module:<9} {total_ms:8.1f} ms   ({slowest})")
+        if loaded:
+            failures.append(f"import {module} loads heavy modules: {', '.join(loaded)}")
+        if total_ms > args.budget_ms:
+            failures.append(f"import {module} took {total_ms:.1f} ms > budget {args.budget_ms:.0f} ms")
+
+    for module in CLI_MODULES:
+        wall_ms = measure_help(module)
+        print(f"[bench_startup] {module:<9} --help {wall_ms:8.1f} ms (wall)")
+        if wall_ms > args.help_budget_ms:
+            failures.append(f"{module} --help took {wall_ms:.1f} ms > budget {args.help_budget_ms:.0f} ms")
+
+    if failures:
+        for msg in failures:
+            print(f"[bench_startup] FAIL: {msg}")
+        sys.exit(1)
+    print("[bench_startup] OK: within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,24 @@ train.py — Train the swords valuation pipeline and persist artifacts.
 
 What it does
 ------------
-- Loads training and (optionally) validation data from /data.
+- Loads training and (optionally) validation data from /data: .csv, .parquet or
+  a Parquet dataset directory written by ingest.py (only the configured columns
+  are read; --filter rows are selected by predicate pushdown).
 - Builds the preprocessing+regression pipeline from pipeline.py.
 - Fits on train; evaluates on val (or a split from train if val not supplied).
-- Saves the fitted pipeline to /artifacts/pipeline.joblib.
-- Writes basic metrics (MAE, RMSE, R^2) to /artifacts/metrics.json.
+- Saves the fitted pipeline to /artifacts/pipeline.joblib, and its ridge
+  sufficient statistics for incremental.py to pipeline.stats.joblib beside it.
+- Writes an sklearn-free bundle next to it (pipeline.bundle.json + .npz, see bundle.py).
+- Writes basic metrics (MAE, RMSE, R^2) to /artifacts/metrics.json, plus a
+  memory report (transformed design-matrix bytes, peak RSS).
+- Optionally runs repeated K-fold evaluation across cores (--cv K --repeats R,
+  see crossval.py) and records per-fold and aggregate metrics.
+- --stream trains out of core from a Parquet file or directory of shards with
+  SGD (see streaming.py); memory then depends on --batch-size and
+  --sample-rows, not data size.
+- For --model-type lasso / elasticnet, records the cross-validated
+  regularization path and the chosen point, and drops vocabulary tokens with
+  zero coefficients from the artifact (see compaction.py).
 
 Usage
 -----
@@ -21,37 +34,55 @@ Notes
 -----
 - Target is expected to be raw price in dollars; the pipeline handles log transform internally.
 - If you only have a single dataset, omit --val and pass --val-split 0.2 to split off validation.
+- On small datasets prefer --cv 5 --repeats 10: a single split's metrics are mostly noise.
+- With --dtype float32 (or a sparse design) the ridge alpha is chosen by K-fold
+  CV rather than leave-one-out GCV; metrics.json records it under "alpha_selection".
 """
 from __future__ import annotations
 
 import argparse
 import json
 import os
+import sys
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
-import joblib
 import numpy as np
-import pandas as pd
-from sklearn.metrics import mean_absolute_error, root_mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
 
-# from .pipeline import DEFAULT_CONFIG, build_pipeline
-from .pipeline import DEFAULT_CONFIG, build_pipeline
+from .bundle import save_bundle
+from .compaction import drop_zero_coefficients
+from .crossval import cross_validate
+from .incremental import compute_sufficient_stats, save_sufficient_stats
+from .ingest import parse_filters, read_dataset
+from .lazy_imports import lazy_import
+from .pipeline import DEFAULT_CONFIG, build_pipeline, input_columns, ridge_alpha_search
+from .streaming import fit_streaming, predict_streaming
 
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
 
-def _read_table(path: str | Path) -> pd.DataFrame:
+
+def _read_table(path: str | Path, columns: List[str] | None = None, filters: List[Tuple[str, str, Any]] | None = None) -> pd.DataFrame:
+    """Read .csv, .parquet or a Parquet dataset directory (e.g. from ingest.py).
+
+    For Parquet, only `columns` are read and `filters` are pushed down.
+    """
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
-    if path.suffix.lower() in {".parquet"}:
-        return pd.read_parquet(path)
+    if path.is_dir() or path.suffix.lower() in {".parquet"}:
+        return read_dataset(path, columns=columns, filters=filters)
     if path.suffix.lower() in {".csv"}:
+        if filters:
+            raise ValueError("--filter is only supported for Parquet inputs")
         return pd.read_csv(path)
-    raise ValueError(f"Unsupported file extension for {path}. Use .parquet or .csv")
+    raise ValueError(f"Unsupported file extension for {path}. Use .parquet, .csv or a Parquet directory")
 
 
 def _split_train_val(df: pd.DataFrame, target_col: str, val_size: float, random_state: int) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series]:
+    from sklearn.model_selection import train_test_split
+
     X = df.drop(columns=[target_col])
     y = df[target_col]
     X_tr, X_va, y_tr, y_va = train_test_split(
@@ -61,12 +92,148 @@ def _split_train_val(df: pd.DataFrame, target_col: str, val_size: float, random_
 
 
 def _eval_metrics(y_true: pd.Series, y_pred: np.ndarray) -> Dict[str, float]:
+    from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+
     mae = float(mean_absolute_error(y_true, y_pred))
     rmse = float(root_mean_squared_error(y_true, y_pred))
     r2 = float(r2_score(y_true, y_pred))
     return {"MAE": mae, "RMSE": rmse, "R2": r2}
 
 
+def _matrix_nbytes(Z: Any) -> int:
+    """Bytes held by a dense array or the data/indices/indptr of a sparse matrix."""
+    if hasattr(Z, "indptr"):
+        return int(Z.data.nbytes + Z.indices.nbytes + Z.indptr.nbytes)
+    return int(np.asarray(Z).nbytes)
+
+
+def _peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process, or None where unavailable (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def _memory_report(pipe: Any, X: pd.DataFrame, peak_rss: int | None) -> Dict[str, Any]:
+    Z = pipe.named_steps["preprocess"].transform(X)
+    return {
+        "design_matrix_bytes": _matrix_nbytes(Z),
+        "design_matrix_dtype": str(Z.dtype),
+        "design_matrix_shape": [int(n) for n in Z.shape],
+        "design_matrix_sparse": hasattr(Z, "indptr"),
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def _alpha_selection(pipe: Any, cfg: Dict[str, Any]) -> Dict[str, Any] | None:
+    """How a RidgeCV model chose its alpha (leave-one-out GCV or K-fold CV), or None."""
+    from sklearn.linear_model import RidgeCV
+
+    reg = pipe.named_steps["model"].regressor_
+    if not isinstance(reg, RidgeCV):
+        return None
+    method = ridge_alpha_search(cfg)
+    return {
+        "method": method,
+        "folds": int(reg.cv) if method == "kfold" else None,
+        "alphas": [float(a) for a in np.atleast_1d(reg.alphas)],
+        "alpha": float(reg.alpha_),
+    }
+
+
+def _regularization_path(pipe: Any) -> Dict[str, Any] | None:
+    """CV error along the alpha (x l1_ratio) path of a fitted LassoCV/ElasticNetCV, or None."""
+    reg = pipe.named_steps["model"].regressor_
+    if getattr(reg, "mse_path_", None) is None:
+        return None
+    l1_ratios = np.atleast_1d(getattr(reg, "l1_ratio", 1.0)).astype(float)
+    # mse_path_: (n_l1_ratio, n_alphas, n_folds), without the l1 axis for a single ratio
+    mse = np.asarray(reg.mse_path_).reshape(len(l1_ratios), -1, np.shape(reg.mse_path_)[-1])
+    alphas = np.asarray(reg.alphas_).reshape(len(l1_ratios), -1)
+    coef = np.asarray(reg.coef_).ravel()
+    return {
+        "target": "log1p(price)",
+        "path": [
+            {
+                "l1_ratio": float(r),
+                "alphas": [float(a) for a in alphas[i]],
+                "mse_mean": [float(m) for m in mse[i].mean(axis=1)],
+                "mse_std": [float(m) for m in mse[i].std(axis=1)],
+            }
+            for i, r in enumerate(l1_ratios)
+        ],
+        "chosen": {
+            "alpha": float(reg.alpha_),
+            "l1_ratio": float(getattr(reg, "l1_ratio_", 1.0)),
+            "n_nonzero": int(np.count_nonzero(coef)),
+            "n_features": int(coef.shape[0]),
+            "n_iter": int(reg.n_iter_),
+        },
+    }
+
+
+def _main_streaming(args: argparse.Namespace, cfg: Dict[str, Any], filters: List[Tuple[str, str, Any]]) -> None:
+    """train.py --stream: two passes over Parquet batches, never the full table."""
+    target_col = cfg["target_col"]
+    pipe, report = fit_streaming(cfg, args.train, batch_size=args.batch_size, epochs=args.epochs, filters=filters,
+                                 n_sample=args.sample_rows)
+    print(f"[train.py] Streamed {report['n_rows']} rows x {args.epochs} epochs in {report['total_seconds']}s")
+
+    if args.val:
+        y_va, y_pred = predict_streaming(pipe, args.val, target_col, args.batch_size, filters)
+    else:
+        print("[train.py] No validation set provided; evaluating on training data (sanity check only).")
+        y_va, y_pred = predict_streaming(pipe, args.train, target_col, args.batch_size, filters)
+    metrics = _eval_metrics(pd.Series(y_va), y_pred)
+
+    joblib.dump(pipe, args.out)
+    bundle_path = None
+    if args.bundle:
+        try:
+            bundle_path = save_bundle(pipe, args.out)
+        except ValueError as e:
+            print(f"[train.py] Skipping bundle: {e}")
+
+    existing: Dict[str, Any] = {}
+    if Path(args.metrics).exists():
+        try:
+            with open(args.metrics, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except Exception:
+            existing = {}
+    payload = {
+        **existing,
+        "train_artifact": os.path.abspath(args.out),
+        "bundle_manifest": os.path.abspath(bundle_path) if bundle_path else None,
+        "metrics": metrics,
+        "memory": {
+            "max_batch_matrix_bytes": report["max_batch_matrix_bytes"],
+            "peak_rss_bytes": _peak_rss_bytes(),
+        },
+        "streaming": report,
+        "n_train": report["n_rows"],
+        "n_val": int(len(y_va)),
+        "config": {
+            "numeric_cols": cfg.get("numeric_cols", []),
+            "parse": dict(cfg.get("parse", {})),
+            "single_categorical_cols": cfg.get("single_categorical_cols", []),
+            "multi_categorical_cols": {k: dict(v) for k, v in cfg.get("multi_categorical_cols", {}).items()},
+            "model": {**cfg.get("model", {}), "type": "sgd"},
+            "sparse": bool(cfg.get("sparse", False)),
+            "dtype": str(cfg.get("dtype", "float64")),
+        },
+    }
+    with open(args.metrics, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+    print("[train.py] Saved pipeline to:", args.out)
+    print("[train.py] Metrics:", json.dumps(metrics, indent=2))
+
+
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Train swords valuation pipeline")
     parser.add_argument("--train", type=str, default="data/swords_train.parquet", help="Path to training data (.parquet or .csv)")
@@ -75,20 +242,43 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--random-state", type=int, default=42, help="Random seed for splitting")
     parser.add_argument("--out", type=str, default="artifacts/pipeline.joblib", help="Output path for trained pipeline artifact")
     parser.add_argument("--metrics", type=str, default="artifacts/metrics.json", help="Output path for metrics JSON")
+    parser.add_argument("--bundle", action=argparse.BooleanOptionalAction, default=True, help="Also write the sklearn-free manifest+npz bundle next to --out")
+    parser.add_argument("--dtype", type=str, choices=["float64", "float32"], default=None, help="Override the config's design-matrix dtype")
+    parser.add_argument("--model-type", type=str, choices=["ridge", "sgd", "elasticnet", "lasso", "hgb"], default=None, help="Override the config's model.type")
+    parser.add_argument("--cv", type=int, default=0, help="If >1, also run K-fold cross-validation on --train and record it in metrics")
+    parser.add_argument("--repeats", type=int, default=1, help="Repetitions of K-fold with different shuffles (with --cv)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for --cv (-1: all cores, 1: in-process)")
+    parser.add_argument("--sufficient-stats", action=argparse.BooleanOptionalAction, default=True, help="Write ridge sufficient statistics next to the artifact for incremental.py")
+    parser.add_argument("--stream", action="store_true", help="Out-of-core SGD training; --train/--val may be Parquet directories of shards")
+    parser.add_argument("--batch-size", type=int, default=65536, help="Rows per record batch (with --stream)")
+    parser.add_argument("--epochs", type=int, default=5, help="Passes of SGD over the data (with --stream)")
+    parser.add_argument("--sample-rows", type=int, default=50_000, help="Uniform sample the preprocessing is fitted on (with --stream)")
+    parser.add_argument("--filter", action="append", default=[], metavar="COL=V1[,V2]", help="Row filter pushed down into Parquet reads (repeatable; also COL!=V, COL>=NUM)")
     args = parser.parse_args(argv)
 
     cfg: Dict[str, Any] = DEFAULT_CONFIG
+    if args.dtype:
+        cfg = {**cfg, "dtype": args.dtype}
+    if args.model_type:
+        cfg = {**cfg, "model": {**cfg.get("model", {}), "type": args.model_type}}
     target_col = cfg["target_col"]
+    filters = parse_filters(args.filter)
 
     # Ensure output directory exists
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     Path(args.metrics).parent.mkdir(parents=True, exist_ok=True)
 
+    if args.stream:
+        _main_streaming(args, cfg, filters)
+        return
+
     # Load data
-    df_train = _read_table(args.train)
+    # Only the columns the pipeline uses are read (Parquet column pruning)
+    columns = input_columns(cfg) + [target_col]
+    df_train = _read_table(args.train, columns, filters)
 
     if args.val:
-        df_val = _read_table(args.val)
+        df_val = _read_table(args.val, columns, filters)
         X_tr = df_train.drop(columns=[target_col])
         y_tr = df_train[target_col]
         X_va = df_val.drop(columns=[target_col])
@@ -107,8 +297,44 @@ def main(argv: list[str] | None = None) -> None:
     # Build pipeline
     pipe = build_pipeline(cfg)
 
+    cv_report = None
+    if args.cv > 1:
+        cv_report = cross_validate(
+            pipe,
+            df_train.drop(columns=[target_col]),
+            df_train[target_col],
+            k=args.cv,
+            repeats=args.repeats,
+            n_jobs=args.n_jobs,
+            random_state=args.random_state,
+        )
+        agg = cv_report["aggregate"]
+        print(
+            f"[train.py] {args.repeats}x{args.cv}-fold CV in {cv_report['wall_seconds']}s: "
+            + ", ".join(f"{m}={agg[m]['mean']:.4g}±{agg[m]['std']:.2g}" for m in agg)
+        )
+
     # Fit
     pipe.fit(X_tr, y_tr)
+    path_report = _regularization_path(pipe)
+    alpha_selection = _alpha_selection(pipe, cfg)
+    if alpha_selection is not None and alpha_selection["method"] == "kfold":
+        print(f"[train.py] Ridge alpha={alpha_selection['alpha']:.4g} chosen by {alpha_selection['folds']}-fold CV "
+              "(float32/sparse design; dense float64 uses leave-one-out GCV)")
+    pruning = None
+    if path_report is not None:
+        chosen = path_report["chosen"]
+        print(f"[train.py] Regularization path: alpha={chosen['alpha']:.4g}, l1_ratio={chosen['l1_ratio']}, "
+              f"{chosen['n_nonzero']}/{chosen['n_features']} non-zero coefficients")
+        if cfg.get("model", {}).get("prune", True):
+            pruning = drop_zero_coefficients(pipe)
+            print(f"[train.py] Pruned zero-coefficient tokens: {pruning['n_features_before']} -> "
+                  f"{pruning['n_features_after']} features")
+    # Peak RSS is read before the memory report re-materializes the matrix
+    memory = _memory_report(pipe, X_tr, _peak_rss_bytes())
+    stats = compute_sufficient_stats(pipe, X_tr, y_tr) if args.sufficient_stats else None
+    if args.sufficient_stats and stats is None:
+        print("[train.py] Not storing sufficient statistics (non-ridge model or design too wide).")
 
     # Evaluate
     y_pred = pipe.predict(X_va)
@@ -116,6 +342,14 @@ def main(argv: list[str] | None = None) -> None:
 
     # Persist
     joblib.dump(pipe, args.out)
+    if stats is not None:
+        save_sufficient_stats(stats, args.out, pipe)
+    bundle_path = None
+    if args.bundle:
+        try:
+            bundle_path = save_bundle(pipe, args.out)
+        except ValueError as e:
+            print(f"[train.py] Skipping bundle: {e}")
 
     # Read any existing metrics and merge (optional behavior)
     existing: Dict[str, Any] = {}
@@ -129,14 +363,23 @@ def main(argv: list[str] | None = None) -> None:
     payload = {
         **existing,
         "train_artifact": os.path.abspath(args.out),
+        "bundle_manifest": os.path.abspath(bundle_path) if bundle_path else None,
         "metrics": metrics,
+        "memory": memory,
+        "cv": cv_report,
+        "regularization_path": path_report,
+        "alpha_selection": alpha_selection,
+        "pruning": pruning,
         "n_train": int(len(X_tr)),
         "n_val": int(len(X_va)),
         "config": {
             "numeric_cols": cfg.get("numeric_cols", []),
+            "parse": dict(cfg.get("parse", {})),
             "single_categorical_cols": cfg.get("single_categorical_cols", []),
             "multi_categorical_cols": {k: {kk: vv for kk, vv in v.items()} for k, v in cfg.get("multi_categorical_cols", {}).items()},
             "model": cfg.get("model", {}),
+            "sparse": bool(cfg.get("sparse", False)),
+            "dtype": str(cfg.get("dtype", "float64")),
         },
     }
 
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+"""
+Streaming heavy-hitter counting (Space-Saving) for vocabulary learning.
+
+Purpose
+-------
+Learn the most frequent tokens of an unbounded stream in bounded memory, so
+MultiLabelBinarizerTransformer.partial_fit can build its top-K vocabulary from
+chunks/shards without holding an exact count for every distinct token.
+
+Guarantees (Metwally et al., Space-Saving)
+------------------------------------------
+With ``capacity`` m counters over a stream of total weight N:
+- every token whose true count exceeds N / m is tracked,
+- each estimate overcounts by at most its recorded error (<= N / m),
+- while the number of distinct tokens is <= m nothing is evicted and the
+  counts are exact (so results match an exact fit).
+
+capacity=None keeps exact counts with no bound (plain dictionary).
+
+Example
+-------
+>>> c = SpaceSavingCounter(capacity=2)
+>>> c.update(["gold", "steel", "gold", "brass"], [1, 1, 1, 1])
+>>> c.counts()  # brass evicted steel and inherited its count as error
+{'gold': 2, 'brass': 2}
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def capacity_for_error(error: float) -> int:
+    """Number of counters needed for an absolute error of ``error * N``."""
+    if not 0 < error < 1:
+        raise ValueError(f"error must be in (0, 1), got {error}")
+    return int(math.ceil(1.0 / error))
+
+
+class SpaceSavingCounter:
+    """Weighted Space-Saving counter with a lazily-invalidated min-heap.
+
+    Parameters
+    ----------
+    capacity : Optional[int], default=None
+        Maximum number of tracked tokens. None means exact, unbounded counting.
+
+    Attributes
+    ----------
+    total : int
+        Total weight seen so far (N).
+    n_evicted : int
+        Number of evictions so far (0 means the counts are exact).
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"capacity must be >= 1 or None, got {capacity}")
+        self.capacity = capacity
+        self.total = 0
+        self.n_evicted = 0
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        # (count, token) entries; an entry is live iff it matches _counts.
+        # Counts only grow, so stale entries surface (and are skipped) first.
+        self._heap: List[Tuple[int, str]] = []
+
+    # ------------------------------
+    # Updates
+    # ------------------------------
+    def update(self, tokens: Iterable[str], weights: Iterable[int]) -> "SpaceSavingCounter":
+        """Add ``weight`` occurrences of each token (one entry per distinct token is cheapest)."""
+        counts, errors, heap, cap = self._counts, self._errors, self._heap, self.capacity
+        for tok, w in zip(tokens, weights):
+            w = int(w)
+            if w <= 0:
+                continue
+            self.total += w
+            c = counts.get(tok)
+            if c is not None:
+                c += w
+                counts[tok] = c
+            elif cap is None or len(counts) < cap:
+                c = w
+                counts[tok] = c
+                errors[tok] = 0
+            else:
+                # Evict the current minimum; the newcomer inherits its count as error
+                min_c, min_tok = self._pop_min()
+                del counts[min_tok]
+                del errors[min_tok]
+                self.n_evicted += 1
+                c = min_c + w
+                counts[tok] = c
+                errors[tok] = min_c
+            if cap is not None:
+                heapq.heappush(heap, (c, tok))
+
+        if cap is not None and len(heap) > 4 * cap:
+            self._rebuild_heap()
+        return self
+
+    def merge(self, other: "SpaceSavingCounter") -> "SpaceSavingCounter":
+        """Fold another counter's estimates into this one (e.g., per-shard sketches)."""
+        items = sorted(other._counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        self.update([t for t, _ in items], [c for _, c in items])
+        return self
+
+    def _pop_min(self) -> Tuple[int, str]:
+        heap, counts = self._heap, self._counts
+        while True:
+            c, tok = heapq.heappop(heap)
+            if counts.get(tok) == c:
+                return c, tok
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(c, t) for t, c in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def counts(self) -> Dict[str, int]:
+        """Estimated count per tracked token (exact when nothing was evicted)."""
+        return dict(self._counts)
+
+    def guaranteed_counts(self) -> Dict[str, int]:
+        """Lower bound per tracked token (estimate minus its error)."""
+        return {t: c - self._errors[t] for t, c in self._counts.items()}
+
+    @property
+    def error_bound(self) -> float:
+        """Worst-case overcount of any estimate (N / capacity; 0 when exact)."""
+        if self.capacity is None or self.n_evicted == 0:
+            return 0.0
+        return self.total / self.capacity
+
+    @property
+    def is_exact(self) -> bool:
+        """True while no token has been evicted."""
+        return self.n_evicted == 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    # ------------------------------
+    # Pickling: the heap is derived state
+    # ------------------------------
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_heap"] = []
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        if self.capacity is not None:
+            self._rebuild_heap()
+
+    def __repr__(self) -> str:  # pragma: no cover - cosmetic
+        return f"SpaceSavingCounter(capacity={self.capacity}, tracked={len(self)}, total={self.total})"
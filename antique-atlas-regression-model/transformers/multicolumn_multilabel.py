@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+"""
+Multi-column multi-label transformer for sklearn Pipelines.
+
+Purpose
+-------
+Encode several list-like categorical columns (material, makerWorkshop,
+provenance, ...) in one step instead of one FunctionTransformer(select_series)
++ encoder pipeline per field inside the ColumnTransformer:
+
+- all list columns are exploded and tokenized together, so every unique raw
+  string is normalized once across fields (one shared normalization cache),
+- each field keeps its own encoder options (top_k / min_freq / include_other,
+  or "mode": "hash"), learned by the same per-field encoders as before,
+- transform emits one horizontally stacked block (CSR or dense) built with a
+  single scatter, with exactly the per-field feature names of the old layout
+  (material__gold, ..., material__Other, makerWorkshop__..., ...).
+- Arrow list columns (list ArrowDtype Series, or a pyarrow Table) are
+  tokenized with Arrow kernels per field and merged into the shared token
+  table (see multilabel_binarizer._tokenize_arrow).
+
+Example
+-------
+>>> tf = MultiColumnMultiLabelTransformer(fields={
+...     "material": {"top_k": 15, "include_other": True},
+...     "provenance": {"mode": "hash", "n_features": 2**18},
+... }, sparse_output=True)
+>>> Z = tf.fit_transform(X[["material", "provenance"]])
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from .multilabel_binarizer import (
+    MultiLabelBinarizerTransformer,
+    _NormalizerCacheMixin,
+    _arrow_list_array,
+    _assemble_indicators,
+    _default_normalizer,
+    _explode_column,
+    _merge_tokenized,
+    _tokenize_arrow,
+    _tokenize_exploded,
+    _unique_keys,
+)
+from .multilabel_hashing import MultiLabelHashingTransformer
+
+# Options owned by the multi-column transformer (shared by every field)
+_SHARED_OPTIONS = ("normalizer", "normalizer_cache_size", "sparse_output", "dtype")
+
+
+def make_multilabel_encoder(field_name: str, sparse_output: bool = False, **opts):
+    """Build the single-field encoder described by a multi_categorical_cols entry."""
+    opts = dict(opts)
+    mode = opts.pop("mode", "vocab")
+    if mode == "hash":
+        return MultiLabelHashingTransformer(feature_name=field_name, **opts)
+    if mode == "vocab":
+        return MultiLabelBinarizerTransformer(feature_name=field_name, **{"sparse_output": sparse_output, **opts})
+    raise ValueError(f"Unknown multi-label mode {mode!r} for field {field_name!r}. Use 'vocab' or 'hash'.")
+
+
+def _n_outputs(encoder) -> int:
+    """Output width of a fitted single-field encoder."""
+    if isinstance(encoder, MultiLabelHashingTransformer):
+        return encoder.n_features_out_
+    return len(encoder.feature_names_out_)
+
+
+def _column(X: Any, name: str, position: int) -> Sequence[object]:
+    if isinstance(X, pd.DataFrame):
+        return X[name] if name in X.columns else X.iloc[:, position]
+    if hasattr(X, "column_names"):  # pyarrow.Table
+        return X.column(name) if name in X.column_names else X.column(position)
+    return np.asarray(X, dtype=object)[:, position]
+
+
+class MultiColumnMultiLabelTransformer(_NormalizerCacheMixin, BaseEstimator, TransformerMixin):
+    """
+    Encode several multi-label columns in one pass into one stacked block.
+
+    Parameters
+    ----------
+    fields : Dict[str, Dict[str, Any]]
+        Field name → encoder options, in output order (the
+        ``multi_categorical_cols`` mapping of the pipeline config).
+    normalizer : Optional[Callable[[str], str]], default=_default_normalizer
+        Token normalizer shared by all fields.
+    sparse_output : bool, default=False
+        If True, return a scipy.sparse CSR matrix; otherwise a pandas DataFrame.
+    dtype : str or numpy.dtype, default=np.uint8
+        Output dtype for indicators.
+    normalizer_cache_size : Optional[int], default=4096
+        Size of the shared LRU raw → normalized token cache.
+
+    Attributes
+    ----------
+    encoders_ : Dict[str, MultiLabelBinarizerTransformer | MultiLabelHashingTransformer]
+        Fitted per-field encoders (vocabularies, reverse maps).
+    feature_offsets_ : Tuple[int, ...]
+        Start column of each field in the stacked output (plus the total width).
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, Dict[str, Any]],
+        *,
+        normalizer: Optional[Callable[[str], str]] = _default_normalizer,
+        sparse_output: bool = False,
+        dtype=np.uint8,
+        normalizer_cache_size: Optional[int] = 4096,
+    ) -> None:
+        self.fields = fields
+        self.normalizer = normalizer
+        self.sparse_output = sparse_output
+        self.dtype = dtype
+        self.normalizer_cache_size = normalizer_cache_size
+
+    # ------------------------------
+    # Tokenization shared by fit/transform
+    # ------------------------------
+    def _tokenize(self, X: Any) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Explode every field and tokenize all of them together.
+
+        Returns (n_samples, field_ids, row_ids, token_ids, tokens) where
+        (field, row, token) triples are unique and tokens are shared by all fields.
+        """
+        n_samples = len(X)
+        cache = self._get_normalizer_cache()
+        keys: List[np.ndarray] = []
+        raws: List[np.ndarray] = []
+        arrow_parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for f, name in enumerate(self.fields):
+            column = _column(X, name, f)
+            arrow = _arrow_list_array(column)
+            if arrow is not None:
+                row_ids, token_ids, tokens = _tokenize_arrow(arrow, self.normalizer, cache)
+                arrow_parts.append((row_ids + f * n_samples, token_ids, tokens))
+                continue
+            row_ids, raw = _explode_column(column)
+            keys.append(row_ids + f * n_samples)
+            raws.append(raw)
+        key = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        raw = np.concatenate(raws) if raws else np.empty(0, dtype=object)
+
+        key, token_ids, tokens = _tokenize_exploded(key, raw, self.normalizer, cache)
+        if arrow_parts:
+            key, token_ids, tokens = _merge_tokenized([(key, token_ids, tokens), *arrow_parts])
+        if n_samples == 0:
+            return n_samples, key, key, token_ids, tokens
+        return n_samples, key // n_samples, key % n_samples, token_ids, tokens
+
+    @staticmethod
+    def _field_slice(field_ids: np.ndarray, f: int) -> slice:
+        # Keys are sorted with the field as the most significant part
+        lo, hi = np.searchsorted(field_ids, [f, f + 1])
+        return slice(int(lo), int(hi))
+
+    def _check_fields(self) -> None:
+        for name, opts in self.fields.items():
+            shared = [k for k in _SHARED_OPTIONS if k in opts]
+            if shared:
+                raise ValueError(
+                    f"Field {name!r} sets {shared}; these are shared by all fields of "
+                    "MultiColumnMultiLabelTransformer and must be set on it instead."
+                )
+
+    # ------------------------------
+    # sklearn API
+    # ------------------------------
+    def fit(self, X: Any, y: Optional[Sequence] = None):
+        """Learn every field's vocabulary from a DataFrame holding the list columns."""
+        self._fit(X, partial=False)
+        return self
+
+    def partial_fit(self, X: Any, y: Optional[Sequence] = None):
+        """Update every field's vocabulary with one chunk (see MultiLabelBinarizerTransformer.partial_fit)."""
+        self._fit(X, partial=True)
+        return self
+
+    def fit_transform(self, X: Any, y: Optional[Sequence] = None, **fit_params):
+        """Fit and transform with a single tokenization of all fields."""
+        tokenized = self._fit(X, partial=False)
+        return self._transform_tokens(*tokenized)
+
+    def transform(self, X: Any):
+        """Encode all fields into one stacked indicator block.
+
+        Returns
+        -------
+        pandas.DataFrame or scipy.sparse.csr_matrix
+            Columns ordered by field, matching get_feature_names_out().
+        """
+        check_is_fitted(self, attributes=["encoders_", "feature_offsets_"])
+        return self._transform_tokens(*self._tokenize(X))
+
+    def _fit(self, X: Any, partial: bool):
+        self._check_fields()
+        if not partial or getattr(self, "encoders_", None) is None:
+            self.encoders_ = {
+                name: make_multilabel_encoder(name, **opts, normalizer=None, normalizer_cache_size=0)
+                for name, opts in self.fields.items()
+            }
+        tokenized = self._tokenize(X)
+        _, field_ids, _, token_ids, tokens = tokenized
+        for f, enc in enumerate(self.encoders_.values()):
+            sl = self._field_slice(field_ids, f)
+            # Compact the shared token table to the tokens this field uses
+            used = _unique_keys(token_ids[sl])
+            local_ids = np.searchsorted(used, token_ids[sl])
+            if partial:
+                enc._partial_fit_tokens(local_ids, tokens[used])
+            else:
+                enc._fit_tokens(local_ids, tokens[used])
+
+        widths = [_n_outputs(enc) for enc in self.encoders_.values()]
+        self.feature_offsets_ = tuple(int(o) for o in np.concatenate([[0], np.cumsum(widths, dtype=np.int64)]))
+        return tokenized
+
+    def _transform_tokens(self, n_samples: int, field_ids: np.ndarray, row_ids: np.ndarray, token_ids: np.ndarray, tokens: np.ndarray):
+        cols = np.empty(len(token_ids), dtype=np.int64)
+        for f, enc in enumerate(self.encoders_.values()):
+            sl = self._field_slice(field_ids, f)
+            # Column map is computed per unique token, then gathered per occurrence
+            used = _unique_keys(token_ids[sl])
+            token_cols = enc._token_columns(tokens[used])
+            field_cols = token_cols[np.searchsorted(used, token_ids[sl])]
+            cols[sl] = np.where(field_cols >= 0, field_cols + self.feature_offsets_[f], -1)
+
+        hit = cols >= 0
+        out = _assemble_indicators(row_ids[hit], cols[hit], n_samples, self.feature_offsets_[-1],
+                                   np.dtype(self.dtype), self.sparse_output)
+        if self.sparse_output:
+            return out
+        return pd.DataFrame(out, columns=self.get_feature_names_out())
+
+    def prune_tokens(self, field_tokens: Dict[str, Iterable[str]], into_other: bool = False) -> np.ndarray:
+        """Remove vocabulary tokens per field (see MultiLabelBinarizerTransformer.prune_tokens).
+
+        Hashed fields have no vocabulary and are left unchanged. Returns a
+        boolean mask over the previous stacked output columns marking the ones kept.
+        """
+        check_is_fitted(self, attributes=["encoders_", "feature_offsets_"])
+        masks: List[np.ndarray] = []
+        for name, enc in self.encoders_.items():
+            if name in field_tokens and isinstance(enc, MultiLabelBinarizerTransformer):
+                masks.append(enc.prune_tokens(field_tokens[name], into_other=into_other))
+            else:
+                masks.append(np.ones(_n_outputs(enc), dtype=bool))
+        widths = [_n_outputs(enc) for enc in self.encoders_.values()]
+        self.feature_offsets_ = tuple(int(o) for o in np.concatenate([[0], np.cumsum(widths, dtype=np.int64)]))
+        return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+    # ------------------------------
+    # Introspection helpers
+    # ------------------------------
+    def get_feature_names_out(self, input_features: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Names of output features (sklearn API), field by field."""
+        check_is_fitted(self, attributes=["encoders_"])
+        parts = [enc.get_feature_names_out() for enc in self.encoders_.values()]
+        return np.concatenate(parts) if parts else np.array([], dtype=object)
+
+    def __repr__(self) -> str:  # pragma: no cover - cosmetic
+        params = [
+            f"fields={list(self.fields)}",
+            f"sparse_output={self.sparse_output}",
+            f"dtype={getattr(self.dtype, 'name', self.dtype)}",
+        ]
+        return f"MultiColumnMultiLabelTransformer({', '.join(params)})"
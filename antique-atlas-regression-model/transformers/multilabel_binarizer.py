@@ -11,10 +11,21 @@ of binary indicator features suitable for linear/regularized regression.
 Key features
 ------------
 - Learns a fixed vocabulary on train (top-K or min frequency capping)
+- partial_fit learns the vocabulary from a stream of chunks, optionally in
+  bounded memory via a Space-Saving heavy-hitter sketch (sketch_error); the
+  token counts behind it are dropped from pickles
 - Optional "Other" bucket for unseen/rare tokens
 - Robust to nulls/non-iterables/duplicates per row
 - Sklearn-compatible (fit/transform, get_feature_names_out)
+- Vectorized: the column is exploded once, each unique token is normalized once,
+  and indicators are written with a single fancy-indexed assignment
+- Bounded LRU cache of raw → normalized tokens shared by fit and transform
+  (see cache_info(); dropped from pickles)
 - Returns a pandas DataFrame by default (named columns), or a scipy sparse matrix
+- Accepts Arrow list columns (pyarrow ListArray / ChunkedArray, or a pandas
+  Series with a list ArrowDtype) without materializing per-row Python objects:
+  row ids come from the list offsets, tokens are normalized with Arrow compute
+  kernels on the flat values buffer, and only unique tokens become Python str
 
 Example
 -------
@@ -41,14 +52,18 @@ Notes
 - If neither is provided, the vocabulary is the set of all observed tokens (not recommended for very high-cardinality columns).
 """
 
+import sys
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Any, Callable, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 
+from .heavy_hitters import SpaceSavingCounter, capacity_for_error
+
 try:
     from scipy import sparse as sp
 except Exception:  # pragma: no cover - scipy optional at runtime
@@ -103,12 +118,365 @@ def _as_token_set(value: object, normalizer: Optional[Callable[[str], str]]) ->
     return tokens
 
 
+# Vectorized engine
+# - Explodes the whole column once into a flat (row_id, raw_value) stream.
+# - Normalizes each *unique* raw value once instead of every occurrence.
+# - Maps tokens to column ids over the unique tokens only (pandas hash index).
+# - Deduplicates (row, column) pairs with a single sort of packed int64 keys,
+#   which also yields the row-major, column-sorted order a CSR matrix needs.
+# Semantics match _as_token_set row by row (None/NaN/non-iterables => empty,
+# non-string items => str(item), falsy normalized tokens dropped).
+def _explode_column(X: Sequence[object]) -> Tuple[np.ndarray, np.ndarray]:
+    """Flatten a column of list-likes into (row_ids, raw_values) arrays.
+
+    Each row contributes its items in order; rows that yield no tokens under
+    _as_token_set contribute nothing. None items are dropped here.
+    """
+    cells = X.tolist() if isinstance(X, (pd.Series, np.ndarray)) else list(X)
+    lengths: List[int] = []
+    flat: List[object] = []
+    append, extend = flat.append, flat.extend
+    for value in cells:
+        if isinstance(value, str):
+            append(value)
+            lengths.append(1)
+        elif value is None or isinstance(value, float):
+            # None / NaN / bare floats are not token containers
+            lengths.append(0)
+        elif isinstance(value, np.ndarray):
+            # tolist() hands back the stored objects without per-item boxing
+            extend(value.tolist())
+            lengths.append(len(value))
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+            lengths.append(len(value))
+        else:
+            try:
+                items = list(value)  # type: ignore[call-overload]
+            except TypeError:
+                items = []
+            extend(items)
+            lengths.append(len(items))
+
+    row_ids = np.repeat(np.arange(len(cells), dtype=np.int64), lengths)
+    raw = np.fromiter(flat, dtype=object, count=len(flat))
+    not_none = raw != None  # noqa: E711 - elementwise on object arrays
+    if not not_none.all():
+        row_ids, raw = row_ids[not_none], raw[not_none]
+    return row_ids, raw
+
+
+class CacheInfo(NamedTuple):
+    """Normalization cache statistics (mirrors functools.lru_cache's cache_info)."""
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+# Bounded raw token -> normalized token memo.
+# - Shared by fit and transform (and across transform calls), so the same few
+#   hundred material/maker/provenance strings are normalized once per process.
+# - LRU eviction once maxsize entries are held; maxsize=None means unbounded.
+# - Never pickled: the owning transformer drops it in __getstate__.
+class _NormalizerCache:
+    def __init__(self, normalizer: Callable[[str], str], maxsize: Optional[int]) -> None:
+        self.normalizer = normalizer
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+
+    def normalize(self, raw: str) -> str:
+        data = self._data
+        try:
+            tok = data[raw]
+        except KeyError:
+            self.misses += 1
+            tok = self.normalizer(raw)
+            data[raw] = tok
+            if self.maxsize is not None and len(data) > self.maxsize:
+                data.popitem(last=False)
+            return tok
+        self.hits += 1
+        data.move_to_end(raw)
+        return tok
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
+
+
+def _normalize_uniques(
+    uniques: np.ndarray,
+    normalizer: Optional[Callable[[str], str]],
+    cache: Optional[_NormalizerCache] = None,
+) -> List[str]:
+    """Apply the normalizer once per unique raw value (non-strings go through str())."""
+    if normalizer is not None and cache is not None:
+        normalizer = cache.normalize
+    out: List[str] = []
+    for u in uniques:
+        v = u if isinstance(u, str) else str(u)
+        out.append(v if normalizer is None else normalizer(v))
+    return out
+
+
+def _unique_keys(keys: np.ndarray) -> np.ndarray:
+    """Sorted unique values of an int64 key array (sort + adjacent-diff mask)."""
+    if keys.size == 0:
+        return keys
+    keys = np.sort(keys)
+    mask = np.empty(keys.size, dtype=bool)
+    mask[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=mask[1:])
+    return keys[mask]
+
+
+def _tokenize_column(
+    X: Sequence[object],
+    normalizer: Optional[Callable[[str], str]],
+    cache: Optional[_NormalizerCache] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized equivalent of applying _as_token_set to every row.
+
+    Returns
+    -------
+    row_ids : np.ndarray[int64]
+        Row index of each (row, token) occurrence, deduplicated within a row.
+    token_ids : np.ndarray[int64]
+        Index into ``tokens`` for each occurrence.
+    tokens : np.ndarray[object]
+        Unique normalized tokens (non-empty).
+    """
+    arrow = _arrow_list_array(X)
+    if arrow is not None:
+        return _tokenize_arrow(arrow, normalizer, cache)
+    row_ids, raw = _explode_column(X)
+    return _tokenize_exploded(row_ids, raw, normalizer, cache)
+
+
+def _tokenize_exploded(
+    row_ids: np.ndarray,
+    raw: np.ndarray,
+    normalizer: Optional[Callable[[str], str]],
+    cache: Optional[_NormalizerCache] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_tokenize_column on an already exploded (row_ids, raw_values) stream.
+
+    ``row_ids`` may be any non-negative int64 key (e.g., field * n_rows + row
+    when several columns are tokenized together); deduplication is per key.
+    """
+    if raw.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=object)
+
+    raw_codes, raw_uniques = pd.factorize(raw, use_na_sentinel=False)
+    return _tokenize_codes(row_ids, raw_codes, raw_uniques, normalizer, cache)
+
+
+def _tokenize_codes(
+    row_ids: np.ndarray,
+    raw_codes: np.ndarray,
+    raw_uniques: np.ndarray,
+    normalizer: Optional[Callable[[str], str]],
+    cache: Optional[_NormalizerCache] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Normalize factorized raw values, drop empty tokens and deduplicate per row key."""
+    normalized = _normalize_uniques(raw_uniques, normalizer, cache)
+
+    # Second factorize collapses raw values that normalize to the same token
+    norm_codes, tokens = pd.factorize(np.array(normalized, dtype=object), use_na_sentinel=False)
+    tokens = np.asarray(tokens, dtype=object)
+    valid = np.fromiter((bool(t) for t in tokens), dtype=bool, count=len(tokens))
+
+    token_ids = norm_codes[raw_codes]
+    if not valid.all():
+        keep = valid[token_ids]
+        row_ids, token_ids = row_ids[keep], token_ids[keep]
+        # Re-index tokens so the returned table holds only real tokens
+        remap = np.cumsum(valid) - 1
+        token_ids = remap[token_ids]
+        tokens = tokens[valid]
+
+    n_tokens = len(tokens)
+    if n_tokens == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, tokens
+
+    # Duplicates within a row collapse (set semantics)
+    pairs = _unique_keys(row_ids * n_tokens + token_ids)
+    return pairs // n_tokens, pairs % n_tokens, tokens
+
+
+# Arrow input
+# - A list<string> column is already exploded: flatten() is the values buffer
+#   and list_parent_indices() maps every value to its row via the offsets.
+# - The default strip/lower normalizer runs as Arrow kernels over all values
+#   when they are ASCII; unique() / index_in() factorize them without creating
+#   Python objects, so only the (few hundred) unique tokens are converted to str.
+# - Null lists and null items contribute nothing, as None does in _as_token_set.
+# Characters str.strip() removes in the ASCII range
+_ASCII_WHITESPACE = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+def _arrow_list_array(X: Any) -> Any:
+    """X as a pyarrow ChunkedArray if it is an Arrow list column, else None."""
+    pa = sys.modules.get("pyarrow")
+    if pa is None:
+        return None  # Arrow data cannot exist without pyarrow imported
+    if isinstance(X, pd.Series):
+        if not isinstance(X.dtype, pd.ArrowDtype):
+            return None
+        X = X.array.__arrow_array__()  # zero-copy ChunkedArray
+    if isinstance(X, pa.Array):
+        X = pa.chunked_array([X])
+    if isinstance(X, pa.ChunkedArray) and (pa.types.is_list(X.type) or pa.types.is_large_list(X.type)):
+        return X
+    return None
+
+
+def _tokenize_arrow(
+    X: Any,
+    normalizer: Optional[Callable[[str], str]],
+    cache: Optional[_NormalizerCache] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_tokenize_column for an Arrow list column (see _arrow_list_array)."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    row_parts: List[np.ndarray] = []
+    value_parts: List[Any] = []
+    base = 0
+    for chunk in X.chunks:
+        row_parts.append(pc.list_parent_indices(chunk).to_numpy().astype(np.int64) + base)
+        value_parts.append(chunk.flatten())
+        base += len(chunk)
+    value_type = X.type.value_type
+    values = pa.chunked_array(value_parts, type=value_type)
+    row_ids = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+
+    if not (pa.types.is_string(value_type) or pa.types.is_large_string(value_type)):
+        values = pc.cast(values, pa.string())
+    valid = values.is_valid()
+    if values.null_count:
+        row_ids = row_ids[valid.to_numpy(zero_copy_only=False)]
+        values = values.filter(valid)
+    if len(values) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=object)
+
+    if normalizer is _default_normalizer and pc.all(pc.string_is_ascii(values)).as_py() is not False:
+        # Same result as str.strip().lower() on ASCII; non-ASCII text keeps the
+        # Python normalizer (per unique value) since Unicode case rules differ
+        values = pc.ascii_lower(pc.utf8_trim(values, characters=_ASCII_WHITESPACE))
+        normalizer = None  # already applied
+    uniques = pc.unique(values)
+    raw_codes = pc.index_in(values, value_set=uniques).to_numpy(zero_copy_only=False).astype(np.int64)
+    raw_uniques = np.asarray(uniques.to_numpy(zero_copy_only=False), dtype=object)
+    return _tokenize_codes(row_ids, raw_codes, raw_uniques, normalizer, cache)
+
+
+def _merge_tokenized(parts: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Combine (keys, token_ids, tokens) triples with disjoint keys into one shared token table."""
+    parts = [p for p in parts if len(p[2])]
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=object)
+    codes, tokens = pd.factorize(np.concatenate([p[2] for p in parts]), use_na_sentinel=False)
+    tokens = np.asarray(tokens, dtype=object)
+    keys: List[np.ndarray] = []
+    token_ids: List[np.ndarray] = []
+    offset = 0
+    for key, tid, toks in parts:
+        keys.append(key)
+        token_ids.append(codes[offset + tid])
+        offset += len(toks)
+    n_tokens = len(tokens)
+    # Sorted by key, as _tokenize_exploded returns them
+    pairs = _unique_keys(np.concatenate(keys) * n_tokens + np.concatenate(token_ids))
+    return pairs // n_tokens, pairs % n_tokens, tokens
+
+
+def _assemble_indicators(
+    row_ids: np.ndarray,
+    col_ids: np.ndarray,
+    n_samples: int,
+    n_features: int,
+    dtype: np.dtype,
+    sparse_output: bool,
+):
+    """Build the indicator matrix from (row, column) hits in one assignment.
+
+    Pairs are deduplicated and sorted row-major, so the CSR indices come out
+    ordered per row without a per-row sort.
+    """
+    if row_ids.size:
+        pairs = _unique_keys(row_ids * n_features + col_ids)
+        rows, cols = pairs // n_features, pairs % n_features
+    else:
+        rows = cols = np.empty(0, dtype=np.int64)
+
+    if sparse_output:
+        # Preallocated index arrays; int32 whenever nnz/width allow (scipy's default)
+        nnz = len(cols)
+        index_dtype = np.int32 if max(nnz, n_features) < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(n_samples + 1, dtype=index_dtype)
+        np.cumsum(np.bincount(rows, minlength=n_samples), out=indptr[1:])
+        data = np.ones(nnz, dtype=dtype)
+        return sp.csr_matrix((data, cols.astype(index_dtype, copy=False), indptr), shape=(n_samples, n_features))
+
+    arr = np.zeros((n_samples, n_features), dtype=dtype)
+    arr[rows, cols] = 1
+    return arr
+
+
+class _NormalizerCacheMixin:
+    """Lazily built, never pickled _NormalizerCache for transformers with
+    ``normalizer`` and ``normalizer_cache_size`` params."""
+
+    def _get_normalizer_cache(self) -> Optional[_NormalizerCache]:
+        """Lazily (re)build the cache; rebuilt if normalizer/size params changed."""
+        if self.normalizer is None or self.normalizer_cache_size == 0:
+            return None
+        cache = getattr(self, "_normalizer_cache", None)
+        if cache is None or cache.normalizer is not self.normalizer or cache.maxsize != self.normalizer_cache_size:
+            cache = _NormalizerCache(self.normalizer, self.normalizer_cache_size)
+            self._normalizer_cache = cache
+        return cache
+
+    def cache_info(self) -> CacheInfo:
+        """Hit/miss counters and size of the token normalization cache."""
+        cache = getattr(self, "_normalizer_cache", None)
+        if cache is None:
+            return CacheInfo(0, 0, self.normalizer_cache_size, 0)
+        return cache.info()
+
+    def cache_clear(self) -> None:
+        """Drop all memoized normalizations and reset the counters."""
+        cache = getattr(self, "_normalizer_cache", None)
+        if cache is not None:
+            cache.clear()
+
+    def __getstate__(self):
+        # Keep the cache out of pickles/joblib artifacts; it is rebuilt on first use.
+        # Copy first: on Python 3.11+ the base state can be the live __dict__.
+        state = dict(super().__getstate__())
+        state.pop("_normalizer_cache", None)
+        return state
+
+
 @dataclass
 class _VocabConfig:
     vocabulary_: Tuple[str, ...]
     include_other: bool
     feature_name: str
     dtype: np.dtype
+    # Pruned tokens that are dropped outright instead of counting as Other
+    ignored: FrozenSet[str] = frozenset()
 
 # transformer automatically:
 #   Normalizes messy string inputs.
@@ -121,7 +489,7 @@ class _VocabConfig:
 #           Each entry is a binary indicator:
 #               1 if that row has the category/token.
 #               0 if it does not.
-class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
+class MultiLabelBinarizerTransformer(_NormalizerCacheMixin, BaseEstimator, TransformerMixin):
     """
     Scikit-learn compatible transformer for multi-label categorical columns.
 
@@ -145,6 +513,15 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         falls back to dense DataFrame.
     dtype : str or numpy.dtype, default=np.uint8
         Output dtype for indicators.
+    sketch_error : Optional[float], default=None
+        Bound the memory used to count tokens during fit/partial_fit with a
+        Space-Saving sketch of ceil(1 / sketch_error) counters (at least
+        2 * top_k). Count estimates overshoot by at most sketch_error * N
+        (N = total token occurrences seen). None keeps exact counts.
+    normalizer_cache_size : Optional[int], default=4096
+        Maximum number of raw → normalized tokens memoized across fit/transform
+        calls (LRU eviction). None means unbounded; 0 disables the cache.
+        The cache is not pickled; it is rebuilt lazily after loading.
 
     Attributes
     ----------
@@ -152,6 +529,15 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         Learned, fixed vocabulary of kept tokens.
     feature_names_out_ : Tuple[str, ...]
         Full list of output feature names in transform() result.
+    token_counter_ : SpaceSavingCounter
+        Token document-frequency counts behind the vocabulary; partial_fit
+        keeps updating it. Exact counts grow with every distinct token seen,
+        so they are not pickled (nor deep-copied): a loaded transformer
+        transforms as usual, but partial_fit needs the counts restored
+        first (incremental.py keeps them next to the artifact).
+    ignored_tokens_ : FrozenSet[str]
+        Tokens removed by prune_tokens() that transform drops without setting
+        Other. Reset whenever the vocabulary is re-selected.
     """
 
     def __init__(
@@ -164,6 +550,8 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         normalizer: Optional[Callable[[str], str]] = _default_normalizer,
         sparse_output: bool = False,
         dtype=np.uint8,
+        sketch_error: Optional[float] = None,
+        normalizer_cache_size: Optional[int] = 4096,
     ) -> None:
         self.feature_name = feature_name
         self.top_k = top_k
@@ -172,19 +560,22 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         self.normalizer = normalizer
         self.sparse_output = sparse_output
         self.dtype = dtype
+        self.sketch_error = sketch_error
+        self.normalizer_cache_size = normalizer_cache_size
 
     # ------------------------------
     # sklearn API
     # ------------------------------
     # Learns the vocabulary:
-    # 1. Flatten tokens across all rows.
+    # 1. Flatten tokens across all rows (one explode of the whole column).
     #    - sample input: pd.Series(['Steel', 'steel', 'Brass', 'Ivory'])
     #    - Row 0 → {"steel"}; Row 1 → {"steel"}; Row 2 → {"brass"}; Row 3 → {"ivory"}
     #    - Flattening means treating all rows’ tokens together: {"steel"} + {"steel"} + {"brass"} + {"ivory"}
     #    - results in following global token counts: steel → 2; brass → 1; ivory → 1
     #    - flattening is necessary because during fit(), the transformer needs to build a vocabulary (the list of columns it will output later).
     #    - allows you to: Count frequencies globally., Apply rules like top_k or min_freq.; Decide which tokens to keep in the feature set.
-    # 2. Count how often each token appears.
+    # 2. Count how often each token appears (np.bincount over token ids; each
+    #    unique raw string is normalized only once).
     # 3. Apply filtering (top_k or min_freq).
     # 4. Save kept tokens as self.vocabulary_.
     # 5. Build output column names like material__gold, material__silver, etc.
@@ -199,12 +590,65 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
             (or a single string, or None).
         y : ignored
         """
-        # Flatten tokens across rows, count frequencies
-        token_counts: dict[str, int] = {}
-        for value in X:
-            tokens = _as_token_set(value, self.normalizer)
-            for t in tokens:
-                token_counts[t] = token_counts.get(t, 0) + 1
+        _, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        return self._fit_tokens(token_ids, tokens)
+
+    def fit_transform(self, X: Sequence[object], y: Optional[Sequence] = None, **fit_params):
+        """Fit and transform in one pass over the column (tokenizes once)."""
+        row_ids, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        self._fit_tokens(token_ids, tokens)
+        return self._transform_tokens(len(X), row_ids, token_ids, tokens)
+
+    # Streaming variant of fit():
+    #   Each call folds one chunk's token counts into token_counter_ and
+    #   re-derives the vocabulary, so the transformer is usable after any chunk.
+    #   With sketch_error=None the counts are exact and the result after all
+    #   chunks equals fit() on their concatenation; with sketch_error=eps a
+    #   Space-Saving sketch keeps memory at ceil(1/eps) tokens (still exact
+    #   while the number of distinct tokens fits).
+    def partial_fit(self, X: Sequence[object], y: Optional[Sequence] = None):
+        """Update the vocabulary with one chunk of the training column.
+
+        Parameters
+        ----------
+        X : Sequence[object]
+            One chunk of the column (same element format as fit()).
+        y : ignored
+        """
+        _, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        return self._partial_fit_tokens(token_ids, tokens)
+
+    def _partial_fit_tokens(self, token_ids: np.ndarray, tokens: np.ndarray):
+        if getattr(self, "token_counter_", None) is None:
+            if hasattr(self, "vocabulary_"):
+                # Starting over would re-select the vocabulary from this chunk alone
+                raise ValueError(
+                    f"{self.feature_name!r}: fitted transformer has no token counts (they are not "
+                    "pickled); restore token_counter_ or call fit() before partial_fit()."
+                )
+            self.token_counter_ = self._new_token_counter()
+        return self._update_vocabulary(token_ids, tokens)
+
+    def _new_token_counter(self) -> SpaceSavingCounter:
+        if self.sketch_error is None:
+            return SpaceSavingCounter(capacity=None)
+        capacity = capacity_for_error(self.sketch_error)
+        if self.top_k is not None:
+            # Never track fewer candidates than the vocabulary we must emit
+            capacity = max(capacity, 2 * self.top_k)
+        return SpaceSavingCounter(capacity=capacity)
+
+    def _fit_tokens(self, token_ids: np.ndarray, tokens: np.ndarray):
+        """Learn the vocabulary from scratch (fit() is a single partial_fit)."""
+        self.token_counter_ = self._new_token_counter()
+        return self._update_vocabulary(token_ids, tokens)
+
+    def _update_vocabulary(self, token_ids: np.ndarray, tokens: np.ndarray):
+        """Fold tokenized (deduplicated per row) occurrences into the counts and re-select."""
+        # Count frequencies (rows per token)
+        counts = np.bincount(token_ids, minlength=len(tokens))
+        self.token_counter_.update(tokens.tolist(), counts.tolist())
+        token_counts: dict[str, int] = self.token_counter_.counts()
 
         # Decide which tokens to keep
         if self.top_k is not None:
@@ -217,7 +661,12 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         else:
             kept = sorted(token_counts.keys())
 
+        self._set_vocabulary(kept, frozenset())
+        return self
+
+    def _set_vocabulary(self, kept: Sequence[str], ignored: FrozenSet[str]) -> None:
         self.vocabulary_ = tuple(kept)
+        self.ignored_tokens_ = ignored
 
         # Build feature names (kept tokens + optional Other)
         names = [f"{self.feature_name}__{tok}" for tok in self.vocabulary_]
@@ -231,15 +680,40 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
             include_other=self.include_other,
             feature_name=self.feature_name,
             dtype=np.dtype(self.dtype),
+            ignored=ignored,
         )
 
-        return self
+    def prune_tokens(self, tokens: Iterable[str], into_other: bool = False) -> np.ndarray:
+        """Remove tokens from the fitted vocabulary (e.g. those a sparse model zeroed).
+
+        Parameters
+        ----------
+        tokens : Iterable[str]
+            Vocabulary tokens to remove; unknown tokens are ignored.
+        into_other : bool, default=False
+            If True, removed tokens count as Other at transform time like any
+            out-of-vocabulary token. If False they are dropped outright, so
+            outputs for the remaining columns are unchanged.
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            Mask over the previous output columns marking the ones kept.
+        """
+        check_is_fitted(self, attributes=["vocabulary_", "_cfg"])
+        drop = set(tokens) & set(self.vocabulary_)
+        keep = np.array([tok not in drop for tok in self.vocabulary_] + [True] * self.include_other, dtype=bool)
+        ignored = frozenset(getattr(self, "ignored_tokens_", frozenset()))
+        if not into_other and self.include_other:
+            ignored = ignored | drop
+        self._set_vocabulary([tok for tok in self.vocabulary_ if tok not in drop], ignored)
+        return keep
 
     # Builds the actual indicator matrix:
-    #   For each row:
-    #       Get its token set (_as_token_set).
-    #       If token is in the vocabulary, set its column to 1.
-    #       If not in vocabulary and include_other=True, set Other to 1.
+    #   Explode + normalize the column once (_tokenize_column).
+    #   Map each unique token to its column: vocabulary index, or Other when
+    #   include_other=True (otherwise dropped).
+    #   Scatter all (row, column) hits in one assignment (_assemble_indicators).
     #   Returns either:
     #       Sparse CSR matrix (if sparse_output=True).
     #       pandas DataFrame with column names (default).
@@ -258,56 +732,32 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
             Indicator matrix with columns matching get_feature_names_out().
         """
         check_is_fitted(self, attributes=["vocabulary_", "feature_names_out_", "_cfg"])
+        row_ids, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        return self._transform_tokens(len(X), row_ids, token_ids, tokens)
 
-        vocab_index = {t: i for i, t in enumerate(self._cfg.vocabulary_)}
-        n_samples = len(X)
+    def _transform_tokens(self, n_samples: int, row_ids: np.ndarray, token_ids: np.ndarray, tokens: np.ndarray):
+        """Build the indicator matrix from tokenized occurrences."""
         n_features = len(self._cfg.vocabulary_) + (1 if self._cfg.include_other else 0)
-        dtype = self._cfg.dtype
-
-        if self.sparse_output and sp is not None:
-            indptr = [0]
-            indices: List[int] = []
-            data: List[int] = []
-            other_idx = len(self._cfg.vocabulary_) if self._cfg.include_other else None
-
-            for value in X:
-                tokens = _as_token_set(value, self.normalizer)
-                row_indices: Set[int] = set()
-                for t in tokens:
-                    j = vocab_index.get(t)
-                    if j is not None:
-                        row_indices.add(j)
-                    elif other_idx is not None:
-                        row_indices.add(other_idx)
-                # Append sorted to preserve column order
-                row_sorted = sorted(row_indices)
-                indices.extend(row_sorted)
-                data.extend([1] * len(row_sorted))
-                indptr.append(len(indices))
-
-            mat = sp.csr_matrix((np.array(data, dtype=dtype), np.array(indices), np.array(indptr)),
-                                 shape=(n_samples, n_features))
-            return mat
-
-        # Dense DataFrame path
-        arr = np.zeros((n_samples, n_features), dtype=dtype)
-        # print(arr)
-        other_idx = len(self._cfg.vocabulary_) if self._cfg.include_other else None
-        # print(vocab_index)
-        for i, value in enumerate(X):
-            tokens = _as_token_set(value, self.normalizer)
-            # print(tokens)
-            other_flag = 0
-            for t in tokens:
-                j = vocab_index.get(t)
-                if j is not None:
-                    arr[i, j] = 1
-                elif other_idx is not None:
-                    other_flag = 1
-            if other_idx is not None and other_flag:
-                arr[i, other_idx] = 1
-        # print(arr)
-        return pd.DataFrame(arr, columns=self.feature_names_out_)
+        token_cols = self._token_columns(tokens)
+        col_ids = token_cols[token_ids]
+        hit = col_ids >= 0
+        row_ids, col_ids = row_ids[hit], col_ids[hit]
+
+        use_sparse = self.sparse_output and sp is not None
+        out = _assemble_indicators(row_ids, col_ids, n_samples, n_features, self._cfg.dtype, use_sparse)
+        if use_sparse:
+            return out
+        return pd.DataFrame(out, columns=self.feature_names_out_)
+
+    def _token_columns(self, tokens: np.ndarray) -> np.ndarray:
+        """Column id for each unique token: vocabulary position, Other, or -1 (dropped)."""
+        cols = pd.Index(self._cfg.vocabulary_, dtype=object).get_indexer(tokens).astype(np.int64)
+        if self._cfg.include_other:
+            unseen = cols < 0
+            if self._cfg.ignored:
+                unseen &= pd.Index(list(self._cfg.ignored), dtype=object).get_indexer(tokens) < 0
+            cols[unseen] = len(self._cfg.vocabulary_)
+        return cols
 
     # ------------------------------
     # Introspection helpers
@@ -317,6 +767,18 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
         check_is_fitted(self, attributes=["feature_names_out_"])
         return np.array(self.feature_names_out_, dtype=object)
 
+    def __getstate__(self):
+        """Pickle state without token_counter_ (the mixin drops the normalizer cache).
+
+        The counts only serve partial_fit, and exact ones hold every distinct
+        token seen in fit, far more than the kept vocabulary. Artifacts stay
+        the size of the vocabulary; a loaded transformer refuses partial_fit
+        until refit.
+        """
+        state = super().__getstate__()
+        state.pop("token_counter_", None)
+        return state
+
     # For nicer reprs in notebooks/logs
     def __repr__(self) -> str:  # pragma: no cover - cosmetic
         params = [
@@ -326,6 +788,8 @@ class MultiLabelBinarizerTransformer(BaseEstimator, TransformerMixin):
             f"include_other={self.include_other}",
             f"sparse_output={self.sparse_output}",
             f"dtype={getattr(self.dtype, 'name', self.dtype)}",
+            f"sketch_error={self.sketch_error}",
+            f"normalizer_cache_size={self.normalizer_cache_size}",
         ]
         return f"MultiLabelBinarizerTransformer({', '.join(params)})"
 
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+"""
+MultiLabelHashing transformer for sklearn Pipelines.
+
+Purpose
+-------
+Hashing-trick counterpart of MultiLabelBinarizerTransformer for effectively
+unbounded list-like fields (e.g., makerWorkshop, provenance). Each normalized
+token is hashed into one of ``n_features`` buckets, so:
+
+- there is no vocabulary pass at fit time and no top_k / __Other cut-off,
+- transform is stateless (any chunk can be transformed independently, in any
+  process) and writes CSR output directly,
+- memory is bounded by ``n_features`` regardless of how many distinct strings
+  the scraper produces.
+
+A hashed field makes the whole design sparse (pipeline._is_sparse), and the
+ridge model then picks alpha by K-fold sparse_cg fits
+(pipeline.ridge_alpha_search): fit memory follows the non-zeros, not
+rows x rows (testing/bench_sparse_scaling.py).
+
+The hash is CRC-32 of the UTF-8 token modulo ``n_features``: stable across
+processes and Python versions (unlike ``hash()``), and available without
+sklearn at serving time.
+
+Reverse map
+-----------
+Buckets are opaque, so fit() optionally records the most frequent training
+tokens per bucket (``bucket_tokens_``), letting explain.py label the most
+important buckets (e.g., ``provenance__{ulysses s. grant}``).
+
+Example
+-------
+>>> tf = MultiLabelHashingTransformer(feature_name="provenance", n_features=2**18)
+>>> Z = tf.fit_transform(X["provenance"])  # CSR, columns provenance__h0 ... provenance__h262143
+"""
+
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from .multilabel_binarizer import (
+    _NormalizerCacheMixin,
+    _assemble_indicators,
+    _default_normalizer,
+    _tokenize_column,
+)
+
+
+def hash_bucket(token: str, n_features: int) -> int:
+    """Bucket index of one normalized token (CRC-32 of UTF-8, mod n_features)."""
+    return zlib.crc32(token.encode("utf-8")) % n_features
+
+
+def _hash_tokens(tokens: Iterable[str], n_features: int) -> np.ndarray:
+    crc32 = zlib.crc32
+    return np.fromiter((crc32(t.encode("utf-8")) for t in tokens), dtype=np.int64) % n_features
+
+
+class MultiLabelHashingTransformer(_NormalizerCacheMixin, BaseEstimator, TransformerMixin):
+    """
+    Stateless hashed multi-hot encoder for multi-label categorical columns.
+
+    Parameters
+    ----------
+    feature_name : str
+        Prefix used to build output column names (e.g., "provenance").
+    n_features : int, default=2**18
+        Number of hash buckets (output columns).
+    normalizer : Optional[Callable[[str], str]], default=_default_normalizer
+        Function to normalize tokens before hashing. Use None to disable.
+    sparse_output : bool, default=True
+        If True, return a scipy.sparse CSR matrix; otherwise a dense DataFrame
+        (only sensible for small n_features).
+    dtype : str or numpy.dtype, default=np.uint8
+        Output dtype for indicators.
+    reverse_map_size : Optional[int], default=1000
+        During fit, record the bucket of the N most frequent tokens so buckets
+        can be labeled later. None or 0 disables the reverse map.
+    tokens_per_bucket : int, default=3
+        Maximum number of tokens kept per bucket in the reverse map.
+    normalizer_cache_size : Optional[int], default=4096
+        Size of the LRU raw → normalized token cache (see MultiLabelBinarizerTransformer).
+
+    Attributes
+    ----------
+    n_features_out_ : int
+        Number of output columns (named ``{feature_name}__h{bucket}``; names are
+        generated on demand rather than stored, to keep artifacts small).
+    bucket_tokens_ : Dict[int, Tuple[str, ...]]
+        Sampled reverse map bucket → most frequent training tokens.
+    """
+
+    def __init__(
+        self,
+        feature_name: str,
+        *,
+        n_features: int = 2 ** 18,
+        normalizer: Optional[Callable[[str], str]] = _default_normalizer,
+        sparse_output: bool = True,
+        dtype=np.uint8,
+        reverse_map_size: Optional[int] = 1000,
+        tokens_per_bucket: int = 3,
+        normalizer_cache_size: Optional[int] = 4096,
+    ) -> None:
+        self.feature_name = feature_name
+        self.n_features = n_features
+        self.normalizer = normalizer
+        self.sparse_output = sparse_output
+        self.dtype = dtype
+        self.reverse_map_size = reverse_map_size
+        self.tokens_per_bucket = tokens_per_bucket
+        self.normalizer_cache_size = normalizer_cache_size
+
+    # ------------------------------
+    # sklearn API
+    # ------------------------------
+    def fit(self, X: Sequence[object], y: Optional[Sequence] = None):
+        """No vocabulary is learned; only the output width and the optional reverse map."""
+        if not self.reverse_map_size:
+            self._reset()
+            return self
+        _, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        return self._fit_tokens(token_ids, tokens)
+
+    def partial_fit(self, X: Sequence[object], y: Optional[Sequence] = None):
+        """Stateless encoder: only the first chunk seeds the reverse map."""
+        if hasattr(self, "n_features_out_"):
+            return self
+        return self.fit(X)
+
+    def fit_transform(self, X: Sequence[object], y: Optional[Sequence] = None, **fit_params):
+        """Fit (reverse map only) and transform with a single tokenization."""
+        row_ids, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        self._fit_tokens(token_ids, tokens)
+        return self._transform_tokens(len(X), row_ids, token_ids, tokens)
+
+    def _fit_tokens(self, token_ids: np.ndarray, tokens: np.ndarray):
+        self._reset()
+        if self.reverse_map_size:
+            self._learn_reverse_map(token_ids, tokens)
+        return self
+
+    def _partial_fit_tokens(self, token_ids: np.ndarray, tokens: np.ndarray):
+        if hasattr(self, "n_features_out_"):
+            return self
+        return self._fit_tokens(token_ids, tokens)
+
+    def _reset(self) -> None:
+        if self.n_features < 1:
+            raise ValueError(f"n_features must be >= 1, got {self.n_features}")
+        self.n_features_out_ = int(self.n_features)
+        self.bucket_tokens_: Dict[int, Tuple[str, ...]] = {}
+
+    def transform(self, X: Sequence[object]):
+        """Hash each row's token set into bucket indicators.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix or pandas.DataFrame
+            Indicator matrix of shape (n_samples, n_features).
+        """
+        check_is_fitted(self, attributes=["n_features_out_"])
+        row_ids, token_ids, tokens = _tokenize_column(X, self.normalizer, self._get_normalizer_cache())
+        return self._transform_tokens(len(X), row_ids, token_ids, tokens)
+
+    def _transform_tokens(self, n_samples: int, row_ids: np.ndarray, token_ids: np.ndarray, tokens: np.ndarray):
+        # Hash only the unique tokens, then gather per occurrence
+        col_ids = self._token_columns(tokens)[token_ids]
+        out = _assemble_indicators(row_ids, col_ids, n_samples, self.n_features, np.dtype(self.dtype), self.sparse_output)
+        if self.sparse_output:
+            return out
+        return pd.DataFrame(out, columns=self.get_feature_names_out())
+
+    def _token_columns(self, tokens: np.ndarray) -> np.ndarray:
+        """Bucket id for each unique token."""
+        return _hash_tokens(tokens, self.n_features)
+
+    def _learn_reverse_map(self, token_ids: np.ndarray, tokens: np.ndarray) -> None:
+        counts = np.bincount(token_ids, minlength=len(tokens))
+        # Only the `reverse_map_size` most frequent tokens are sorted (most
+        # frequent first, lexicographic tie-break); which of several tokens
+        # tied at the cut-off count make it in is up to argpartition.
+        k = min(self.reverse_map_size, len(tokens))
+        top = np.argpartition(-counts, k - 1)[:k] if k < len(tokens) else np.arange(k)
+        order = top[np.lexsort((tokens[top], -counts[top]))].tolist()
+        buckets = _hash_tokens((tokens[i] for i in order), self.n_features)
+        reverse: Dict[int, List[str]] = {}
+        for i, b in zip(order, buckets.tolist()):
+            toks = reverse.setdefault(b, [])
+            if len(toks) < self.tokens_per_bucket:
+                toks.append(tokens[i])
+        self.bucket_tokens_ = {b: tuple(toks) for b, toks in reverse.items()}
+
+    # ------------------------------
+    # Introspection helpers
+    # ------------------------------
+    def get_feature_names_out(self, input_features: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Names of output features (sklearn API)."""
+        check_is_fitted(self, attributes=["n_features_out_"])
+        return np.array([f"{self.feature_name}__h{j}" for j in range(self.n_features_out_)], dtype=object)
+
+    def bucket_label(self, bucket: int) -> str:
+        """Human-readable label for a bucket: its sampled tokens, or the raw bucket name."""
+        toks = getattr(self, "bucket_tokens_", {}).get(int(bucket))
+        if not toks:
+            return f"{self.feature_name}__h{bucket}"
+        return f"{self.feature_name}__{{{' | '.join(toks)}}}"
+
+    def __repr__(self) -> str:  # pragma: no cover - cosmetic
+        params = [
+            f"feature_name='{self.feature_name}'",
+            f"n_features={self.n_features}",
+            f"sparse_output={self.sparse_output}",
+            f"dtype={getattr(self.dtype, 'name', self.dtype)}",
+            f"reverse_map_size={self.reverse_map_size}",
+        ]
+        return f"MultiLabelHashingTransformer({', '.join(params)})"
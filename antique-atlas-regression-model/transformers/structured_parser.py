@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""
+Structured-field parser for sklearn Pipelines.
+
+Purpose
+-------
+First step of the numeric branch: turns the raw bladeLength / era / sellDate
+columns into numeric features (bladeLength_in, era_year, sale_year,
+sale_timestamp) with the vectorized regex parsers of parsing.py, and passes
+any other numeric column through unchanged. Because it lives inside the
+fitted pipeline, the joblib artifact, the scoring table and the bundle all
+apply the same parsing at prediction time.
+
+fit() learns nothing but the input/output layout; it records how many rows
+each output could be parsed from (``parsed_fraction_``) for diagnostics.
+
+Example
+-------
+>>> tf = StructuredParser(outputs=["bladeLength_in", "era_year", "sale_year"], options={"cm_above": 60})
+>>> Z = tf.fit_transform(X[tf.input_columns()])  # float ndarray, NaN where unparseable
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from ..parsing import parse_frame, parse_inputs
+
+
+class StructuredParser(BaseEstimator, TransformerMixin):
+    """
+    Parse raw text columns into numeric features, one output column per name.
+
+    Parameters
+    ----------
+    outputs : Sequence[str]
+        Output column names in order. Names in parsing.PARSED_COLUMNS are
+        derived from their raw source columns; any other name is read as a
+        numeric column of the input.
+    options : Optional[Dict[str, Any]], default=None
+        Parser options (unit_col, default_unit, cm_above; see
+        parsing.PARSE_DEFAULTS).
+
+    Attributes
+    ----------
+    feature_names_in_ : np.ndarray
+        Raw input columns (parse_inputs(outputs, options)).
+    parsed_fraction_ : Dict[str, float]
+        Fraction of fitted rows with a non-NaN value, per output.
+    """
+
+    def __init__(self, outputs: Sequence[str], options: Optional[Dict[str, Any]] = None) -> None:
+        self.outputs = outputs
+        self.options = options
+
+    def input_columns(self) -> List[str]:
+        """Raw columns this parser reads."""
+        return parse_inputs(self.outputs, self.options)
+
+    def _frame(self, X: Any) -> pd.DataFrame:
+        if isinstance(X, pd.DataFrame):
+            return X
+        return pd.DataFrame(np.asarray(X, dtype=object), columns=self.input_columns())
+
+    def fit(self, X: Any, y: Optional[Sequence] = None):
+        """Record the input layout and the per-output parse coverage."""
+        self.fit_transform(X)
+        return self
+
+    def fit_transform(self, X: Any, y: Optional[Sequence] = None, **fit_params) -> np.ndarray:
+        columns = self.input_columns()
+        frame = self._frame(X)
+        missing = [c for c in columns if c not in frame.columns]
+        if missing:
+            raise ValueError(f"StructuredParser input is missing columns {missing}")
+        self.feature_names_in_ = np.asarray(columns, dtype=object)
+        self.n_features_in_ = len(columns)
+        Z = parse_frame(frame, self.outputs, self.options)
+        observed = (~np.isnan(Z)).mean(axis=0) if len(Z) else np.zeros(len(self.outputs))
+        self.parsed_fraction_ = {name: float(f) for name, f in zip(self.outputs, observed)}
+        return Z
+
+    def transform(self, X: Any) -> np.ndarray:
+        """Float matrix (n_samples, len(outputs)); NaN where a value cannot be parsed."""
+        check_is_fitted(self, attributes=["parsed_fraction_"])
+        return parse_frame(self._frame(X), self.outputs, self.options)
+
+    def get_feature_names_out(self, input_features: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Names of output features (sklearn API): the configured outputs."""
+        return np.asarray(list(self.outputs), dtype=object)
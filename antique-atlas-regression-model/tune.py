@@ -0,0 +1,386 @@
+"""
+tune.py — Cross-validated search over ridge alpha and multi-label top_k.
+
+What it does
+------------
+- Splits the training data into K folds (shuffled KFold, as in testing/model_testing.py).
+- Fits the preprocessing ColumnTransformer ONCE per fold, with every field at
+  the largest top_k of its grid, and caches the transformed fold matrices
+  (in memory, or on disk via joblib.Memory keyed by data hash + config).
+- Derives every smaller top_k from that block without refitting: top_k keeps
+  the k most frequent tokens, so the vocabulary for k is a prefix of the one
+  for max(k); the dropped columns are OR-ed into the field's __Other column.
+- Sweeps all alphas for each (fold, top_k combination) in a process pool; on
+  dense matrices one SVD per task serves every alpha.
+- Refits the full pipeline with the winning config and writes the artifact
+  (plus bundle and the sufficient statistics incremental.py folds new sales
+  into), and a "tuning" section in metrics.json.
+
+Usage
+-----
+python -m antique-atlas-regression-model.tune \
+  --train antique-atlas-regression-model/swords.parquet \
+  --cv 5 --alphas 0.1 1 10 100 \
+  --top-k material=5,10,15 --top-k provenance=10,25 \
+  --out artifacts/pipeline.joblib --metrics artifacts/metrics.json
+
+Notes
+-----
+- Without --top-k, each vocabulary field with a top_k is searched over
+  {top_k // 2, top_k, 2 * top_k}.
+- Scores are computed in dollars (predictions are expm1 of the log-space fit),
+  lower is better.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bundle import save_bundle
+from .incremental import compute_sufficient_stats, save_sufficient_stats
+from .lazy_imports import lazy_import
+from .pipeline import DEFAULT_CONFIG, _make_column_transformer, build_pipeline
+from .train import _read_table
+
+# Heavy dependencies load on first use, after argument parsing
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+SCORERS = ("rmse", "mae", "rmsle")
+
+
+# ------------------------------
+# Grid helpers
+# ------------------------------
+
+def _parse_top_k(specs: Sequence[str]) -> Dict[str, List[int]]:
+    """Parse repeated FIELD=K1,K2,... options."""
+    grid: Dict[str, List[int]] = {}
+    for spec in specs:
+        field, _, values = spec.partition("=")
+        if not values:
+            raise ValueError(f"Bad --top-k {spec!r}; expected FIELD=K1,K2,...")
+        grid[field.strip()] = sorted({int(v) for v in values.split(",") if v.strip()})
+    return grid
+
+
+def _default_top_k_grid(config: Dict[str, Any]) -> Dict[str, List[int]]:
+    grid: Dict[str, List[int]] = {}
+    for field, opts in config.get("multi_categorical_cols", {}).items():
+        k = opts.get("top_k")
+        if opts.get("mode", "vocab") == "vocab" and k:
+            grid[field] = sorted({max(1, k // 2), k, 2 * k})
+    return grid
+
+
+def _check_top_k_grid(config: Dict[str, Any], grid: Dict[str, List[int]]) -> None:
+    fields = config.get("multi_categorical_cols", {})
+    for field in grid:
+        opts = fields.get(field)
+        if opts is None:
+            raise ValueError(f"--top-k field {field!r} is not in multi_categorical_cols")
+        if opts.get("mode", "vocab") != "vocab":
+            raise ValueError(f"--top-k field {field!r} is hashed; top_k only applies to vocabulary fields")
+
+
+def _combinations(grid: Dict[str, List[int]]) -> List[Dict[str, int]]:
+    fields = list(grid)
+    return [dict(zip(fields, ks)) for ks in itertools.product(*(grid[f] for f in fields))]
+
+
+def _with_top_k(config: Dict[str, Any], top_k: Dict[str, int]) -> Dict[str, Any]:
+    cfg = copy.deepcopy(config)
+    for field, k in top_k.items():
+        cfg["multi_categorical_cols"][field]["top_k"] = int(k)
+    return cfg
+
+
+# ------------------------------
+# Per-fold preprocessing (fit once, cacheable)
+# ------------------------------
+
+def _ml_layout(ct: Any) -> Dict[str, Tuple[int, int, bool]]:
+    """Field -> (first vocabulary column, vocabulary size, has Other column) in ct's output."""
+    layout: Dict[str, Tuple[int, int, bool]] = {}
+    for name, trans, _ in ct.transformers_:
+        if name != "ml":
+            continue
+        start = ct.output_indices_["ml"].start
+        for f, (field, enc) in enumerate(trans.encoders_.items()):
+            if hasattr(enc, "vocabulary_"):
+                layout[field] = (start + trans.feature_offsets_[f], len(enc.vocabulary_), bool(enc.include_other))
+    return layout
+
+
+def preprocess_fold(config: Dict[str, Any], X_train: pd.DataFrame, X_val: pd.DataFrame) -> Dict[str, Any]:
+    """Fit the ColumnTransformer on one training fold and transform both sides.
+
+    Preprocessing is label-free, so it is shared by every alpha; the caller
+    passes the config with each searched field at its largest top_k.
+    """
+    ct = _make_column_transformer(config)
+    Z_train = ct.fit_transform(X_train)
+    return {"Z_train": Z_train, "Z_val": ct.transform(X_val), "layout": _ml_layout(ct)}
+
+
+def _select_top_k(Z: Any, layout: Dict[str, Tuple[int, int, bool]], top_k: Dict[str, int]) -> Any:
+    """Columns the max-k block would have had with the given (smaller) top_k.
+
+    Column order differs from a refit (rebuilt Other columns go last), which
+    does not change a ridge fit.
+    """
+    from scipy import sparse as sp
+
+    drop: List[int] = []
+    others: List[Any] = []
+    for field, k in top_k.items():
+        start, size, has_other = layout[field]
+        if k >= size:
+            continue
+        dropped = list(range(start + k, start + size))
+        drop += dropped
+        if has_other:
+            other = start + size
+            drop.append(other)
+            cols = dropped + [other]
+            if sp.issparse(Z):
+                hit = np.asarray(Z[:, cols].getnnz(axis=1) > 0)
+                others.append(sp.csr_matrix(hit.reshape(-1, 1).astype(Z.dtype)))
+            else:
+                others.append((Z[:, cols] != 0).any(axis=1, keepdims=True).astype(Z.dtype))
+    if not drop:
+        return Z
+    keep = np.setdiff1d(np.arange(Z.shape[1]), drop)
+    if sp.issparse(Z):
+        return sp.hstack([Z.tocsc()[:, keep]] + others, format="csr")
+    return np.hstack([Z[:, keep]] + others)
+
+
+# ------------------------------
+# Alpha sweep (runs in worker processes)
+# ------------------------------
+
+_FOLDS: List[Dict[str, Any]] = []
+
+
+def _init_worker(folds: List[Dict[str, Any]]) -> None:
+    global _FOLDS
+    _FOLDS = folds
+
+
+def _score(y_true: np.ndarray, y_pred: np.ndarray, scoring: str) -> float:
+    if scoring == "mae":
+        return float(np.mean(np.abs(y_pred - y_true)))
+    if scoring == "rmsle":
+        return float(np.sqrt(np.mean((np.log1p(np.maximum(y_pred, 0)) - np.log1p(y_true)) ** 2)))
+    return float(np.sqrt(np.mean((y_pred - y_true) ** 2)))
+
+
+def _ridge_path(Z_train: Any, t_train: np.ndarray, Z_val: Any, alphas: Sequence[float]) -> List[np.ndarray]:
+    """Log-space validation predictions of Ridge(alpha, fit_intercept=True) for every alpha."""
+    from scipy import sparse as sp
+
+    if sp.issparse(Z_train):
+        from sklearn.linear_model import Ridge
+
+        return [Ridge(alpha=a).fit(Z_train, t_train).predict(Z_val) for a in alphas]
+
+    # Dense: one SVD of the centered design serves the whole alpha path
+    x_mean = Z_train.mean(axis=0)
+    t_mean = t_train.mean()
+    U, s, Vt = np.linalg.svd(Z_train - x_mean, full_matrices=False)
+    Ut_t = U.T @ (t_train - t_mean)
+    Zc_val_V = (Z_val - x_mean) @ Vt.T
+    return [t_mean + Zc_val_V @ (s / (s ** 2 + a) * Ut_t) for a in alphas]
+
+
+def _evaluate_task(fold: int, top_k: Dict[str, int], alphas: Sequence[float], scoring: str) -> List[float]:
+    data = _FOLDS[fold]
+    Z_train = _select_top_k(data["Z_train"], data["layout"], top_k)
+    Z_val = _select_top_k(data["Z_val"], data["layout"], top_k)
+    preds = _ridge_path(Z_train, np.log1p(data["y_train"]), Z_val, alphas)
+    return [_score(data["y_val"], np.expm1(p), scoring) for p in preds]
+
+
+# ------------------------------
+# Search driver
+# ------------------------------
+
+def tune(
+    config: Dict[str, Any],
+    X: pd.DataFrame,
+    y: pd.Series,
+    alphas: Sequence[float],
+    top_k_grid: Dict[str, List[int]],
+    cv: int = 5,
+    scoring: str = "rmse",
+    n_jobs: int = 1,
+    cache_dir: Optional[str] = None,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Grid-search alpha x top_k with per-fold preprocessing fitted once.
+
+    Returns a JSON-serializable summary with every combination's fold scores
+    and the best combination (lowest mean score).
+    """
+    from sklearn.model_selection import KFold
+
+    if scoring not in SCORERS:
+        raise ValueError(f"Unknown scoring {scoring!r}. Use one of {SCORERS}.")
+    _check_top_k_grid(config, top_k_grid)
+    max_config = _with_top_k(config, {f: max(ks) for f, ks in top_k_grid.items()})
+
+    fit_fold = preprocess_fold
+    if cache_dir:
+        # Keyed by the hash of (config, X_train, X_val): re-runs and other
+        # alpha/top_k grids reuse the fold matrices
+        fit_fold = joblib.Memory(cache_dir, verbose=0).cache(preprocess_fold)
+
+    t0 = time.perf_counter()
+    folds: List[Dict[str, Any]] = []
+    y_arr = np.asarray(y, dtype=float)
+    for train_idx, val_idx in KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X):
+        fold = dict(fit_fold(max_config, X.iloc[train_idx], X.iloc[val_idx]))
+        fold["y_train"], fold["y_val"] = y_arr[train_idx], y_arr[val_idx]
+        folds.append(fold)
+    t_preprocess = time.perf_counter() - t0
+
+    combos = _combinations(top_k_grid)
+    tasks = [(f, combo) for combo in combos for f in range(len(folds))]
+    if n_jobs == 1:
+        _init_worker(folds)
+        results = [_evaluate_task(f, combo, alphas, scoring) for f, combo in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs if n_jobs > 0 else None,
+                                 initializer=_init_worker, initargs=(folds,)) as pool:
+            futures = [pool.submit(_evaluate_task, f, combo, alphas, scoring) for f, combo in tasks]
+            results = [fut.result() for fut in futures]
+
+    # (combo, alpha) -> fold scores
+    rows: List[Dict[str, Any]] = []
+    for c, combo in enumerate(combos):
+        per_fold = np.array(results[c * len(folds):(c + 1) * len(folds)])
+        for a, alpha in enumerate(alphas):
+            rows.append({
+                "top_k": combo,
+                "alpha": float(alpha),
+                "mean": float(per_fold[:, a].mean()),
+                "std": float(per_fold[:, a].std()),
+                "folds": [float(v) for v in per_fold[:, a]],
+            })
+    best = min(rows, key=lambda r: r["mean"])
+    return {
+        "scoring": scoring,
+        "cv": int(cv),
+        "alphas": [float(a) for a in alphas],
+        "top_k_grid": top_k_grid,
+        "n_candidates": len(rows),
+        "preprocess_fits": len(folds),
+        "preprocess_seconds": round(t_preprocess, 3),
+        "search_seconds": round(time.perf_counter() - t0, 3),
+        "results": sorted(rows, key=lambda r: r["mean"]),
+        "best": {k: best[k] for k in ("top_k", "alpha", "mean", "std")},
+    }
+
+
+def best_config(config: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    """The config with the winning top_k values and a single winning alpha."""
+    cfg = _with_top_k(config, summary["best"]["top_k"])
+    cfg["model"] = {**cfg.get("model", {}), "alphas": [summary["best"]["alpha"]]}
+    return cfg
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Tune alpha and multi-label top_k with cached per-fold preprocessing")
+    parser.add_argument("--train", type=str, default="data/swords_train.parquet", help="Path to training data (.parquet or .csv)")
+    parser.add_argument("--cv", type=int, default=5, help="Number of folds")
+    parser.add_argument("--alphas", type=float, nargs="+", default=None, help="Alpha grid (default: config model.alphas)")
+    parser.add_argument("--top-k", type=str, action="append", default=[], help="FIELD=K1,K2,... (repeatable); default halves/doubles each configured top_k")
+    parser.add_argument("--scoring", type=str, choices=SCORERS, default="rmse", help="Dollar-space metric to minimize")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for the sweep (-1: all cores, 1: in-process)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="joblib.Memory directory for fold matrices (default: in memory only)")
+    parser.add_argument("--random-state", type=int, default=42, help="Random seed for fold shuffling")
+    parser.add_argument("--out", type=str, default="artifacts/pipeline.joblib", help="Output path for the refitted winning pipeline")
+    parser.add_argument("--metrics", type=str, default="artifacts/metrics.json", help="Output path for metrics JSON")
+    args = parser.parse_args(argv)
+
+    cfg: Dict[str, Any] = DEFAULT_CONFIG
+    if cfg.get("model", {}).get("type", "ridge") != "ridge":
+        raise ValueError("tune.py searches ridge alphas; set model.type to 'ridge'.")
+    target_col = cfg["target_col"]
+    alphas = args.alphas or cfg.get("model", {}).get("alphas", [0.1, 1.0, 10.0, 100.0])
+    top_k_grid = _parse_top_k(args.top_k) if args.top_k else _default_top_k_grid(cfg)
+
+    df = _read_table(args.train)
+    X = df.drop(columns=[target_col])
+    y = df[target_col]
+
+    summary = tune(cfg, X, y, alphas, top_k_grid, cv=args.cv, scoring=args.scoring,
+                   n_jobs=args.n_jobs, cache_dir=args.cache_dir, random_state=args.random_state)
+    best = summary["best"]
+    print(f"[tune.py] {summary['n_candidates']} candidates x {args.cv} folds; "
+          f"preprocessing of {summary['preprocess_fits']} folds took {summary['preprocess_seconds']}s, "
+          f"total {summary['search_seconds']}s")
+    print(f"[tune.py] Best {args.scoring}={best['mean']:.2f} (±{best['std']:.2f}) "
+          f"alpha={best['alpha']} top_k={best['top_k']}")
+
+    # Refit the winning config on all data and persist it like train.py does
+    win_cfg = best_config(cfg, summary)
+    pipe = build_pipeline(win_cfg).fit(X, y)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.metrics).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, args.out)
+    stats = compute_sufficient_stats(pipe, X, y)
+    if stats is not None:
+        save_sufficient_stats(stats, args.out, pipe)
+    bundle_path = None
+    try:
+        bundle_path = save_bundle(pipe, args.out)
+    except ValueError as e:
+        print(f"[tune.py] Skipping bundle: {e}")
+
+    existing: Dict[str, Any] = {}
+    if Path(args.metrics).exists():
+        try:
+            with open(args.metrics, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except Exception:
+            existing = {}
+
+    payload = {
+        **existing,
+        "train_artifact": os.path.abspath(args.out),
+        "bundle_manifest": os.path.abspath(bundle_path) if bundle_path else None,
+        "n_train": int(len(X)),
+        "config": {
+            "numeric_cols": win_cfg.get("numeric_cols", []),
+            "parse": dict(win_cfg.get("parse", {})),
+            "single_categorical_cols": win_cfg.get("single_categorical_cols", []),
+            "multi_categorical_cols": win_cfg.get("multi_categorical_cols", {}),
+            "model": win_cfg.get("model", {}),
+            "sparse": bool(win_cfg.get("sparse", False)),
+            "dtype": str(win_cfg.get("dtype", "float64")),
+        },
+        "tuning": summary,
+    }
+    with open(args.metrics, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+    print("[tune.py] Saved winning pipeline to:", args.out)
+
+
+if __name__ == "__main__":
+    main()